@@ -0,0 +1,24 @@
+"""
+Время прогона по модулям: сводка в конце pytest, в том числе
+при параллельном запуске pytest -n auto (pytest-xdist).
+Бюджеты SQL-запросов подключаются плагином core.pytest_plugin.
+"""
+from collections import defaultdict
+
+pytest_plugins = ('core.pytest_plugin',)
+
+_timings = defaultdict(float)
+
+
+def pytest_runtest_logreport(report):
+    _timings[report.nodeid.split('::', 1)[0]] += report.duration
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _timings:
+        return
+    terminalreporter.write_sep('=', 'время по модулям')
+    for module, seconds in sorted(
+        _timings.items(), key=lambda item: item[1], reverse=True
+    ):
+        terminalreporter.write_line(f'{seconds:8.3f} s  {module}')
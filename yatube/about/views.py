@@ -1,11 +1,16 @@
+from django.utils.decorators import method_decorator
 from django.views.generic import TemplateView
 
+from core.prerender import prerendered
 
+
+@method_decorator(prerendered, name='dispatch')
 class AboutAuthorView(TemplateView):
     """Об авторе."""
     template_name = 'about/author.html'
 
 
+@method_decorator(prerendered, name='dispatch')
 class AboutTechView(TemplateView):
     """Технологии."""
     template_name = 'about/tech.html'
@@ -0,0 +1,60 @@
+from django.contrib import admin
+
+from . import jobs
+from .models import Job, OutgoingEmail
+from .paginator import EstimatedCountPaginator
+
+
+@admin.register(OutgoingEmail)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'subject',
+        'to',
+        'status',
+        'attempts',
+        'next_attempt',
+        'sent',
+    )
+    list_filter = ('status',)
+    search_fields = ('to', 'subject')
+    readonly_fields = ('attempts', 'last_error', 'created', 'sent')
+    empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'status',
+        'processed',
+        'total',
+        'progress_display',
+        'created_by',
+        'created',
+        'finished',
+    )
+    list_filter = ('status', 'name')
+    list_select_related = ('created_by',)
+    readonly_fields = (
+        'name', 'params', 'status', 'cursor', 'processed', 'total', 'error',
+        'created_by', 'created', 'started', 'heartbeat', 'finished',
+    )
+    actions = ('resume_jobs',)
+    empty_value_display = '-пусто-'
+
+    def progress_display(self, job):
+        progress = job.progress
+        return '' if progress is None else f'{progress}%'
+    progress_display.short_description = 'Готово'
+
+    def resume_jobs(self, request, queryset):
+        resumed = jobs.resume(queryset)
+        self.message_user(request, f'Возвращено в очередь задач: {resumed}')
+    resume_jobs.short_description = 'Продолжить упавшие задачи'
+
+    def has_add_permission(self, request):
+        return False
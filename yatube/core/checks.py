@@ -0,0 +1,134 @@
+"""
+Проверки боевой конфигурации для python manage.py check --deploy.
+
+Каждая проверка ищет настройку, которая заметно замедляет сайт
+под нагрузкой: журнал запросов при DEBUG, перечитывание шаблонов,
+новое соединение с базой на каждый запрос, кэш в памяти процесса,
+файловый кэш или кэш в базе вместо memcached или redis, статику
+без сжатия и хешей в именах и живые обновления на синхронных
+воркерах.
+"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+# Кэши, у которых incr не атомарный, а запись при заполненности
+# перебирает все записи, чтобы выбросить треть
+SLOW_CACHES = (
+    'django.core.cache.backends.filebased.FileBasedCache',
+    'django.core.cache.backends.db.DatabaseCache',
+)
+# Воркеры, у которых открытый поток не занимает процесс целиком
+ASYNC_WORKER_CLASSES = ('gevent', 'eventlet', 'tornado')
+MANIFEST_STORAGES = (
+    'django.contrib.staticfiles.storage.ManifestStaticFilesStorage',
+    'whitenoise.storage.CompressedManifestStaticFilesStorage',
+)
+
+
+def _is_cached(engine):
+    """Без явных загрузчиков Django кэширует шаблоны, если DEBUG выключен."""
+    loaders = engine.get('OPTIONS', {}).get('loaders')
+    if loaders is None:
+        return not settings.DEBUG
+    return any(
+        (loader[0] if isinstance(loader, (list, tuple)) else loader)
+        == CACHED_LOADER for loader in loaders
+    )
+
+
+@register(deploy=True)
+def check_debug(app_configs, **kwargs):
+    if settings.DEBUG:
+        return [Warning(
+            'DEBUG включен: каждый SQL-запрос сохраняется '
+            'в connection.queries.',
+            hint='Запускайте сайт с DJANGO_ENV=prod и без DEBUG=True.',
+            id='core.W001',
+        )]
+    return []
+
+
+@register(deploy=True)
+def check_template_cache(app_configs, **kwargs):
+    errors = []
+    for engine in settings.TEMPLATES:
+        if not engine['BACKEND'].endswith('.DjangoTemplates'):
+            continue
+        if not _is_cached(engine):
+            errors.append(Warning(
+                f'Шаблоны движка {engine.get("NAME", "django")} '
+                'перечитываются на каждый запрос.',
+                hint=f'Оберните загрузчики в {CACHED_LOADER}.',
+                id='core.W002',
+            ))
+    return errors
+
+
+@register(deploy=True)
+def check_persistent_connections(app_configs, **kwargs):
+    errors = []
+    for alias, database in settings.DATABASES.items():
+        if not database.get('CONN_MAX_AGE'):
+            errors.append(Warning(
+                f'База {alias} открывает новое соединение '
+                'на каждый запрос.',
+                hint='Задайте CONN_MAX_AGE, например 60.',
+                id='core.W003',
+            ))
+    return errors
+
+
+@register(deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    errors = []
+    for alias, cache in settings.CACHES.items():
+        if cache['BACKEND'] in LOCAL_CACHES:
+            errors.append(Warning(
+                f'Кэш {alias} не общий для процессов сервера.',
+                hint='Используйте memcached или redis.',
+                id='core.W004',
+            ))
+        elif cache['BACKEND'] in SLOW_CACHES:
+            errors.append(Warning(
+                f'Кэш {alias} пишется на каждый запрос без атомарного '
+                'incr: счетчики запросов и версии графа подписок теряют '
+                'обновления, а файловый кэш еще и перебирает каталог '
+                'при каждой записи.',
+                hint='Используйте memcached или redis.',
+                id='core.W006',
+            ))
+    return errors
+
+
+@register(deploy=True)
+def check_static_storage(app_configs, **kwargs):
+    if settings.STATICFILES_STORAGE not in MANIFEST_STORAGES:
+        return [Warning(
+            'Статика отдается без сжатия и хешей в именах файлов.',
+            hint='Используйте whitenoise.storage.'
+                 'CompressedManifestStaticFilesStorage.',
+            id='core.W005',
+        )]
+    return []
+
+
+@register(deploy=True)
+def check_live_updates(app_configs, **kwargs):
+    if (
+        settings.LIVE_UPDATES_ENABLED
+        and settings.SERVER_WORKER_CLASS not in ASYNC_WORKER_CLASSES
+    ):
+        return [Warning(
+            'Живые обновления включены на синхронных воркерах: каждая '
+            'открытая вкладка держит воркер до LIVE_STREAM_DURATION секунд.',
+            hint='Запускайте сервер с воркерами gevent или eventlet '
+                 'и укажите их в SERVER_WORKER_CLASS либо выключите '
+                 'LIVE_UPDATES_ENABLED.',
+            id='core.W007',
+        )]
+    return []
@@ -0,0 +1,156 @@
+"""
+Фоновые задачи над большими наборами строк.
+
+Тип задачи регистрируется декоратором register: имя, подпись,
+функция queryset(params, staged), выбирающая строки, и функция обработки
+process(queryset, params) для одной порции. enqueue записывает задачу
+в таблицу Job, команда run_jobs выполняет очередь.
+
+Выбор из админки (хоть «выбрать все» на миллионе строк) не попадает
+в params: enqueue(rows=...) копирует id в таблицу JobItem одним
+INSERT ... SELECT, а queryset задачи получает staged — подзапрос
+по этим id — вместо длинного списка параметров.
+
+Строки обрабатываются порциями по JOB_CHUNK_SIZE в порядке id.
+Порция и продвижение курсора задачи фиксируются одной транзакцией,
+поэтому после падения обработчика задача продолжается с первой
+незавершенной порции: брошенной считается задача, у которой порций
+не было дольше JOB_STALE_AFTER секунд.
+"""
+import json
+import logging
+from collections import namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q, Value, DateTimeField
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Job, JobItem
+
+logger = logging.getLogger(__name__)
+
+JobType = namedtuple('JobType', 'label queryset process')
+
+_registry = {}
+
+
+def register(name, label, queryset):
+    """Регистрирует функцию обработки порции как тип задачи name."""
+    def decorator(process):
+        _registry[name] = JobType(label, queryset, process)
+        return process
+    return decorator
+
+
+def job_type(name):
+    return _registry[name]
+
+
+def staged(job):
+    """Подзапрос id, отобранных для задачи."""
+    return JobItem.objects.filter(job=job).values('object_id')
+
+
+def stage(job, ids):
+    """
+    Копирует в JobItem значения запроса ids (values_list одного поля)
+    одним INSERT ... SELECT, не вычитывая их в процесс.
+    """
+    sql, params = ids.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {JobItem._meta.db_table} (job_id, object_id) '
+            f'SELECT %s, staged.* FROM ({sql}) staged',
+            [job.pk, *params]
+        )
+
+
+def enqueue(name, params, user=None, rows=None):
+    """
+    Ставит задачу в очередь и запоминает, сколько строк обработать.
+    rows — запрос values_list с id, которые задача получит в staged.
+    """
+    with transaction.atomic():
+        job = Job.objects.create(
+            name=name,
+            params=json.dumps(params),
+            created_by=user if user is not None and user.is_authenticated
+            else None
+        )
+        if rows is not None:
+            stage(job, rows)
+        job.total = job_type(name).queryset(params, staged(job)).count()
+        job.save(update_fields=['total'])
+    return job
+
+
+def claim():
+    """Берет следующую ожидающую или брошенную задачу, либо None."""
+    while True:
+        now = timezone.now()
+        stale = now - timedelta(seconds=settings.JOB_STALE_AFTER)
+        job = Job.objects.filter(
+            Q(status=Job.PENDING) | Q(status=Job.RUNNING, heartbeat__lt=stale)
+        ).order_by('pk').first()
+        if job is None:
+            return None
+        # Задачу забирает тот обработчик, чей UPDATE изменил строку первым
+        claimed = Job.objects.filter(
+            pk=job.pk, status=job.status, heartbeat=job.heartbeat
+        ).update(
+            status=Job.RUNNING,
+            heartbeat=now,
+            started=Coalesce(
+                'started', Value(now, output_field=DateTimeField())
+            )
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run(job, chunk_size=None, progress=None):
+    """
+    Выполняет задачу с ее курсора. progress(job) вызывается после
+    каждой порции. Возвращает задачу в конечном состоянии.
+    """
+    chunk_size = chunk_size or settings.JOB_CHUNK_SIZE
+    kind = job_type(job.name)
+    params = json.loads(job.params)
+    rows = kind.queryset(params, staged(job)).order_by('pk')
+    try:
+        while True:
+            with transaction.atomic():
+                pks = list(rows.filter(pk__gt=job.cursor).values_list(
+                    'pk', flat=True
+                )[:chunk_size])
+                if not pks:
+                    break
+                kind.process(rows.filter(pk__in=pks), params)
+                job.cursor = pks[-1]
+                job.processed += len(pks)
+                job.heartbeat = timezone.now()
+                job.save(update_fields=['cursor', 'processed', 'heartbeat'])
+            if progress is not None:
+                progress(job)
+    except Exception as error:
+        logger.exception('Задача %s прервана', job)
+        job.status = Job.FAILED
+        job.error = f'{type(error).__name__}: {error}'
+    else:
+        job.status = Job.DONE
+        job.error = ''
+        job.items.all().delete()
+    job.finished = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished'])
+    return job
+
+
+def resume(queryset):
+    """Возвращает упавшие задачи в очередь; они продолжат с курсора."""
+    return queryset.filter(status=Job.FAILED).update(
+        status=Job.PENDING, heartbeat=None, finished=None
+    )
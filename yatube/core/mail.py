@@ -0,0 +1,164 @@
+"""
+Очередь исходящей почты.
+
+QueuedEmailBackend (EMAIL_BACKEND) только записывает письма в таблицу
+OutgoingEmail, поэтому сброс пароля и уведомления не ждут SMTP-сервер.
+Команда send_queued_email отправляет письма пачками по
+EMAIL_QUEUE_BATCH_SIZE через EMAIL_DELIVERY_BACKEND, одним соединением
+на пачку. Неудачная попытка откладывает письмо на
+EMAIL_QUEUE_RETRY_DELAY * 2 ** (номер попытки - 1) секунд, но не больше
+EMAIL_QUEUE_MAX_DELAY; после EMAIL_QUEUE_MAX_ATTEMPTS попыток письмо
+помечается неотправленным.
+
+Вложения в очереди не хранятся. Отправитель рассчитан на один процесс.
+"""
+import json
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import DatabaseError
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def _join(addresses):
+    return '\n'.join(addresses)
+
+
+def _split(value):
+    return value.split('\n') if value else []
+
+
+def to_outgoing(message):
+    """Строка очереди из EmailMessage."""
+    html = next(
+        (
+            content
+            for content, mimetype in getattr(message, 'alternatives', ())
+            if mimetype == 'text/html'
+        ),
+        ''
+    )
+    return OutgoingEmail(
+        subject=message.subject,
+        body=message.body,
+        html_body=html,
+        from_email=message.from_email,
+        to=_join(message.to),
+        cc=_join(message.cc),
+        bcc=_join(message.bcc),
+        reply_to=_join(message.reply_to),
+        headers=json.dumps(message.extra_headers)
+        if message.extra_headers else ''
+    )
+
+
+def to_message(email, connection=None):
+    """EmailMessage из строки очереди."""
+    message = EmailMultiAlternatives(
+        email.subject,
+        email.body,
+        email.from_email,
+        _split(email.to),
+        bcc=_split(email.bcc),
+        connection=connection,
+        headers=json.loads(email.headers) if email.headers else None,
+        cc=_split(email.cc),
+        reply_to=_split(email.reply_to)
+    )
+    if email.html_body:
+        message.attach_alternative(email.html_body, 'text/html')
+    return message
+
+
+def retry_delay(attempts):
+    """Пауза перед следующей попыткой после attempts неудачных."""
+    delay = settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.EMAIL_QUEUE_MAX_DELAY))
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Ставит письма в очередь вместо отправки."""
+
+    def send_messages(self, email_messages):
+        emails = [
+            to_outgoing(message) for message in email_messages
+            if message.recipients()
+        ]
+        try:
+            OutgoingEmail.objects.bulk_create(emails)
+        except DatabaseError:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(emails)
+
+
+def _fail(email, error, now, max_attempts):
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    if email.attempts >= max_attempts:
+        email.status = OutgoingEmail.FAILED
+    else:
+        email.next_attempt = now + retry_delay(email.attempts)
+
+
+def send_queued(batch_size=None, max_attempts=None):
+    """
+    Отправляет одну пачку писем, срок которых подошел.
+    Возвращает (отправлено, не отправлено).
+    """
+    batch_size = batch_size or settings.EMAIL_QUEUE_BATCH_SIZE
+    max_attempts = max_attempts or settings.EMAIL_QUEUE_MAX_ATTEMPTS
+    now = timezone.now()
+    emails = list(OutgoingEmail.objects.filter(
+        status=OutgoingEmail.PENDING, next_attempt__lte=now
+    )[:batch_size])
+    if not emails:
+        return 0, 0
+    sent, failed = [], []
+    connection = get_connection(settings.EMAIL_DELIVERY_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        logger.warning('Почтовый сервер недоступен: %s', error)
+        for email in emails:
+            _fail(email, error, now, max_attempts)
+        failed = emails
+    else:
+        try:
+            for email in emails:
+                try:
+                    to_message(email, connection).send()
+                except Exception as error:
+                    logger.warning('Письмо %s не отправлено: %s', email.pk,
+                                   error)
+                    _fail(email, error, now, max_attempts)
+                    failed.append(email)
+                else:
+                    sent.append(email.pk)
+        finally:
+            connection.close()
+    OutgoingEmail.objects.filter(pk__in=sent).update(
+        status=OutgoingEmail.SENT, sent=now, last_error=''
+    )
+    OutgoingEmail.objects.bulk_update(
+        failed, ['status', 'attempts', 'next_attempt', 'last_error']
+    )
+    return len(sent), len(failed)
+
+
+def purge_sent(days=None):
+    """Удаляет отправленные письма старше days дней."""
+    if days is None:
+        days = settings.EMAIL_QUEUE_KEEP_DAYS
+    return OutgoingEmail.objects.filter(
+        status=OutgoingEmail.SENT,
+        sent__lt=timezone.now() - timedelta(days=days)
+    ).delete()[0]
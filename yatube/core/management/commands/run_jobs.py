@@ -0,0 +1,46 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи из очереди порциями.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=settings.JOB_CHUNK_SIZE,
+            help='Сколько строк обрабатывать одной транзакцией'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, проверяя очередь раз в --interval'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах, когда очередь пуста'
+        )
+
+    def progress(self, job):
+        total = job.total if job.total is not None else '?'
+        self.stdout.write(f'{job}: обработано {job.processed} из {total}')
+
+    def handle(self, *args, **options):
+        while True:
+            job = jobs.claim()
+            if job is not None:
+                jobs.run(job, options['chunk'], self.progress)
+                self.stdout.write(f'{job}: {job.get_status_display()}')
+                continue
+            if not options['loop']:
+                break
+            close_old_connections()
+            time.sleep(options['interval'])
@@ -0,0 +1,45 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core import mail
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из очереди пачками с повторными попытками.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=settings.EMAIL_QUEUE_BATCH_SIZE,
+            help='Сколько писем отправлять одним соединением'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, проверяя очередь раз в --interval'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=5,
+            help='Пауза в секундах, когда очередь пуста'
+        )
+
+    def handle(self, *args, **options):
+        batch = options['batch']
+        self.stdout.write(f'Удалено старых писем: {mail.purge_sent()}')
+        while True:
+            sent, failed = mail.send_queued(batch)
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, отложено: {failed}'
+                )
+            if not options['loop']:
+                break
+            if sent + failed < batch:
+                close_old_connections()
+                time.sleep(options['interval'])
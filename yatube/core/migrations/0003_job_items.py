@@ -0,0 +1,26 @@
+# Generated by Django 2.2.16 on 2026-10-19 09:04
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobItem',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.BigIntegerField(verbose_name='Id строки')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='core.Job', verbose_name='Задача')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='jobitem',
+            index=models.Index(fields=['job', 'object_id'], name='core_jobite_job_id_719605_idx'),
+        ),
+    ]
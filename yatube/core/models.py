@@ -1,4 +1,6 @@
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -11,3 +13,125 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку (core.mail)."""
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ждет отправки'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Не отправлено'),
+    )
+    subject = models.TextField('Тема')
+    body = models.TextField('Текст')
+    html_body = models.TextField('HTML', blank=True)
+    from_email = models.CharField('Отправитель', max_length=254)
+    to = models.TextField('Получатели')
+    cc = models.TextField('Копия', blank=True)
+    bcc = models.TextField('Скрытая копия', blank=True)
+    reply_to = models.TextField('Ответить', blank=True)
+    headers = models.TextField('Заголовки', blank=True)
+    status = models.CharField(
+        'Состояние',
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    next_attempt = models.DateTimeField(
+        'Следующая попытка',
+        default=timezone.now
+    )
+    last_error = models.TextField('Последняя ошибка', blank=True)
+    created = models.DateTimeField('Поставлено в очередь', auto_now_add=True)
+    sent = models.DateTimeField('Отправлено', blank=True, null=True)
+
+    class Meta:
+        ordering = ['pk']
+        indexes = (
+            models.Index(fields=['status', 'next_attempt']),
+        )
+
+    def __str__(self):
+        recipient = self.to.partition('\n')[0]
+        return f'{self.subject[:30]} -> {recipient}'
+
+
+class Job(models.Model):
+    """Фоновая задача, которая обрабатывает строки порциями (core.jobs)."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'Ждет запуска'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+    name = models.CharField('Задача', max_length=100)
+    params = models.TextField('Параметры', default='{}')
+    status = models.CharField(
+        'Состояние',
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING
+    )
+    cursor = models.BigIntegerField('Обработано до id', default=0)
+    processed = models.PositiveIntegerField('Обработано', default=0)
+    total = models.PositiveIntegerField('Всего', blank=True, null=True)
+    error = models.TextField('Ошибка', blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='jobs',
+        verbose_name='Автор'
+    )
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    started = models.DateTimeField('Запущена', blank=True, null=True)
+    heartbeat = models.DateTimeField(
+        'Последняя порция',
+        blank=True,
+        null=True
+    )
+    finished = models.DateTimeField('Завершена', blank=True, null=True)
+
+    class Meta:
+        ordering = ['-pk']
+        indexes = (
+            models.Index(fields=['status', 'heartbeat']),
+        )
+
+    def __str__(self):
+        return f'#{self.pk} {self.name}'
+
+    @property
+    def progress(self):
+        """Доля обработанных строк в процентах или None."""
+        if not self.total:
+            return None
+        return min(100, round(100 * self.processed / self.total))
+
+
+class JobItem(models.Model):
+    """Id строки, отобранной для задачи: выбор не хранится в params."""
+    job = models.ForeignKey(
+        'Job',
+        on_delete=models.CASCADE,
+        related_name='items',
+        verbose_name='Задача'
+    )
+    object_id = models.BigIntegerField('Id строки')
+
+    class Meta:
+        indexes = (
+            models.Index(fields=['job', 'object_id']),
+        )
+
+    def __str__(self):
+        return f'{self.job_id}: {self.object_id}'
@@ -0,0 +1,53 @@
+"""
+Пагинатор для списков админки на больших таблицах.
+
+Для списка без фильтров точный COUNT(*) заменяется оценкой:
+статистикой планировщика в PostgreSQL и MySQL, наибольшим id в SQLite.
+Оценка используется, только если она не меньше
+ADMIN_ESTIMATED_COUNT_THRESHOLD; маленькие и отфильтрованные списки
+считаются точно.
+"""
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max
+from django.utils.functional import cached_property
+
+_ESTIMATE_SQL = {
+    'postgresql': 'SELECT reltuples::bigint FROM pg_class WHERE relname = %s',
+    'mysql': (
+        'SELECT table_rows FROM information_schema.tables '
+        'WHERE table_schema = DATABASE() AND table_name = %s'
+    ),
+}
+
+
+def estimated_count(queryset):
+    """Примерное число строк таблицы или None, если оценки нет."""
+    if queryset.query.where or queryset.query.distinct:
+        return None
+    connection = connections[queryset.db]
+    sql = _ESTIMATE_SQL.get(connection.vendor)
+    if sql is None:
+        return queryset.model._default_manager.using(queryset.db).aggregate(
+            estimate=Max('pk')
+        )['estimate'] or 0
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [queryset.model._meta.db_table])
+        row = cursor.fetchone()
+    return row[0] if row and row[0] is not None and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        estimate = None
+        if hasattr(self.object_list, 'query'):
+            estimate = estimated_count(self.object_list)
+        if (
+            estimate is not None
+            and estimate >= settings.ADMIN_ESTIMATED_COUNT_THRESHOLD
+        ):
+            return estimate
+        return super().count
@@ -0,0 +1,123 @@
+"""
+Полностраничный кэш статичных страниц.
+
+Содержимое страниц из settings.PRERENDERED_PAGES меняется только
+с выкладкой и от того, вошел ли пользователь. Декоратор prerendered
+кэширует готовый HTML отдельно для гостя и для каждого пользователя.
+PrerenderMiddleware отдает гостевую копию до сессий и авторизации:
+у запроса без cookie сессии нечего искать в базе сессий.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import NoReverseMatch, reverse
+from django.utils import timezone
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers,
+    set_response_etag
+)
+
+GUEST = 'guest'
+
+
+def page_key(path, state=GUEST):
+    """Ключ кэша: страница, гость или id пользователя, выкладка и год."""
+    return (
+        f'prerender:{settings.DEPLOY_VERSION}:{timezone.now().year}:'
+        f'{state}:{path}'
+    )
+
+
+def prerendered_paths():
+    paths = set()
+    for name in settings.PRERENDERED_PAGES:
+        try:
+            paths.add(reverse(name))
+        except NoReverseMatch:
+            continue
+    return paths
+
+
+def forget_users(user_ids):
+    """Сбрасывает готовые страницы пользователей после изменений в шапке."""
+    paths = prerendered_paths()
+    cache.delete_many([
+        page_key(path, user_id) for user_id in user_ids for path in paths
+    ])
+
+
+def _finish(request, response, authenticated):
+    """Заголовки кэша и ответ 304 по If-None-Match."""
+    if authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(
+            response, public=True, max_age=settings.PRERENDER_MAX_AGE
+        )
+    patch_vary_headers(response, ('Cookie',))
+    set_response_etag(response)
+    return get_conditional_response(
+        request, etag=response['ETag'], response=response
+    ) or response
+
+
+def _cached_response(request, content, authenticated):
+    return _finish(request, HttpResponse(content), authenticated)
+
+
+def _has_messages(request):
+    storage = getattr(request, '_messages', None)
+    return storage is not None and len(storage) > 0
+
+
+def prerendered(view):
+    """Кэширует HTML страницы отдельно для гостя и каждого пользователя."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        user = request.user
+        authenticated = user.is_authenticated
+        key = page_key(request.path, user.pk if authenticated else GUEST)
+        content = cache.get(key)
+        if content is not None:
+            return _cached_response(request, content, authenticated)
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        if (
+            response.status_code == 200
+            and not _has_messages(request)
+            and not request.META.get('CSRF_COOKIE_USED')
+        ):
+            cache.set(key, response.content, settings.PRERENDER_TIMEOUT)
+        return _finish(request, response, authenticated)
+    return wrapper
+
+
+class PrerenderMiddleware:
+    """Отдает гостю готовую страницу без сессии, авторизации и шаблонов."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.paths = None
+
+    def __call__(self, request):
+        if self.paths is None:
+            self.paths = prerendered_paths()
+        if (
+            request.method in ('GET', 'HEAD')
+            and request.path in self.paths
+            and settings.SESSION_COOKIE_NAME not in request.COOKIES
+            and 'messages' not in request.COOKIES
+        ):
+            content = cache.get(page_key(request.path))
+            if content is not None:
+                response = _cached_response(request, content, False)
+                response['X-Frame-Options'] = getattr(
+                    settings, 'X_FRAME_OPTIONS', 'SAMEORIGIN'
+                )
+                return response
+        return self.get_response(request)
@@ -0,0 +1,56 @@
+"""
+Плагин pytest с бюджетами SQL-запросов (core.query_budget).
+
+pytest --query-budgets
+    проверяет каждую страницу, открытую тестовым клиентом,
+    по бюджету ее имени URL из settings.QUERY_BUDGETS;
+@pytest.mark.query_budget(max_queries, max_duplicates=None)
+    бюджет на тело теста без фикстур;
+фикстура query_budget
+    бюджет на блок кода: with query_budget(3): client.get(url).
+"""
+import pytest
+
+from core.query_budget import QueryBudget
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--query-budgets',
+        action='store_true',
+        help='Проверять страницы по settings.QUERY_BUDGETS'
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(max_queries, max_duplicates=None): '
+        'наибольшее число SQL-запросов в тесте'
+    )
+
+
+@pytest.fixture(autouse=True)
+def _enforce_query_budgets(request):
+    if request.config.getoption('query_budgets'):
+        request.getfixturevalue('settings').QUERY_BUDGETS_ENFORCED = True
+
+
+@pytest.fixture
+def query_budget():
+    return QueryBudget
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker('query_budget')
+    if marker is None:
+        yield
+        return
+    budget = QueryBudget(*marker.args, label=item.nodeid, **marker.kwargs)
+    budget.__enter__()
+    outcome = yield
+    if outcome.excinfo is None:
+        budget.__exit__(None, None, None)
+    else:
+        budget.__exit__(*outcome.excinfo)
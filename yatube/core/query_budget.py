@@ -0,0 +1,132 @@
+"""
+Бюджеты SQL-запросов для тестов.
+
+Бюджет задает наибольшее число запросов и, по желанию, наибольшее
+число повторов: запросов, которые отличаются от уже выполненных только
+значениями параметров. Повторы и рост числа запросов вместе с объемом
+данных выдают N+1.
+
+Бюджеты страниц объявлены в settings.QUERY_BUDGETS по имени URL:
+{'posts:index': (7, 0)}. Пока QUERY_BUDGETS_ENFORCED включен,
+QueryBudgetMiddleware проверяет каждый запрос тестового клиента
+и падает с текстом лишних SQL-запросов.
+
+Управление транзакциями и запросы к таблицам из
+settings.QUERY_BUDGET_IGNORED_TABLES не считаются: sorl-thumbnail
+заполняет thumbnail_kvstore по одному запросу на картинку только
+при пустом кэше.
+"""
+import re
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+PARAMS_RE = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+TRANSACTION_RE = re.compile(
+    r'^(BEGIN|SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO)\b'
+)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_shape(sql):
+    """SQL без значений параметров."""
+    return PARAMS_RE.sub('?', sql)
+
+
+def counted(sql_list):
+    """
+    Запросы без управления транзакциями и без обращений к таблицам
+    из QUERY_BUDGET_IGNORED_TABLES.
+    """
+    ignored = tuple(
+        f'"{table}"'
+        for table in getattr(settings, 'QUERY_BUDGET_IGNORED_TABLES', ())
+    )
+    return [
+        sql for sql in sql_list
+        if not TRANSACTION_RE.match(sql)
+        and not any(table in sql for table in ignored)
+    ]
+
+
+def duplicates(sql_list):
+    """Шаблоны запросов, выполненные больше одного раза."""
+    shapes = Counter(query_shape(sql) for sql in sql_list)
+    return {shape: count for shape, count in shapes.items() if count > 1}
+
+
+def check_budget(sql_list, max_queries, max_duplicates=None, label=''):
+    """Бросает QueryBudgetExceeded, если бюджет превышен."""
+    sql_list = counted(sql_list)
+    repeated = duplicates(sql_list)
+    duplicate_count = sum(count - 1 for count in repeated.values())
+    errors = []
+    if len(sql_list) > max_queries:
+        errors.append(f'запросов {len(sql_list)}, бюджет {max_queries}')
+    if max_duplicates is not None and duplicate_count > max_duplicates:
+        errors.append(f'повторов {duplicate_count}, бюджет {max_duplicates}')
+    if not errors:
+        return
+    lines = [f'{label or "Бюджет запросов"}: {"; ".join(errors)}']
+    lines.extend(f'{number}. {sql}' for number, sql in enumerate(sql_list, 1))
+    if repeated:
+        lines.append('Повторы:')
+        lines.extend(f'{count}x {shape}' for shape, count in repeated.items())
+    raise QueryBudgetExceeded('\n'.join(lines))
+
+
+def budget_for(view_name):
+    """Бюджет страницы из settings.QUERY_BUDGETS: (запросов, повторов)."""
+    return getattr(settings, 'QUERY_BUDGETS', {}).get(view_name)
+
+
+class QueryBudget(CaptureQueriesContext):
+    """
+    with QueryBudget(5, max_duplicates=0, label='posts:index'):
+        client.get('/')
+    """
+
+    def __init__(self, max_queries, max_duplicates=None, label='',
+                 connection=connection):
+        super().__init__(connection)
+        self.max_queries = max_queries
+        self.max_duplicates = max_duplicates
+        self.label = label
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        super().__exit__(exc_type, exc_value, traceback)
+        if exc_type is None:
+            check_budget(
+                self.sql, self.max_queries, self.max_duplicates, self.label
+            )
+
+    @property
+    def sql(self):
+        return [query['sql'] for query in self.captured_queries]
+
+
+class QueryBudgetMiddleware:
+    """Проверяет запросы страницы по бюджету ее имени URL."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not getattr(settings, 'QUERY_BUDGETS_ENFORCED', False):
+            return self.get_response(request)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get_response(request)
+        match = request.resolver_match
+        budget = budget_for(match.view_name) if match else None
+        if budget is not None:
+            check_budget(
+                [query['sql'] for query in queries.captured_queries],
+                *budget,
+                label=match.view_name
+            )
+        return response
@@ -0,0 +1,100 @@
+"""
+Локальный SMTP-сервер для тестов и разработки.
+
+with SMTPStub() as server:
+    письма на 127.0.0.1:server.port попадают в server.messages;
+server.fail_next = 2
+    следующие два письма отклоняются временной ошибкой 451.
+"""
+import email
+import socketserver
+import threading
+
+
+class _Handler(socketserver.StreamRequestHandler):
+
+    def reply(self, line):
+        self.wfile.write(f'{line}\r\n'.encode())
+
+    def read_data(self):
+        lines = []
+        for line in iter(self.rfile.readline, b''):
+            if line in (b'.\r\n', b'.\n'):
+                break
+            lines.append(line[1:] if line.startswith(b'..') else line)
+        return b''.join(lines)
+
+    def handle(self):
+        stub = self.server.stub
+        sender, recipients = None, []
+        self.reply('220 localhost SMTP stub')
+        for line in iter(self.rfile.readline, b''):
+            command = line.decode('ascii', 'replace').strip()
+            verb = command[:4].upper()
+            if verb in ('HELO', 'EHLO'):
+                self.reply('250 localhost')
+            elif verb == 'MAIL':
+                sender, recipients = command.partition(':')[2].strip(), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.partition(':')[2].strip())
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                if stub.accept(sender, recipients, self.read_data()):
+                    self.reply('250 OK')
+                else:
+                    self.reply('451 Try again later')
+                sender, recipients = None, []
+            elif verb in ('RSET', 'NOOP'):
+                if verb == 'RSET':
+                    sender, recipients = None, []
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class SMTPStub:
+    """SMTP-сервер в отдельном потоке, письма хранятся в памяти."""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        self.messages = []
+        self.envelopes = []
+        self.fail_next = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._server = socketserver.ThreadingTCPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self.host, self.port = self._server.server_address
+
+    def accept(self, sender, recipients, data):
+        with self._lock:
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                return False
+            self.envelopes.append((sender, recipients))
+            self.messages.append(email.message_from_bytes(data))
+            return True
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
@@ -0,0 +1,75 @@
+"""
+Хранилище файлов в памяти процесса для тестов.
+
+Загруженные картинки не пишутся на диск. Файлы разложены по значению
+MEDIA_ROOT, поэтому @override_settings(MEDIA_ROOT=...) по-прежнему
+отделяет файлы одного тестового класса от другого, а параллельные
+процессы тестов не видят файлов друг друга.
+"""
+import posixpath
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.utils.deconstruct import deconstructible
+from django.utils.encoding import filepath_to_uri
+
+_files = {}
+
+
+@deconstructible
+class InMemoryStorage(Storage):
+    def __init__(self, location=None, base_url=None):
+        self._location = location
+        self._base_url = base_url
+
+    @property
+    def files(self):
+        location = self._location or settings.MEDIA_ROOT
+        return _files.setdefault(location, {})
+
+    def clear(self):
+        self.files.clear()
+
+    def _open(self, name, mode='rb'):
+        try:
+            return ContentFile(self.files[name], name=name)
+        except KeyError:
+            raise FileNotFoundError(name)
+
+    def _save(self, name, content):
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        data = b''.join(
+            chunk.encode() if isinstance(chunk, str) else chunk
+            for chunk in content.chunks()
+        )
+        self.files[name] = data
+        return name
+
+    def delete(self, name):
+        self.files.pop(name, None)
+
+    def exists(self, name):
+        return name in self.files
+
+    def size(self, name):
+        return len(self.files[name])
+
+    def listdir(self, path):
+        prefix = path.strip('/') + '/' if path.strip('/') else ''
+        directories, files = set(), []
+        for name in self.files:
+            if not name.startswith(prefix):
+                continue
+            head, nested, _ = name[len(prefix):].partition('/')
+            if nested:
+                directories.add(head)
+            else:
+                files.append(head)
+        return sorted(directories), sorted(files)
+
+    def url(self, name):
+        base_url = self._base_url or settings.MEDIA_URL
+        return urljoin(base_url, filepath_to_uri(posixpath.normpath(name)))
@@ -0,0 +1,41 @@
+"""
+Тестовый раннер, который после прогона печатает время по модулям.
+При --parallel результаты приходят из процессов пачками, поэтому
+время по модулям точно только для последовательного прогона.
+"""
+from collections import defaultdict
+from time import perf_counter
+from unittest import TextTestResult
+
+from django.test.runner import DiscoverRunner
+
+
+class TimedTextTestResult(TextTestResult):
+    timings = defaultdict(float)
+
+    def startTest(self, test):
+        self._started = perf_counter()
+        super().startTest(test)
+
+    def stopTest(self, test):
+        super().stopTest(test)
+        self.timings[type(test).__module__] += perf_counter() - self._started
+
+
+class TimedTestRunner(DiscoverRunner):
+    def get_resultclass(self):
+        return super().get_resultclass() or TimedTextTestResult
+
+    def run_suite(self, suite, **kwargs):
+        TimedTextTestResult.timings.clear()
+        result = super().run_suite(suite, **kwargs)
+        timings = sorted(
+            TimedTextTestResult.timings.items(),
+            key=lambda item: item[1],
+            reverse=True
+        )
+        if timings and self.verbosity > 0:
+            result.stream.writeln('\nВремя по модулям:')
+            for module, seconds in timings:
+                result.stream.writeln(f'{seconds:8.3f} с  {module}')
+        return result
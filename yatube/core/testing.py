@@ -0,0 +1,23 @@
+"""
+Помощники для тестов.
+
+IsolatedCacheMixin дает каждому тесту собственный пустой LocMemCache
+через override_settings: тесты не сбрасывают общий кэш процесса
+и не видят записи друг друга, в том числе при pytest -n auto.
+"""
+from django.test import override_settings
+
+
+class IsolatedCacheMixin:
+    """Отдельный кэш на каждый тест вместо cache.clear() в setUp."""
+
+    def setUp(self):
+        isolated = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': self.id(),
+            }
+        })
+        isolated.enable()
+        self.addCleanup(isolated.disable)
+        super().setUp()
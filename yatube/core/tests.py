@@ -1,9 +1,407 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import mail as django_mail
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.mail import EmailMultiAlternatives
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
 from http import HTTPStatus
 
+from . import checks, mail, prerender, traffic
+from .models import OutgoingEmail
+from .smtp_stub import SMTPStub
+from .storage import InMemoryStorage
+from .testing import IsolatedCacheMixin
+
+User = get_user_model()
+
 
 class ViewTestClass(TestCase):
     def test_error_page(self):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class DeployChecksTests(TestCase):
+    @override_settings(DEBUG=True)
+    def test_debug_reported(self):
+        """Включенный DEBUG попадает в отчет check --deploy."""
+        self.assertEqual(
+            [error.id for error in checks.check_debug(None)], ['core.W001']
+        )
+
+    def test_local_cache_reported(self):
+        """Кэш в памяти процесса считается ошибкой конфигурации."""
+        ids = [error.id for error in checks.check_shared_cache(None)]
+        self.assertEqual(ids, ['core.W004'])
+
+    @override_settings(CACHES={'default': {
+        'BACKEND': 'django.core.cache.backends.memcached.PyLibMCCache',
+        'LOCATION': '127.0.0.1:11211',
+    }})
+    def test_shared_cache_passes(self):
+        """Memcached общий для процессов и атомарно выполняет incr."""
+        self.assertEqual(checks.check_shared_cache(None), [])
+
+    def test_file_and_db_caches_reported(self):
+        """Файловый кэш и кэш в базе не подходят для боевого режима."""
+        for backend in checks.SLOW_CACHES:
+            with self.subTest(backend=backend), override_settings(CACHES={
+                'default': {'BACKEND': backend, 'LOCATION': 'yatube_cache'}
+            }):
+                ids = [error.id for error in checks.check_shared_cache(None)]
+                self.assertEqual(ids, ['core.W006'])
+
+    @override_settings(LIVE_UPDATES_ENABLED=True)
+    def test_live_updates_need_async_workers(self):
+        """Живые обновления на синхронных воркерах попадают в отчет."""
+        with override_settings(SERVER_WORKER_CLASS='sync'):
+            ids = [error.id for error in checks.check_live_updates(None)]
+        self.assertEqual(ids, ['core.W007'])
+        with override_settings(SERVER_WORKER_CLASS='gevent'):
+            self.assertEqual(checks.check_live_updates(None), [])
+
+    def test_template_loaders(self):
+        """Проверка находит шаблоны без кэширующего загрузчика."""
+        engine = settings.TEMPLATES[0]
+        plain = dict(engine, OPTIONS={'loaders': settings.TEMPLATE_LOADERS})
+        with override_settings(TEMPLATES=[plain]):
+            ids = [error.id for error in checks.check_template_cache(None)]
+        self.assertEqual(ids, ['core.W002'])
+        cached = dict(
+            engine, OPTIONS={'loaders': settings.CACHED_TEMPLATE_LOADERS}
+        )
+        with override_settings(TEMPLATES=[cached]):
+            self.assertEqual(checks.check_template_cache(None), [])
+
+
+class InMemoryStorageTests(TestCase):
+    def setUp(self):
+        self.storage = InMemoryStorage()
+        self.addCleanup(self.storage.clear)
+
+    def test_save_and_open(self):
+        """Файл сохраняется в памяти и читается обратно."""
+        name = self.storage.save('posts/a.txt', ContentFile(b'data'))
+        self.assertTrue(self.storage.exists(name))
+        self.assertEqual(self.storage.open(name).read(), b'data')
+        self.assertEqual(self.storage.size(name), 4)
+        self.assertEqual(self.storage.listdir(''), (['posts'], []))
+        self.assertEqual(self.storage.listdir('posts'), ([], ['a.txt']))
+        self.assertEqual(self.storage.url(name), '/media/posts/a.txt')
+
+    def test_media_root_separates_files(self):
+        """Разные MEDIA_ROOT не видят файлов друг друга."""
+        self.storage.save('a.txt', ContentFile(b'data'))
+        with override_settings(MEDIA_ROOT='/other'):
+            self.assertFalse(self.storage.exists('a.txt'))
+
+
+class PrerenderTests(IsolatedCacheMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('about:author')
+
+    def test_guest_page_served_without_queries(self):
+        """Гость получает готовую страницу без запросов к базе."""
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertIn('public', second['Cache-Control'])
+        self.assertIn('max-age=', second['Cache-Control'])
+        self.assertIn('Cookie', second['Vary'])
+        self.assertEqual(second['X-Frame-Options'], 'SAMEORIGIN')
+
+    def test_user_gets_own_copy(self):
+        """У вошедшего пользователя своя копия страницы."""
+        self.client.get(self.url)
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Пользователь: HasNoName')
+        self.assertIn('private', response['Cache-Control'])
+        cached = self.client.get(self.url)
+        self.assertEqual(cached.content, response.content)
+
+    def test_etag_not_modified(self):
+        """Повторный запрос с ETag получает 304."""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+
+    def test_deploy_version_resets_cache(self):
+        """Новая выкладка рендерит страницу заново."""
+        self.client.get(self.url)
+        key = prerender.page_key(self.url)
+        self.assertIsNotNone(cache.get(key))
+        with override_settings(DEPLOY_VERSION='next'):
+            self.assertIsNone(cache.get(prerender.page_key(self.url)))
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+    EMAIL_DELIVERY_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+    EMAIL_HOST='127.0.0.1',
+    EMAIL_TIMEOUT=5,
+    EMAIL_QUEUE_MAX_ATTEMPTS=3
+)
+class QueuedEmailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.smtp = SMTPStub().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.smtp.stop()
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='reader', email='reader@example.com',
+            password='password'
+        )
+
+    def setUp(self):
+        self.smtp.messages.clear()
+        self.smtp.fail_next = 0
+        self.settings_override = override_settings(EMAIL_PORT=self.smtp.port)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def queue(self, count=1):
+        for number in range(count):
+            message = EmailMultiAlternatives(
+                f'Письмо {number}', 'Текст', 'site@example.com',
+                ['reader@example.com'], headers={'X-Yatube': 'test'}
+            )
+            message.attach_alternative('<p>Текст</p>', 'text/html')
+            message.send()
+
+    def test_password_reset_only_queues(self):
+        """Сброс пароля записывает письмо в очередь и не ждет SMTP."""
+        response = self.client.post(
+            reverse('users:password_reset_form'),
+            {'email': 'reader@example.com'}
+        )
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(OutgoingEmail.objects.count(), 1)
+        self.assertEqual(self.smtp.messages, [])
+
+    def test_batch_sent_over_smtp(self):
+        """Пачка уходит через SMTP вместе с HTML и заголовками."""
+        self.queue(3)
+        self.assertEqual(mail.send_queued(batch_size=2), (2, 0))
+        self.assertEqual(mail.send_queued(batch_size=2), (1, 0))
+        self.assertEqual(len(self.smtp.messages), 3)
+        message = self.smtp.messages[0]
+        self.assertEqual(message['X-Yatube'], 'test')
+        self.assertEqual(
+            [part.get_content_type() for part in message.walk()],
+            ['multipart/alternative', 'text/plain', 'text/html']
+        )
+        self.assertFalse(OutgoingEmail.objects.exclude(
+            status=OutgoingEmail.SENT
+        ).exists())
+
+    def test_failed_delivery_retried_with_backoff(self):
+        """Отказ сервера откладывает письмо с растущей паузой."""
+        self.queue()
+        self.smtp.fail_next = 2
+        with self.assertLogs('core.mail', 'WARNING'):
+            self.assertEqual(mail.send_queued(), (0, 1))
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('451', email.last_error)
+        self.assertGreater(email.next_attempt, timezone.now())
+        self.assertEqual(mail.send_queued(), (0, 0))
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        with self.assertLogs('core.mail', 'WARNING'):
+            mail.send_queued()
+        self.assertEqual(
+            mail.retry_delay(2) - mail.retry_delay(1), mail.retry_delay(1)
+        )
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        self.assertEqual(mail.send_queued(), (1, 0))
+        self.assertEqual(OutgoingEmail.objects.get().attempts, 2)
+
+    def test_gives_up_after_max_attempts(self):
+        """После EMAIL_QUEUE_MAX_ATTEMPTS попыток письмо не отправляется."""
+        self.queue()
+        self.smtp.fail_next = 10
+        with self.assertLogs('core.mail', 'WARNING') as logs:
+            for _ in range(3):
+                OutgoingEmail.objects.update(next_attempt=timezone.now())
+                mail.send_queued()
+        self.assertEqual(len(logs.output), 3)
+        self.assertEqual(OutgoingEmail.objects.get().status,
+                         OutgoingEmail.FAILED)
+
+    def test_unreachable_server_postpones_batch(self):
+        """Недоступный сервер откладывает всю пачку."""
+        self.queue(2)
+        closed = SMTPStub()
+        closed.stop()
+        with override_settings(EMAIL_PORT=closed.port), \
+                self.assertLogs('core.mail', 'WARNING'):
+            self.assertEqual(mail.send_queued(), (0, 2))
+        self.assertEqual(
+            list(OutgoingEmail.objects.values_list('attempts', flat=True)),
+            [1, 1]
+        )
+
+    def test_command_sends_and_purges(self):
+        """Команда отправляет очередь и удаляет старые письма."""
+        self.queue(2)
+        OutgoingEmail.objects.filter(pk=OutgoingEmail.objects.first().pk)\
+            .update(status=OutgoingEmail.SENT,
+                    sent=timezone.now() - timedelta(days=60))
+        out = StringIO()
+        call_command('send_queued_email', stdout=out)
+        self.assertIn('Удалено старых писем: 1', out.getvalue())
+        self.assertIn('Отправлено писем: 1, отложено: 0', out.getvalue())
+        self.assertEqual(django_mail.outbox, [])
+
+
+@override_settings(
+    RATE_LIMIT_ENABLED=True,
+    RATE_LIMITS={
+        'posts:index': ('ip', 3, 60, None),
+        'posts:add_comment': ('user', 2, 60, ('POST',)),
+    },
+    RATE_LIMIT_FREE_PAGES=2,
+    RATE_LIMIT_DEEP_PAGE_COST=3
+)
+class RateLimitTests(IsolatedCacheMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    def test_bucket_refills(self):
+        """Пустая корзина наполняется со временем."""
+        self.assertEqual(traffic.take('bucket', 2, 10, now=100), 0)
+        self.assertEqual(traffic.take('bucket', 2, 10, now=100), 0)
+        self.assertEqual(traffic.take('bucket', 2, 10, now=100), 5)
+        self.assertEqual(traffic.take('bucket', 2, 10, now=105), 0)
+
+    def test_feed_limited_by_ip(self):
+        """Лента отвечает 429 с Retry-After, когда жетоны кончились."""
+        url = reverse('posts:index')
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, HTTPStatus.OK)
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertGreaterEqual(int(response['Retry-After']), 1)
+        other = self.client.get(url, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(other.status_code, HTTPStatus.OK)
+
+    def test_deep_pages_cost_more(self):
+        """Глубокая страница ленты съедает корзину за один запрос."""
+        url = reverse('posts:index')
+        self.client.get(url, {'page': 50})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+
+    def test_only_listed_methods_counted(self):
+        """Лимит комментариев считает только POST и ведется по пользователю."""
+        self.client.force_login(self.user)
+        url = reverse('posts:add_comment', args=(1,))
+        for _ in range(2):
+            self.assertNotEqual(
+                self.client.post(url).status_code,
+                HTTPStatus.TOO_MANY_REQUESTS
+            )
+        self.assertNotEqual(
+            self.client.get(url).status_code, HTTPStatus.TOO_MANY_REQUESTS
+        )
+        self.assertEqual(
+            self.client.post(url).status_code, HTTPStatus.TOO_MANY_REQUESTS
+        )
+
+    @override_settings(RATE_LIMIT_IP_HEADER='HTTP_X_FORWARDED_FOR')
+    def test_spoofed_forwarded_for_ignored(self):
+        """Подставленные клиентом адреса не дают новую корзину."""
+        url = reverse('posts:index')
+        for number in range(3):
+            response = self.client.get(
+                url, HTTP_X_FORWARDED_FOR=f'1.1.1.{number}, 10.0.0.7'
+            )
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = self.client.get(
+            url, HTTP_X_FORWARDED_FOR='8.8.8.8, 10.0.0.7'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        request = RequestFactory().get(
+            url, HTTP_X_FORWARDED_FOR='8.8.8.8, 10.0.0.7, 172.16.0.1'
+        )
+        with override_settings(RATE_LIMIT_TRUSTED_PROXIES=2):
+            self.assertEqual(traffic.client_ip(request), '10.0.0.7')
+        with override_settings(RATE_LIMIT_TRUSTED_PROXIES=5):
+            self.assertEqual(traffic.client_ip(request), '127.0.0.1')
+
+    @override_settings(RATE_LIMIT_ENABLED=False)
+    def test_disabled(self):
+        url = reverse('posts:index')
+        for _ in range(5):
+            self.assertEqual(self.client.get(url).status_code, HTTPStatus.OK)
+
+
+@override_settings(
+    LOAD_SHED_ENABLED=True,
+    LOAD_SHED_MAX_IN_FLIGHT=1,
+    LOAD_SHED_DB_LATENCY=0.5,
+    LOAD_SHED_VIEWS=('posts:index',)
+)
+class LoadSheddingTests(TestCase):
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = traffic.LoadSheddingMiddleware(lambda request: None)
+
+    def shed(self, name='posts:index'):
+        request = self.factory.get('/')
+        request.resolver_match = type('Match', (), {'view_name': name})
+        return self.middleware.process_view(request, None, (), {})
+
+    def test_normal_load_passes(self):
+        self.assertIsNone(self.shed())
+
+    def test_too_many_in_flight(self):
+        """Лишние запросы в работе: дорогая страница отвечает 503."""
+        self.middleware.in_flight = 2
+        response = self.shed()
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '10')
+        self.assertIsNone(self.shed('posts:post_detail'))
+
+    def test_slow_database(self):
+        """Медленная база включает сброс, простой его снимает."""
+        self.middleware.latency.alpha = 1
+        self.middleware.latency.observe(2)
+        self.assertEqual(
+            self.shed().status_code, HTTPStatus.SERVICE_UNAVAILABLE
+        )
+        self.middleware.latency._updated -= 60
+        self.assertIsNone(self.shed())
+
+    def test_counts_queries_of_request(self):
+        """Middleware замеряет SQL-запросы, выполненные во время запроса."""
+        def view(request):
+            User.objects.count()
+            return middleware.in_flight
+
+        middleware = traffic.LoadSheddingMiddleware(view)
+        self.assertEqual(middleware(self.factory.get('/')), 1)
+        self.assertEqual(middleware.in_flight, 0)
+        self.assertGreater(middleware.latency.value, 0)
@@ -0,0 +1,207 @@
+"""
+Ограничение частоты запросов и сброс нагрузки.
+
+RateLimitMiddleware держит в кэше token bucket на каждую пару
+«страница из settings.RATE_LIMITS + пользователь или IP». Правило
+{'posts:add_comment': ('user', 10, 60, ('POST',))}: ключ 'user'
+(гостя считаем по IP) или 'ip', емкость корзины, за сколько секунд
+она наполняется заново и какие методы считаются (None — все).
+Страница ленты глубже RATE_LIMIT_FREE_PAGES стоит
+RATE_LIMIT_DEEP_PAGE_COST жетонов: так быстрее упирается в лимит
+тот, кто обходит ?page=N подряд. Пустая корзина — ответ 429.
+
+LoadSheddingMiddleware считает запросы, которые процесс обрабатывает
+прямо сейчас, и среднее время SQL-запросов. Пока одно из них выше
+порога, страницы из settings.LOAD_SHED_VIEWS отвечают 503: дешевые
+страницы и формы продолжают работать, а база успевает разгрузиться.
+Среднее время затухает само, поэтому после простоя сброс прекращается,
+даже если дорогие страницы все это время не выполнялись.
+"""
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+
+RATE_KEY_PREFIX = 'ratelimit'
+
+
+def client_ip(request):
+    """
+    IP клиента. За прокси берется из settings.RATE_LIMIT_IP_HEADER:
+    RATE_LIMIT_TRUSTED_PROXIES-я запись справа — ее дописал последний
+    наш прокси. Записи левее клиент может подставить сам.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR', '')
+    values = [
+        value.strip() for value in
+        request.META.get(settings.RATE_LIMIT_IP_HEADER, '').split(',')
+        if value.strip()
+    ]
+    proxies = max(settings.RATE_LIMIT_TRUSTED_PROXIES, 1)
+    if len(values) < proxies:
+        return remote_addr
+    return values[-proxies]
+
+
+def client_key(request, scope):
+    user = getattr(request, 'user', None)
+    if scope == 'user' and user is not None and user.is_authenticated:
+        return f'user:{user.pk}'
+    return f'ip:{client_ip(request)}'
+
+
+def request_cost(request):
+    """Цена запроса в жетонах: глубокие страницы лент дороже."""
+    try:
+        page = int(request.GET.get('page', 1))
+    except (TypeError, ValueError):
+        return 1
+    if page > settings.RATE_LIMIT_FREE_PAGES:
+        return settings.RATE_LIMIT_DEEP_PAGE_COST
+    return 1
+
+
+def take(key, capacity, period, cost=1, now=None):
+    """
+    Снимает cost жетонов с корзины key. Возвращает 0, если хватило,
+    иначе через сколько секунд жетонов станет достаточно.
+
+    Чтение и запись корзины не атомарны: при гонке двух запросов
+    один из них может пройти даром, для ограничения частоты это
+    допустимо и не стоит блокировок в кэше.
+    """
+    now = time.time() if now is None else now
+    rate = capacity / period
+    cost = min(cost, capacity)
+    tokens, updated = cache.get(key, (capacity, now))
+    tokens = min(capacity, tokens + (now - updated) * rate)
+    if tokens < cost:
+        cache.set(key, (tokens, now), period)
+        return (cost - tokens) / rate
+    cache.set(key, (tokens - cost, now), period)
+    return 0
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        'Слишком много запросов, попробуйте позже.',
+        status=429, content_type='text/plain; charset=utf-8'
+    )
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def service_unavailable(retry_after):
+    response = HttpResponse(
+        'Сервер перегружен, попробуйте позже.',
+        status=503, content_type='text/plain; charset=utf-8'
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+class RateLimitMiddleware:
+    """Отвечает 429, когда корзина клиента для страницы пуста."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not settings.RATE_LIMIT_ENABLED:
+            return None
+        name = request.resolver_match.view_name
+        rule = settings.RATE_LIMITS.get(name)
+        if rule is None:
+            return None
+        scope, capacity, period, methods = rule
+        if methods is not None and request.method not in methods:
+            return None
+        retry_after = take(
+            f'{RATE_KEY_PREFIX}:{name}:{client_key(request, scope)}',
+            capacity, period, request_cost(request)
+        )
+        if retry_after:
+            return too_many_requests(retry_after)
+        return None
+
+
+class LatencyMonitor:
+    """Экспоненциальное среднее времени SQL-запросов, затухает со временем."""
+
+    def __init__(self, alpha=0.1, half_life=5.0):
+        self.alpha = alpha
+        self.half_life = half_life
+        self._value = 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _decayed(self, now):
+        return self._value * 0.5 ** ((now - self._updated) / self.half_life)
+
+    def observe(self, duration):
+        with self._lock:
+            now = time.monotonic()
+            value = self._decayed(now)
+            self._value = value + self.alpha * (duration - value)
+            self._updated = now
+
+    @property
+    def value(self):
+        with self._lock:
+            return self._decayed(time.monotonic())
+
+    def reset(self):
+        with self._lock:
+            self._value = 0.0
+            self._updated = time.monotonic()
+
+
+class LoadSheddingMiddleware:
+    """Отвечает 503 на дорогие страницы, пока процесс перегружен."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.in_flight = 0
+        self.latency = LatencyMonitor(
+            half_life=settings.LOAD_SHED_LATENCY_HALF_LIFE
+        )
+        self._lock = threading.Lock()
+
+    def _timed(self, execute, sql, params, many, context):
+        started = time.monotonic()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.latency.observe(time.monotonic() - started)
+
+    def __call__(self, request):
+        with self._lock:
+            self.in_flight += 1
+        try:
+            with connection.execute_wrapper(self._timed):
+                return self.get_response(request)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def overloaded(self):
+        return (
+            self.in_flight > settings.LOAD_SHED_MAX_IN_FLIGHT
+            or self.latency.value > settings.LOAD_SHED_DB_LATENCY
+        )
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            settings.LOAD_SHED_ENABLED
+            and request.resolver_match.view_name in settings.LOAD_SHED_VIEWS
+            and self.overloaded()
+        ):
+            return service_unavailable(settings.LOAD_SHED_RETRY_AFTER)
+        return None
@@ -1,20 +1,116 @@
-from django.contrib import admin
-from .models import Post, Group, Comment, Follow
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+
+from core import jobs
+from core.paginator import EstimatedCountPaginator
+from . import archive, moderation
+from .models import Post, Group, Comment, Fingerprint, Follow, MonthArchive
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """Список без точного COUNT(*) по всей таблице."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+
+
+class MonthFilter(admin.SimpleListFilter):
+    """
+    Месяцы из гистограммы архива (posts.archive) вместо date_hierarchy:
+    той для списка годов нужен DISTINCT по дате всех строк таблицы.
+    """
+    title = 'месяц'
+    parameter_name = 'month'
+
+    def lookups(self, request, model_admin):
+        return [
+            (f'{cell.year}-{cell.month}', f'{cell.month:02}.{cell.year}')
+            for cell in MonthArchive.objects.filter(scope=MonthArchive.SITE)
+        ]
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        try:
+            year, month = map(int, self.value().split('-'))
+            start, end = archive.month_bounds(year, month)
+        except ValueError:
+            return queryset.none()
+        return queryset.filter(pub_date__gte=start, pub_date__lt=end)
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа'
+    )
+
+
+def _enqueue(modeladmin, request, name, params, rows):
+    job = jobs.enqueue(name, params, request.user, rows)
+    modeladmin.message_user(
+        request,
+        f'Задача #{job.pk} «{jobs.job_type(name).label}» поставлена '
+        f'в очередь, постов: {job.total}'
+    )
 
 
 @admin.register(Post)
-class PostAdmin(admin.ModelAdmin):
+class PostAdmin(LargeTableAdmin):
     list_display = (
         'pk',
         'text',
         'pub_date',
         'author',
         'group',
+        'is_published',
+        'publish_at',
     )
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    autocomplete_fields = ('author', 'group')
     search_fields = ('text',)
-    list_filter = ('pub_date',)
-    empty_value_display = '-пусто-'
+    list_filter = (MonthFilter, 'pub_date', 'is_published')
+    action_form = PostActionForm
+    actions = ('delete_in_background', 'delete_by_author', 'move_to_group')
+
+    def get_actions(self, request):
+        # Синхронное удаление с каскадом не укладывается в запрос
+        actions = super().get_actions(request)
+        actions.pop('delete_selected', None)
+        return actions
+
+    def delete_in_background(self, request, queryset):
+        _enqueue(
+            self, request, moderation.DELETE_POSTS, {},
+            queryset.values_list('pk', flat=True)
+        )
+    delete_in_background.short_description = 'Удалить в фоне'
+
+    def delete_by_author(self, request, queryset):
+        _enqueue(
+            self, request, moderation.DELETE_BY_AUTHOR, {},
+            queryset.values_list('author_id', flat=True).distinct()
+        )
+    delete_by_author.short_description = 'Удалить в фоне все посты авторов'
+
+    def move_to_group(self, request, queryset):
+        field = PostActionForm.base_fields['group']
+        try:
+            group = field.clean(request.POST.get('group'))
+        except forms.ValidationError:
+            group = None
+        if group is None:
+            self.message_user(
+                request, 'Выберите группу для переноса', messages.WARNING
+            )
+            return
+        _enqueue(
+            self, request, moderation.MOVE_TO_GROUP, {'group_id': group.pk},
+            queryset.values_list('pk', flat=True)
+        )
+    move_to_group.short_description = 'Перенести в фоне в выбранную группу'
 
 
 @admin.register(Group)
@@ -24,24 +120,62 @@ class GroupAdmin(admin.ModelAdmin):
         'slug',
         'description',
     )
+    search_fields = ('title', 'slug')
     empty_value_display = '-пусто-'
     prepopulated_fields = {"slug": ("title",)}
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = (
         'author',
         'post',
         'text',
         'pub_date'
     )
-    empty_value_display = '-пусто-'
+    list_select_related = ('author', 'post')
+    autocomplete_fields = ('author',)
+    raw_id_fields = ('post',)
+    list_filter = ('pub_date',)
 
 
 @admin.register(Follow)
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(LargeTableAdmin):
     list_display = (
         'user',
         'author',
+        'created',
+    )
+    list_select_related = ('user', 'author')
+    autocomplete_fields = ('user', 'author')
+    list_filter = ('created',)
+
+
+class DuplicateFilter(admin.SimpleListFilter):
+    title = 'повтор'
+    parameter_name = 'duplicate'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Повторы'), ('no', 'Оригиналы'))
+
+    def queryset(self, request, queryset):
+        if self.value() == 'yes':
+            return queryset.filter(duplicate_of__isnull=False)
+        if self.value() == 'no':
+            return queryset.filter(duplicate_of__isnull=True)
+        return queryset
+
+
+@admin.register(Fingerprint)
+class FingerprintAdmin(LargeTableAdmin):
+    list_display = (
+        'pk',
+        'kind',
+        'object_id',
+        'author',
+        'duplicate_of',
+        'created',
     )
+    list_select_related = ('author', 'duplicate_of')
+    list_filter = ('kind', DuplicateFilter)
+    raw_id_fields = ('author', 'duplicate_of')
@@ -0,0 +1,206 @@
+"""
+Архив постов по месяцам.
+
+Для сайта, каждой группы и каждого автора MonthArchive хранит
+число постов за месяц и диапазон их id. Навигация по архиву читает
+только гистограмму, а выборка постов месяца ограничена диапазоном
+первичного ключа и даты вместо OFFSET по всей ленте.
+
+Гистограммы описывают обе таблицы постов: пересчеты читают и горячую
+таблицу, и холодное хранилище (ArchivedPost).
+"""
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import (
+    Count, F, Max, Min, PositiveIntegerField, Q, Value
+)
+from django.db.models.functions import (
+    ExtractMonth, ExtractYear, Greatest, Least
+)
+from django.utils import timezone
+
+from .models import ArchivedPost, MonthArchive, Post
+
+SCOPE_FIELDS = {
+    MonthArchive.SITE: None,
+    MonthArchive.GROUP: 'group_id',
+    MonthArchive.AUTHOR: 'author_id',
+}
+
+
+def month_bounds(year, month):
+    """Начало месяца и начало следующего месяца."""
+    start = timezone.make_aware(datetime(year, month, 1))
+    if month == 12:
+        end = timezone.make_aware(datetime(year + 1, 1, 1))
+    else:
+        end = timezone.make_aware(datetime(year, month + 1, 1))
+    return start, end
+
+
+def _scopes(post):
+    scopes = [
+        (MonthArchive.SITE, 0),
+        (MonthArchive.AUTHOR, post.author_id),
+    ]
+    if post.group_id is not None:
+        scopes.append((MonthArchive.GROUP, post.group_id))
+    return scopes
+
+
+def _month(post):
+    local = timezone.localtime(post.pub_date)
+    return local.year, local.month
+
+
+def _scope_posts(scope, scope_id, model=Post):
+    field = SCOPE_FIELDS[scope]
+    posts = model.objects.all()
+    if model is Post:
+        posts = posts.published()
+    if field is None:
+        return posts
+    return posts.filter(**{field: scope_id})
+
+
+def _tiers(scope, scope_id):
+    """Посты области в горячей таблице и в холодном хранилище."""
+    return [
+        _scope_posts(scope, scope_id, model)
+        for model in (Post, ArchivedPost)
+    ]
+
+
+def month_posts(bucket, model=Post):
+    """
+    Посты месяца: поиск по диапазону id и дате вместо сдвига.
+    model=ArchivedPost выбирает посты из холодного хранилища.
+    """
+    start, end = month_bounds(bucket.year, bucket.month)
+    return _scope_posts(bucket.scope, bucket.scope_id, model).filter(
+        pk__range=(bucket.first_id, bucket.last_id),
+        pub_date__gte=start,
+        pub_date__lt=end
+    )
+
+
+def add_post(post, scopes=None):
+    """
+    Учитывает новый пост в гистограммах: недостающие ячейки вставляются
+    одним запросом, а все ячейки поста обновляются другим.
+    """
+    year, month = _month(post)
+    scopes = scopes or _scopes(post)
+    MonthArchive.objects.bulk_create(
+        [
+            MonthArchive(
+                scope=scope, scope_id=scope_id, year=year, month=month,
+                first_id=post.pk, last_id=post.pk
+            )
+            for scope, scope_id in scopes
+        ],
+        ignore_conflicts=True
+    )
+    cells = Q()
+    for scope, scope_id in scopes:
+        cells |= Q(scope=scope, scope_id=scope_id)
+    pk = Value(post.pk, output_field=PositiveIntegerField())
+    MonthArchive.objects.filter(cells, year=year, month=month).update(
+        post_count=F('post_count') + 1,
+        first_id=Least('first_id', pk),
+        last_id=Greatest('last_id', pk)
+    )
+
+
+def remove_post(post, scopes=None):
+    """Пересчитывает месяц удаленного или перенесенного поста."""
+    year, month = _month(post)
+    for scope, scope_id in scopes or _scopes(post):
+        refresh(scope, scope_id, year, month)
+
+
+def refresh(scope, scope_id, year, month):
+    """Пересчитывает одну ячейку гистограммы по индексу даты."""
+    start, end = month_bounds(year, month)
+    totals = [
+        posts.filter(pub_date__gte=start, pub_date__lt=end).aggregate(
+            count=Count('pk'), first=Min('pk'), last=Max('pk')
+        )
+        for posts in _tiers(scope, scope_id)
+    ]
+    totals = [row for row in totals if row['count']]
+    if not totals:
+        MonthArchive.objects.filter(
+            scope=scope, scope_id=scope_id, year=year, month=month
+        ).delete()
+        return
+    MonthArchive.objects.update_or_create(
+        scope=scope, scope_id=scope_id, year=year, month=month,
+        defaults={
+            'post_count': sum(row['count'] for row in totals),
+            'first_id': min(row['first'] for row in totals),
+            'last_id': max(row['last'] for row in totals),
+        }
+    )
+
+
+def refresh_posts(posts, scopes=None):
+    """
+    Пересчитывает один раз каждую ячейку, затронутую пакетным
+    изменением постов; scopes ограничивает виды гистограмм.
+    Возвращает число ячеек.
+    """
+    cells = {
+        (scope, scope_id, *_month(post))
+        for post in posts
+        for scope, scope_id in _scopes(post)
+        if scopes is None or scope in scopes
+    }
+    for cell in cells:
+        refresh(*cell)
+    return len(cells)
+
+
+def rebuild():
+    """Строит гистограммы заново по обеим таблицам. Возвращает число ячеек."""
+    cells = {}
+    for model in (Post, ArchivedPost):
+        for scope, field in SCOPE_FIELDS.items():
+            rows = _scope_posts(MonthArchive.SITE, 0, model)
+            columns = ['year', 'month']
+            if field is not None:
+                rows = rows.filter(**{f'{field}__isnull': False})
+                columns.insert(0, field)
+            rows = rows.annotate(
+                year=ExtractYear('pub_date'),
+                month=ExtractMonth('pub_date')
+            ).values(*columns).annotate(
+                count=Count('pk'), first=Min('pk'), last=Max('pk')
+            ).order_by()
+            for row in rows:
+                key = (
+                    scope,
+                    row[field] if field is not None else 0,
+                    row['year'],
+                    row['month']
+                )
+                cell = cells.get(key)
+                if cell is None:
+                    cells[key] = MonthArchive(
+                        scope=scope,
+                        scope_id=key[1],
+                        year=row['year'],
+                        month=row['month'],
+                        post_count=row['count'],
+                        first_id=row['first'],
+                        last_id=row['last']
+                    )
+                    continue
+                cell.post_count += row['count']
+                cell.first_id = min(cell.first_id, row['first'])
+                cell.last_id = max(cell.last_id, row['last'])
+    with transaction.atomic():
+        MonthArchive.objects.all().delete()
+        MonthArchive.objects.bulk_create(cells.values(), batch_size=500)
+    return len(cells)
@@ -0,0 +1,144 @@
+"""
+Холодное хранение старых постов.
+
+Посты старше POST_ARCHIVE_AFTER_DAYS вместе с комментариями переносятся
+в таблицы ArchivedPost и ArchivedComment с сохранением id, а история
+правок — в ArchivedPostRevision. Поэтому горячая таблица и ее индексы
+растут только на свежих постах. Страница поста и профиль читают обе
+таблицы. Архивные тексты не участвуют в поиске повторов: их подписи
+удаляются при переносе.
+
+Помесячный архив и счетчики групп описывают все посты сайта
+и пересчитываются по обеим таблицам, поэтому перенос в холодное
+хранилище их не меняет.
+"""
+import threading
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import fingerprints
+from .models import (
+    ArchivedComment, ArchivedPost, ArchivedPostRevision, Comment, Post,
+    PostRevision
+)
+
+_state = threading.local()
+
+POST_FIELDS = (
+    'id', 'text', 'pub_date', 'author_id', 'group_id', 'image',
+    'text_html', 'excerpt', 'render_version',
+)
+COMMENT_FIELDS = ('id', 'post_id', 'author_id', 'text', 'pub_date')
+REVISION_FIELDS = (
+    'post_id', 'number', 'is_snapshot', 'data', 'image', 'length', 'created',
+)
+
+
+def is_moving():
+    """Идет ли в этом потоке перенос постов в холодное хранилище."""
+    return getattr(_state, 'moving', False)
+
+
+@contextmanager
+def _moving():
+    _state.moving = True
+    try:
+        yield
+    finally:
+        _state.moving = False
+
+
+def cutoff(days=None):
+    if days is None:
+        days = settings.POST_ARCHIVE_AFTER_DAYS
+    return timezone.now() - timedelta(days=days)
+
+
+def move_chunk(post_ids):
+    """Переносит посты с комментариями и историей правок одной транзакцией."""
+    with transaction.atomic(), _moving():
+        posts = Post.objects.filter(pk__in=post_ids)
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(**row) for row in posts.values(*POST_FIELDS)
+        )
+        comments = Comment.objects.filter(post_id__in=post_ids)
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(**row) for row in comments.values(*COMMENT_FIELDS)
+        )
+        revisions = PostRevision.objects.filter(post_id__in=post_ids)
+        ArchivedPostRevision.objects.bulk_create(
+            ArchivedPostRevision(**row)
+            for row in revisions.values(*REVISION_FIELDS)
+        )
+        fingerprints.forget_posts(post_ids)
+        posts.delete()
+    return len(post_ids)
+
+
+def move_old_posts(days=None, chunk_size=500):
+    """
+    Переносит в холодное хранилище посты старше days дней
+    порциями по chunk_size. Возвращает число перенесенных постов.
+    """
+    old_posts = Post.objects.published().filter(
+        pub_date__lt=cutoff(days)
+    ).order_by('pk').values_list('pk', flat=True)
+    moved = 0
+    while True:
+        post_ids = list(old_posts[:chunk_size])
+        if not post_ids:
+            return moved
+        moved += move_chunk(post_ids)
+
+
+def get_post(post_id):
+    """Пост из горячей таблицы или из архива, иначе None."""
+    post = Post.objects.select_related('group', 'author').filter(
+        pk=post_id
+    ).first()
+    if post is None:
+        post = ArchivedPost.objects.select_related('group', 'author').filter(
+            pk=post_id
+        ).first()
+    return post
+
+
+class TieredPostList:
+    """
+    Последовательность постов из двух таблиц для Paginator:
+    сначала свежие посты, затем архивные (они всегда старше).
+    """
+
+    def __init__(self, hot, cold):
+        self.hot = hot
+        self.cold = cold
+        self._hot_count = None
+
+    def hot_count(self):
+        if self._hot_count is None:
+            self._hot_count = self.hot.count()
+        return self._hot_count
+
+    def count(self):
+        return self.hot_count() + self.cold.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop
+        hot_count = self.hot_count()
+        posts = []
+        if start < hot_count:
+            posts.extend(self.hot[start:min(stop, hot_count)])
+        if stop > hot_count:
+            posts.extend(
+                self.cold[max(start - hot_count, 0):stop - hot_count]
+            )
+        return posts
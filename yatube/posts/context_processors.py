@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from . import notifications as notifications_module
+
+
+def notifications(request):
+    """Число непрочитанных уведомлений; читается, только если выводится."""
+    return {
+        'unread_notifications': SimpleLazyObject(
+            lambda: notifications_module.unread_count(request.user)
+        )
+    }
+
+
+def live_updates(request):
+    """Подключать ли страницам потоки живых обновлений."""
+    return {'live_updates': settings.LIVE_UPDATES_ENABLED}
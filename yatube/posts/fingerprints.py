@@ -0,0 +1,305 @@
+"""
+Поиск почти одинаковых постов и комментариев.
+
+Текст разбивается на пары соседних слов, из них считается MinHash:
+SIGNATURE_SIZE минимумов по разным хеш-функциям. Доля совпавших
+минимумов у двух текстов оценивает долю общих пар слов (Жаккар).
+Подпись делится на BANDS полос (LSH), хеш каждой полосы лежит
+в проиндексированной таблице FingerprintBand: тексты, похожие больше
+чем на DUPLICATE_MIN_SIMILARITY, почти наверняка совпадают хотя бы
+в одной полосе. Кандидатов находит один запрос по индексу, точное
+сходство считается уже в Python.
+
+settings.DUPLICATE_POLICY: 'flag' сохраняет повтор и помечает его
+ссылкой на оригинал (duplicate_of) для модераторов, 'reject' — формы
+не пропускают такой текст. Короче DUPLICATE_MIN_WORDS слов тексты
+не проверяются: «Спасибо за пост!» пишут все.
+"""
+import hashlib
+import random
+import re
+import struct
+import zlib
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import Comment, Fingerprint, FingerprintBand, Post
+
+WORD_RE = re.compile(r'\w+')
+SHINGLE = 2
+SIGNATURE_SIZE = 64
+BANDS = 16
+ROWS = SIGNATURE_SIZE // BANDS
+PRIME = (1 << 61) - 1
+MASK = (1 << 32) - 1
+SIGNATURE_FORMAT = f'<{SIGNATURE_SIZE}I'
+
+# Коэффициенты хеш-функций (a * x + b) % PRIME: одни и те же
+# во всех процессах и между выкладками
+_random = random.Random(20221001)
+PERMUTATIONS = [
+    (_random.randrange(1, PRIME), _random.randrange(0, PRIME))
+    for _ in range(SIGNATURE_SIZE)
+]
+
+REJECT = 'reject'
+FLAG = 'flag'
+
+SOURCES = {
+    Fingerprint.POST: Post,
+    Fingerprint.COMMENT: Comment,
+}
+
+
+def shingles(text):
+    """Хеши пар соседних слов или пустое множество для короткого текста."""
+    words = WORD_RE.findall(text.lower())
+    if len(words) < max(settings.DUPLICATE_MIN_WORDS, SHINGLE):
+        return set()
+    return {
+        zlib.crc32(' '.join(words[i:i + SHINGLE]).encode())
+        for i in range(len(words) - SHINGLE + 1)
+    }
+
+
+def minhash(text):
+    """MinHash-подпись текста или None для короткого текста."""
+    hashes = shingles(text)
+    if not hashes:
+        return None
+    return tuple(
+        min(((a * x + b) % PRIME) & MASK for x in hashes)
+        for a, b in PERMUTATIONS
+    )
+
+
+def similarity(first, second):
+    """Оценка доли общих пар слов по двум подписям."""
+    return sum(a == b for a, b in zip(first, second)) / SIGNATURE_SIZE
+
+
+def band_keys(signature):
+    """Хеши полос подписи; номер полосы входит в хеш."""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(
+            struct.pack(f'<I{ROWS}I', band, *rows), digest_size=8
+        ).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+
+def pack(signature):
+    return struct.pack(SIGNATURE_FORMAT, *signature)
+
+
+def unpack(data):
+    return struct.unpack(SIGNATURE_FORMAT, bytes(data))
+
+
+def signature_rows(rows):
+    """
+    Подписи пачки (id, author_id, text); выполняется и в отдельных
+    процессах. Короткие тексты пропускаются.
+    """
+    signed = []
+    for object_id, author_id, text in rows:
+        signature = minhash(text)
+        if signature is not None:
+            signed.append((object_id, author_id, signature))
+    return signed
+
+
+def nearest(signature, candidates):
+    """
+    Самый похожий кандидат со сходством не ниже DUPLICATE_MIN_SIMILARITY,
+    из равных — первый.
+    """
+    best, best_similarity = None, 0
+    for candidate in candidates:
+        current = similarity(signature, unpack(candidate.signature))
+        if current > best_similarity:
+            best, best_similarity = candidate, current
+    if best_similarity < settings.DUPLICATE_MIN_SIMILARITY:
+        return None
+    return best
+
+
+def _find(signature, kind=None, object_id=None, before=None):
+    """
+    Кандидаты — подписи, совпавшие хотя бы в одной полосе. До отсечения
+    DUPLICATE_CANDIDATES они упорядочены по числу совпавших полос:
+    у почти одинакового текста их больше всего, и его не вытеснят
+    десятки текстов с общими служебными словами.
+    """
+    candidates = Fingerprint.objects.filter(
+        bands__key__in=band_keys(signature)
+    )
+    if object_id is not None:
+        candidates = candidates.exclude(kind=kind, object_id=object_id)
+    if before is not None:
+        candidates = candidates.filter(pk__lt=before)
+    return nearest(signature, candidates.annotate(
+        hits=Count('bands')
+    ).order_by('-hits', 'pk')[:settings.DUPLICATE_CANDIDATES])
+
+
+def find_duplicate(text, kind=None, object_id=None):
+    """Самый похожий из сохраненных текстов или None; себя не считает."""
+    signature = minhash(text)
+    if signature is None:
+        return None
+    return _find(signature, kind, object_id)
+
+
+def is_rejected(text, kind=None, object_id=None):
+    """Текст не пропускается формой по политике 'reject'."""
+    return (
+        settings.DUPLICATE_POLICY == REJECT
+        and find_duplicate(text, kind, object_id) is not None
+    )
+
+
+def register(kind, instance, created=True):
+    """
+    Сохраняет подпись текста и ссылку на оригинал, если это повтор.
+    При правке оригинал ищется только среди более ранних подписей,
+    чтобы пост не стал повтором собственной копии.
+    """
+    signature = minhash(instance.text)
+    if signature is None and created:
+        return None
+    fingerprint = Fingerprint.objects.filter(
+        kind=kind, object_id=instance.pk
+    ).first()
+    if signature is None:
+        if fingerprint is not None:
+            fingerprint.delete()
+        return None
+    if fingerprint is None:
+        fingerprint = Fingerprint(kind=kind, object_id=instance.pk)
+    elif unpack(fingerprint.signature) == signature:
+        return fingerprint
+    fingerprint.author_id = instance.author_id
+    fingerprint.duplicate_of = _find(
+        signature, kind, instance.pk, fingerprint.pk
+    )
+    fingerprint.signature = pack(signature)
+    with transaction.atomic():
+        if fingerprint.pk is not None:
+            fingerprint.bands.all().delete()
+        fingerprint.save()
+        FingerprintBand.objects.bulk_create(
+            FingerprintBand(fingerprint=fingerprint, key=key)
+            for key in band_keys(signature)
+        )
+    return fingerprint
+
+
+def forget(kind, object_ids):
+    """
+    Удаляет подписи удаленных текстов, чтобы новые тексты не считались
+    их повторами. object_ids — список или подзапрос id.
+    """
+    return Fingerprint.objects.filter(
+        kind=kind, object_id__in=object_ids
+    ).delete()[0]
+
+
+def forget_missing(kind):
+    """Удаляет подписи текстов, которых больше нет в таблице kind."""
+    return Fingerprint.objects.filter(kind=kind).exclude(
+        object_id__in=SOURCES[kind].objects.values('pk')
+    ).delete()[0]
+
+
+def forget_posts(post_ids):
+    """Удаляет подписи постов и их комментариев до удаления постов."""
+    return forget(Fingerprint.POST, post_ids) + forget(
+        Fingerprint.COMMENT,
+        Comment.objects.filter(post_id__in=post_ids).values('pk')
+    )
+
+
+def register_post(post, created=True):
+    return register(Fingerprint.POST, post, created)
+
+
+def register_comments(comments):
+    """
+    Комментарии из отложенной записи: bulk_create возвращает id не на всех
+    базах, комментарии без id не проверяются.
+    """
+    for comment in comments:
+        if comment.pk is not None:
+            register(Fingerprint.COMMENT, comment)
+
+
+def store(kind, signed):
+    """
+    Записывает результат signature_rows. Уже сохраненные подписи
+    не трогает: их держат в актуальном состоянии сигналы.
+    """
+    if not signed:
+        return
+    with transaction.atomic():
+        Fingerprint.objects.bulk_create([
+            Fingerprint(
+                kind=kind,
+                object_id=object_id,
+                author_id=author_id,
+                signature=pack(signature)
+            )
+            for object_id, author_id, signature in signed
+        ], ignore_conflicts=True)
+        # bulk_create возвращает id не на всех базах
+        fingerprints = Fingerprint.objects.filter(
+            kind=kind,
+            object_id__in=[object_id for object_id, _, _ in signed],
+            bands__isnull=True
+        ).values_list('pk', 'signature')
+        FingerprintBand.objects.bulk_create(
+            FingerprintBand(fingerprint_id=pk, key=key)
+            for pk, signature in fingerprints
+            for key in band_keys(unpack(signature))
+        )
+
+
+def flag_batch(fingerprints):
+    """
+    Находит оригиналы для пачки подписей за два запроса: полосы
+    кандидатов и сами кандидаты. Оригиналом считается самый похожий
+    из более ранних текстов.
+    """
+    if not fingerprints:
+        return 0
+    signatures = {item.pk: unpack(item.signature) for item in fingerprints}
+    keys = {pk: band_keys(signature) for pk, signature in signatures.items()}
+    matches = {}
+    for fingerprint_id, key in FingerprintBand.objects.filter(
+        key__in={key for item_keys in keys.values() for key in item_keys},
+        fingerprint_id__lt=max(signatures)
+    ).values_list('fingerprint_id', 'key'):
+        matches.setdefault(key, set()).add(fingerprint_id)
+    candidates = Fingerprint.objects.in_bulk(
+        {pk for ids in matches.values() for pk in ids}
+    )
+    changed = []
+    for fingerprint in fingerprints:
+        ids = sorted({
+            pk for key in keys[fingerprint.pk]
+            for pk in matches.get(key, ())
+            if pk < fingerprint.pk
+        })
+        original = nearest(
+            signatures[fingerprint.pk], (candidates[pk] for pk in ids)
+        )
+        if original is None or original.pk == fingerprint.duplicate_of_id:
+            continue
+        fingerprint.duplicate_of = original
+        changed.append(fingerprint)
+    Fingerprint.objects.bulk_update(changed, ['duplicate_of'])
+    return len(changed)
@@ -0,0 +1,130 @@
+"""
+Подписки на авторов.
+
+Подписка и отписка выполняются одним SQL-запросом с поиском автора
+по username, повтор запроса не меняет состояние.
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from . import graph
+from .models import Follow, User
+
+# Три колонки на строку укладываются в лимит SQLite на 999 параметров
+BULK_BATCH_SIZE = 300
+
+_INSERT_IGNORE = {
+    'sqlite': ('INSERT OR IGNORE INTO', ''),
+    'mysql': ('INSERT IGNORE INTO', ''),
+    'postgresql': ('INSERT INTO', ' ON CONFLICT DO NOTHING'),
+}
+
+
+def _insert_ignore(select_sql):
+    prefix, suffix = _INSERT_IGNORE[connection.vendor]
+    return (
+        f'{prefix} {Follow._meta.db_table} (user_id, author_id, created) '
+        f'{select_sql}{suffix}'
+    )
+
+
+def _invalidate(user, username):
+    author_ids = User.objects.filter(
+        username=username
+    ).values_list('pk', flat=True)
+    graph.invalidate(user.pk, *author_ids)
+
+
+def follow(user, username):
+    """
+    Подписывает user на автора username.
+    Возвращает True, если подписка создана.
+    """
+    sql = _insert_ignore(
+        f'SELECT %s, id, %s FROM {User._meta.db_table} '
+        'WHERE username = %s AND id <> %s'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user.pk, timezone.now(), username, user.pk])
+        changed = cursor.rowcount > 0
+    if changed:
+        _invalidate(user, username)
+    return changed
+
+
+def unfollow(user, username):
+    """
+    Отписывает user от автора username.
+    Возвращает True, если подписка была удалена.
+    """
+    sql = (
+        f'DELETE FROM {Follow._meta.db_table} WHERE user_id = %s '
+        f'AND author_id IN (SELECT id FROM {User._meta.db_table} '
+        'WHERE username = %s)'
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [user.pk, username])
+        changed = cursor.rowcount > 0
+    if changed:
+        _invalidate(user, username)
+    return changed
+
+
+def bulk_follow(pairs, batch_size=BULK_BATCH_SIZE):
+    """
+    Создает подписки по парам (user_id, author_id).
+    Существующие подписки и подписки на себя пропускаются.
+    Возвращает число созданных подписок.
+    """
+    pairs = [(user_id, author_id) for user_id, author_id in pairs
+             if user_id != author_id]
+    now = timezone.now()
+    created = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            values = ', '.join(['(%s, %s, %s)'] * len(batch))
+            cursor.execute(
+                _insert_ignore(f'VALUES {values}'),
+                [value for pair in batch for value in (*pair, now)]
+            )
+            created += cursor.rowcount
+    graph.invalidate(*[user_id for pair in pairs for user_id in pair])
+    return created
+
+
+def bulk_unfollow(pairs, batch_size=BULK_BATCH_SIZE):
+    """
+    Удаляет подписки по парам (user_id, author_id).
+    Возвращает число удаленных подписок.
+    """
+    pairs = list(pairs)
+    deleted = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, len(pairs), batch_size):
+            batch = pairs[start:start + batch_size]
+            condition = ' OR '.join(
+                ['(user_id = %s AND author_id = %s)'] * len(batch)
+            )
+            cursor.execute(
+                f'DELETE FROM {Follow._meta.db_table} WHERE {condition}',
+                [value for pair in batch for value in pair]
+            )
+            deleted += cursor.rowcount
+    graph.invalidate(*[user_id for pair in pairs for user_id in pair])
+    return deleted
+
+
+def resolve_usernames(pairs):
+    """
+    Переводит пары (username, username) в пары id одним запросом.
+    Пары с неизвестными пользователями отбрасываются.
+    """
+    pairs = list(pairs)
+    ids = dict(User.objects.filter(
+        username__in={name for pair in pairs for name in pair}
+    ).values_list('username', 'pk'))
+    return [
+        (ids[user], ids[author]) for user, author in pairs
+        if user in ids and author in ids
+    ]
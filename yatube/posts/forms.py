@@ -1,5 +1,12 @@
+from django import forms
+from django.core.exceptions import ValidationError
 from django.forms import ModelForm
-from .models import Post, Comment
+from django.utils import timezone
+
+from . import fingerprints
+from .models import Comment, Fingerprint, Post
+
+DUPLICATE_MESSAGE = 'Почти такой же текст уже опубликован.'
 
 
 class PostForm(ModelForm):
@@ -7,8 +14,39 @@ class PostForm(ModelForm):
         model = Post
         fields = ('text', 'group', 'image')
 
+    def clean_text(self):
+        text = self.cleaned_data['text']
+        if fingerprints.is_rejected(text, Fingerprint.POST, self.instance.pk):
+            raise ValidationError(DUPLICATE_MESSAGE)
+        return text
+
 
 class CommentForm(ModelForm):
     class Meta:
         model = Comment
         fields = ('text',)
+
+    def clean_text(self):
+        text = self.cleaned_data['text']
+        if fingerprints.is_rejected(text):
+            raise ValidationError(DUPLICATE_MESSAGE)
+        return text
+
+
+class PublicationForm(forms.Form):
+    """Время отложенной публикации; поля нет в PostForm."""
+    publish_at = forms.DateTimeField(
+        label='Опубликовать позже',
+        required=False,
+        input_formats=['%Y-%m-%dT%H:%M'],
+        widget=forms.DateTimeInput(
+            attrs={'type': 'datetime-local'}, format='%Y-%m-%dT%H:%M'
+        ),
+        help_text='Оставьте пустым, чтобы опубликовать сразу'
+    )
+
+    def clean_publish_at(self):
+        publish_at = self.cleaned_data['publish_at']
+        if publish_at is not None and publish_at <= timezone.now():
+            raise ValidationError('Время публикации уже прошло.')
+        return publish_at
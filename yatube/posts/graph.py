@@ -0,0 +1,108 @@
+"""
+Граф подписок.
+
+Для каждого пользователя в кэше хранятся отсортированные массивы id:
+на кого он подписан и кто подписан на него. Ключи содержат версию
+пользователя, изменение подписки атомарно увеличивает версию обоих
+участников, и старые массивы больше не читаются.
+
+Кэш может вытеснить ключ версии раньше массивов. Новая версия
+заводится от текущего времени в наносекундах, поэтому она
+не совпадает ни с одной прежней и устаревший массив не прочитается.
+"""
+import time
+from array import array
+from bisect import bisect_left
+
+from django.core.cache import cache
+
+from .models import Follow
+
+CACHE_TIMEOUT = 60 * 60 * 24
+# Длиннее этого списка id не передаются в SQL-условие IN
+IN_LIMIT = 500
+
+FOLLOWING = 'following'
+FOLLOWERS = 'followers'
+
+_COLUMNS = {
+    FOLLOWING: ('user_id', 'author_id'),
+    FOLLOWERS: ('author_id', 'user_id'),
+}
+
+
+def _version_key(user_id):
+    return f'follow_graph:version:{user_id}'
+
+
+def _set_key(kind, user_id, version):
+    return f'follow_graph:{kind}:{user_id}:{version}'
+
+
+def _version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, CACHE_TIMEOUT):
+            version = cache.get(key, version)
+    return version
+
+
+def _load(kind, user_id):
+    owner, other = _COLUMNS[kind]
+    key = _set_key(kind, user_id, _version(user_id))
+    data = cache.get(key)
+    ids = array('q')
+    if data is not None:
+        ids.frombytes(data)
+        return ids
+    ids.extend(Follow.objects.filter(
+        **{owner: user_id}
+    ).order_by(other).values_list(other, flat=True))
+    cache.set(key, ids.tobytes(), CACHE_TIMEOUT)
+    return ids
+
+
+def _contains(ids, value):
+    position = bisect_left(ids, value)
+    return position < len(ids) and ids[position] == value
+
+
+def invalidate(*user_ids):
+    """Сбрасывает закэшированные множества для перечисленных пользователей."""
+    for user_id in set(user_ids):
+        key = _version_key(user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Версии нет в кэше: новая все равно не совпадет с прежними
+            cache.add(key, time.time_ns(), CACHE_TIMEOUT)
+
+
+def following_ids(user_id):
+    """Отсортированный массив id авторов, на которых подписан пользователь."""
+    return _load(FOLLOWING, user_id)
+
+
+def follower_ids(user_id):
+    """Отсортированный массив id подписчиков пользователя."""
+    return _load(FOLLOWERS, user_id)
+
+
+def is_following(user_id, author_id):
+    """Подписан ли user_id на author_id."""
+    return _contains(following_ids(user_id), author_id)
+
+
+def follower_count(user_id):
+    return len(follower_ids(user_id))
+
+
+def mutuals(user_id):
+    """Id пользователей со взаимной подпиской."""
+    following = following_ids(user_id)
+    return [
+        other for other in follower_ids(user_id)
+        if _contains(following, other)
+    ]
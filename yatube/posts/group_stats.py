@@ -0,0 +1,124 @@
+"""
+Счетчики групп: число постов, число авторов и дата последнего поста.
+
+Счетчики хранятся в GroupStats и меняются точечно при создании,
+удалении поста и переносе его в другую группу, поэтому каталогу групп
+не нужна агрегация по всей таблице постов. Счетчики описывают
+и посты в холодном хранилище (ArchivedPost), поэтому пересчеты
+читают обе таблицы.
+"""
+from django.db import transaction
+from django.db.models import Count, DateTimeField, F, Max, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import ArchivedPost, Group, GroupStats, Post
+
+
+def _tiers():
+    return Post.objects.published(), ArchivedPost.objects.all()
+
+
+def _has_other_posts(group_id, post):
+    return any(
+        posts.filter(
+            group_id=group_id, author_id=post.author_id
+        ).exclude(pk=post.pk).exists()
+        for posts in _tiers()
+    )
+
+
+def add_post(group_id, post):
+    """Учитывает пост, появившийся в группе."""
+    new_author = not _has_other_posts(group_id, post)
+    pub_date = Value(post.pub_date, output_field=DateTimeField())
+    GroupStats.objects.get_or_create(group_id=group_id)
+    GroupStats.objects.filter(group_id=group_id).update(
+        post_count=F('post_count') + 1,
+        author_count=F('author_count') + int(new_author),
+        last_post_date=Greatest(
+            Coalesce('last_post_date', pub_date), pub_date
+        )
+    )
+
+
+def remove_post(group_id, post):
+    """Учитывает пост, удаленный из группы или перенесенный в другую."""
+    gone_author = not _has_other_posts(group_id, post)
+    GroupStats.objects.filter(group_id=group_id).update(
+        post_count=F('post_count') - 1,
+        author_count=F('author_count') - int(gone_author)
+    )
+    dates = [
+        posts.filter(group_id=group_id).exclude(pk=post.pk).aggregate(
+            last=Max('pub_date')
+        )['last']
+        for posts in _tiers()
+    ]
+    GroupStats.objects.filter(
+        group_id=group_id, last_post_date__lte=post.pub_date
+    ).update(
+        last_post_date=max(filter(None, dates), default=None)
+    )
+
+
+def _totals(group_ids=None):
+    """
+    Счетчики по группам из обеих таблиц. Авторы считаются по парам
+    (группа, автор), чтобы автор с постами в обеих таблицах
+    не учитывался дважды.
+    """
+    totals = {}
+    for posts in _tiers():
+        posts = posts.filter(group__isnull=False)
+        if group_ids is not None:
+            posts = posts.filter(group_id__in=group_ids)
+        for row in posts.values('group', 'author').annotate(
+            posts=Count('pk'), last=Max('pub_date')
+        ).order_by():
+            total = totals.setdefault(
+                row['group'], {'posts': 0, 'authors': set(), 'last': None}
+            )
+            total['posts'] += row['posts']
+            total['authors'].add(row['author'])
+            if total['last'] is None or row['last'] > total['last']:
+                total['last'] = row['last']
+    return totals
+
+
+def _stats(group_id, totals):
+    row = totals.get(group_id, {})
+    return GroupStats(
+        group_id=group_id,
+        post_count=row.get('posts', 0),
+        author_count=len(row.get('authors', ())),
+        last_post_date=row.get('last')
+    )
+
+
+def refresh(group_ids):
+    """Пересчитывает счетчики перечисленных групп после пакетных изменений."""
+    group_ids = set(group_ids) - {None}
+    if not group_ids:
+        return
+    totals = _totals(group_ids)
+    existing = set(Group.objects.filter(
+        pk__in=group_ids
+    ).values_list('pk', flat=True))
+    with transaction.atomic():
+        GroupStats.objects.filter(group_id__in=existing).delete()
+        GroupStats.objects.bulk_create(
+            _stats(group_id, totals) for group_id in existing
+        )
+
+
+def rebuild():
+    """Пересчитывает счетчики всех групп. Возвращает число групп."""
+    totals = _totals()
+    stats = [
+        _stats(group_id, totals)
+        for group_id in Group.objects.values_list('pk', flat=True)
+    ]
+    with transaction.atomic():
+        GroupStats.objects.all().delete()
+        GroupStats.objects.bulk_create(stats, batch_size=500)
+    return len(stats)
@@ -0,0 +1,241 @@
+"""
+Живые обновления страниц через Server-Sent Events.
+
+Новый пост и новый комментарий один раз превращаются в HTML-фрагмент
+и публикуются в канал: FEED для ленты, comments_channel(post_id) для
+комментариев поста. Broker раздает события подписчикам своего процесса,
+открытые страницы получают их потоком text/event-stream (stream)
+вместо повторной загрузки страницы.
+
+Между процессами события передает транспорт из LIVE_TRANSPORT:
+LocalTransport работает внутри одного процесса, RedisTransport
+пересылает события через Redis pub/sub (нужен пакет redis).
+Транспорт реализует start(broker) и publish(channel, event).
+
+Открытый поток не держит соединение с базой и ждет событий без
+нагрузки на процессор. Для тысяч открытых страниц сервер запускается
+с зелеными потоками: gunicorn -k gevent --worker-connections 2000.
+"""
+import json
+import threading
+import time
+from collections import defaultdict, deque, namedtuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.template.loader import render_to_string
+from django.utils.module_loading import import_string
+
+FEED = 'posts'
+
+Event = namedtuple('Event', 'id name data')
+
+
+def comments_channel(post_id):
+    return f'post:{post_id}'
+
+
+class Subscription:
+    """Очередь событий одной открытой страницы."""
+
+    def __init__(self, channels, queue_size):
+        self.channels = tuple(channels)
+        # Медленный клиент теряет самые старые события, а не тормозит
+        # публикацию.
+        self._events = deque(maxlen=queue_size)
+        self._ready = threading.Event()
+
+    def push(self, event):
+        self._events.append(event)
+        self._ready.set()
+
+    def get(self, timeout):
+        """События с прошлого вызова или пустой список через timeout."""
+        if not self._ready.wait(timeout):
+            return []
+        self._ready.clear()
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
+
+
+class Broker:
+    """Подписки процесса и последние события каждого канала."""
+
+    def __init__(self, transport=None, history=None, queue_size=None):
+        self.transport = transport or LocalTransport()
+        self.history = history or settings.LIVE_HISTORY
+        self.queue_size = queue_size or settings.LIVE_QUEUE_SIZE
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._history = {}
+        self._last_id = 0
+        self.transport.start(self)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({
+                subscription
+                for subscribers in self._subscribers.values()
+                for subscription in subscribers
+            })
+
+    def subscribe(self, channels, last_event_id=None):
+        """
+        Подписка на каналы. С last_event_id подписчик сразу получает
+        сохраненные события, которые он пропустил.
+        """
+        subscription = Subscription(channels, self.queue_size)
+        with self._lock:
+            for channel in subscription.channels:
+                self._subscribers[channel].add(subscription)
+            if last_event_id is not None:
+                missed = sorted(
+                    event
+                    for channel in subscription.channels
+                    for event in self._history.get(channel, ())
+                    if event.id > last_event_id
+                )
+                for event in missed:
+                    subscription.push(event)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for channel in subscription.channels:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is None:
+                    continue
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+    def next_id(self):
+        """Id события: микросекунды, растут и между процессами."""
+        with self._lock:
+            self._last_id = max(time.time_ns() // 1000, self._last_id + 1)
+            return self._last_id
+
+    def publish(self, channel, name, data):
+        event = Event(self.next_id(), name, data)
+        self.transport.publish(channel, event)
+        return event
+
+    def deliver(self, channel, event):
+        """Раздает событие подписчикам процесса; вызывается транспортом."""
+        with self._lock:
+            history = self._history.get(channel)
+            if history is None:
+                history = self._history[channel] = deque(maxlen=self.history)
+            history.append(event)
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.push(event)
+        return len(subscribers)
+
+
+class LocalTransport:
+    """События не выходят за пределы процесса."""
+
+    def start(self, broker):
+        self.broker = broker
+
+    def publish(self, channel, event):
+        self.broker.deliver(channel, event)
+
+
+class RedisTransport:
+    """
+    События всех процессов идут через один канал Redis, каждый процесс
+    раздает их своим подписчикам.
+    """
+    channel = 'yatube:live'
+
+    def __init__(self):
+        try:
+            import redis
+        except ImportError as error:
+            raise ImproperlyConfigured(
+                'Для RedisTransport нужен пакет redis'
+            ) from error
+        self.client = redis.Redis.from_url(settings.LIVE_REDIS_URL)
+
+    def start(self, broker):
+        def receive(message):
+            channel, event_id, name, data = json.loads(message['data'])
+            broker.deliver(channel, Event(event_id, name, data))
+
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: receive})
+        pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def publish(self, channel, event):
+        self.client.publish(self.channel, json.dumps([channel, *event]))
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """Брокер процесса с транспортом из LIVE_TRANSPORT."""
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = Broker(import_string(settings.LIVE_TRANSPORT)())
+    return _broker
+
+
+def format_event(event):
+    data = ''.join(
+        f'data: {line}\n' for line in event.data.splitlines() or ['']
+    )
+    return f'id: {event.id}\nevent: {event.name}\n{data}\n'
+
+
+def stream(channels, last_event_id=None, broker=None):
+    """
+    Поток text/event-stream. Через LIVE_STREAM_DURATION секунд поток
+    закрывается, и браузер переподключается с Last-Event-ID.
+    """
+    broker = broker or get_broker()
+    if not connection.in_atomic_block:
+        connection.close()
+    subscription = broker.subscribe(channels, last_event_id)
+    deadline = time.monotonic() + settings.LIVE_STREAM_DURATION
+    try:
+        yield f'retry: {settings.LIVE_RETRY_MS}\n\n'
+        remaining = settings.LIVE_STREAM_DURATION
+        while remaining > 0:
+            events = subscription.get(min(settings.LIVE_KEEPALIVE, remaining))
+            if events:
+                yield ''.join(format_event(event) for event in events)
+            else:
+                yield ': keepalive\n\n'
+            remaining = deadline - time.monotonic()
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def publish_posts(posts):
+    broker = get_broker()
+    for post in posts:
+        broker.publish(FEED, 'post', render_to_string(
+            'includes/post_card.html', {'post': post}, using='django'
+        ))
+
+
+def publish_comments(comments):
+    broker = get_broker()
+    for comment in comments:
+        broker.publish(
+            comments_channel(comment.post_id),
+            'comment',
+            render_to_string(
+                'posts/includes/comment_item.html',
+                {'comment': comment},
+                using='django'
+            )
+        )
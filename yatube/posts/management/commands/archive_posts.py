@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import cold_storage
+
+
+class Command(BaseCommand):
+    help = 'Переносит старые посты с комментариями в архивные таблицы.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.POST_ARCHIVE_AFTER_DAYS,
+            help='Переносить посты старше этого числа дней'
+        )
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=500,
+            help='Сколько постов переносить одной транзакцией'
+        )
+
+    def handle(self, *args, **options):
+        moved = cold_storage.move_old_posts(options['days'], options['chunk'])
+        self.stdout.write(f'Перенесено постов: {moved}')
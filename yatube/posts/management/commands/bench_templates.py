@@ -0,0 +1,122 @@
+from timeit import default_timer
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.core.paginator import Paginator
+from django.template.backends.django import DjangoTemplates
+from django.template.backends.jinja2 import Jinja2
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils import timezone
+
+from posts.models import Group, GroupStats, Post, User
+
+TEMPLATES = (
+    ('posts/index.html', '/'),
+    ('posts/group_list.html', '/group/bench/'),
+    ('posts/profile.html', '/profile/bench/'),
+    ('posts/follow.html', '/follow/'),
+)
+
+
+def _params(source, name, **options):
+    params = {key: value for key, value in source.items() if key != 'BACKEND'}
+    params.update(NAME=name, APP_DIRS=False)
+    params['OPTIONS'] = dict(source['OPTIONS'], **options)
+    return params
+
+
+def build_engines():
+    """Движки для сравнения: одни и те же шаблоны, разные загрузчики."""
+    django_params, jinja2_params = settings.TEMPLATES
+    loaders = [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]
+    cached = [('django.template.loaders.cached.Loader', loaders)]
+    return (
+        DjangoTemplates(_params(django_params, 'django', loaders=loaders)),
+        DjangoTemplates(
+            _params(django_params, 'django-cached', loaders=cached)
+        ),
+        Jinja2(_params(jinja2_params, 'jinja2')),
+    )
+
+
+def build_context(posts_count):
+    """Контекст ленты из постов в памяти, без запросов к базе."""
+    author = User(pk=1, username='bench', first_name='Лев', last_name='Бенч')
+    group = Group(pk=1, title='Бенчмарк', slug='bench', description='')
+    now = timezone.now()
+    group.stats = GroupStats(
+        group=group,
+        post_count=posts_count,
+        author_count=1,
+        last_post_date=now
+    )
+    posts = []
+    for pk in range(1, posts_count + 1):
+        post = Post(
+            pk=pk,
+            text=f'Пост #{pk} для замера @bench #bench',
+            author=author,
+            group=group,
+            pub_date=now
+        )
+        post.render_text()
+        posts.append(post)
+    page_obj = Paginator(posts, settings.LIMIT_POST).get_page(1)
+    return {
+        'page_obj': page_obj,
+        'group': group,
+        'author': author,
+        'following': False,
+        'follower_count': 0,
+        'recommended': [],
+        'index': True,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает время рендеринга шаблонов лент: Django, Django '
+        'с кэширующим загрузчиком и Jinja2.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=200,
+            help='Сколько раз рендерить каждый шаблон'
+        )
+        parser.add_argument(
+            '--posts',
+            type=int,
+            default=settings.LIMIT_POST,
+            help='Сколько постов в ленте'
+        )
+
+    def handle(self, *args, **options):
+        context = build_context(options['posts'])
+        factory = RequestFactory()
+        for template_name, path in TEMPLATES:
+            request = factory.get(path)
+            request.user = AnonymousUser()
+            request.resolver_match = resolve(path)
+            for engine in build_engines():
+                engine.get_template(template_name)
+                started = default_timer()
+                for _ in range(options['repeat']):
+                    # Фрагмент главной страницы кэшируется, меряем рендеринг.
+                    cache.clear()
+                    engine.get_template(template_name).render(
+                        context, request
+                    )
+                elapsed = default_timer() - started
+                self.stdout.write(
+                    f'{template_name} {engine.name}: '
+                    f'{elapsed / options["repeat"] * 1000:.3f} мс'
+                )
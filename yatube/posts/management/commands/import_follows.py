@@ -0,0 +1,43 @@
+import csv
+
+from django.core.management.base import BaseCommand
+
+from posts.follows import (
+    BULK_BATCH_SIZE, bulk_follow, bulk_unfollow, resolve_usernames
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует граф подписок из CSV-файла '
+        'со строками "подписчик,автор" (username).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Путь к CSV-файлу')
+        parser.add_argument(
+            '--unfollow',
+            action='store_true',
+            help='Удалить перечисленные подписки вместо создания'
+        )
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=10000,
+            help='Сколько строк файла обрабатывать за раз'
+        )
+
+    def handle(self, *args, **options):
+        apply = bulk_unfollow if options['unfollow'] else bulk_follow
+        changed = 0
+        with open(options['path'], newline='', encoding='utf-8') as file:
+            chunk = []
+            for row in csv.reader(file):
+                if len(row) < 2:
+                    continue
+                chunk.append((row[0].strip(), row[1].strip()))
+                if len(chunk) >= options['chunk']:
+                    changed += apply(resolve_usernames(chunk), BULK_BATCH_SIZE)
+                    chunk = []
+            changed += apply(resolve_usernames(chunk), BULK_BATCH_SIZE)
+        self.stdout.write(f'Изменено подписок: {changed}')
@@ -0,0 +1,42 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from posts import scheduling
+
+
+class Command(BaseCommand):
+    help = 'Публикует запланированные посты, время которых подошло.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=settings.SCHEDULER_BATCH_SIZE,
+            help='Сколько постов публиковать за один проход'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Работать постоянно, проверяя посты раз в --interval'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.SCHEDULER_INTERVAL,
+            help='Пауза в секундах, когда публиковать нечего'
+        )
+
+    def handle(self, *args, **options):
+        batch = options['batch']
+        while True:
+            published = scheduling.publish_due(batch)
+            if published:
+                self.stdout.write(f'Опубликовано постов: {published}')
+            if not options['loop']:
+                break
+            if published < batch:
+                close_old_connections()
+                time.sleep(options['interval'])
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import archive
+
+
+class Command(BaseCommand):
+    help = 'Строит помесячные гистограммы архива заново.'
+
+    def handle(self, *args, **options):
+        cells = archive.rebuild()
+        self.stdout.write(f'Месяцев в архиве: {cells}')
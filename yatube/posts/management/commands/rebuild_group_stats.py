@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from posts import group_stats
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счетчики всех групп.'
+
+    def handle(self, *args, **options):
+        groups = group_stats.rebuild()
+        self.stdout.write(f'Пересчитано групп: {groups}')
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from posts import recommendations
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает рекомендации авторов и сохраняет их в кэш.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=100,
+            help='Сколько пользователей обрабатывать за раз'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=recommendations.LIMIT,
+            help='Сколько авторов рекомендовать каждому пользователю'
+        )
+
+    def handle(self, *args, **options):
+        recommended = recommendations.recompute(
+            options['batch'], options['limit']
+        )
+        self.stdout.write(f'Рекомендации получили: {recommended}')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает оценки популярности недавних постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=trending.RECOMPUTE_DAYS,
+            help='За сколько последних дней пересчитывать посты'
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=500,
+            help='Сколько постов обрабатывать за раз'
+        )
+
+    def handle(self, *args, **options):
+        updated = trending.recompute(options['days'], options['batch'])
+        self.stdout.write(f'Пересчитано постов: {updated}')
@@ -0,0 +1,56 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts import tagging
+from posts.models import Post
+from posts.utils import bounded_map
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново строит индекс хештегов и упоминаний. '
+        'Текст разбирается параллельно в нескольких процессах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=1000,
+            help='Сколько постов в одной порции'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Число процессов для разбора текста (1 — без пула)'
+        )
+
+    def chunks(self, size):
+        posts = Post.objects.order_by('pk').values_list('pk', 'text')
+        last_pk = 0
+        while True:
+            rows = list(posts.filter(pk__gt=last_pk)[:size])
+            if not rows:
+                return
+            yield rows
+            last_pk = rows[-1][0]
+
+    def handle(self, *args, **options):
+        indexed = 0
+        if options['workers'] > 1:
+            # Процессы пула только разбирают текст, запись идет здесь;
+            # в работе не больше двух порций на процесс
+            with ProcessPoolExecutor(options['workers']) as pool:
+                for extracted in bounded_map(
+                    pool, tagging.extract_rows, self.chunks(options['chunk']),
+                    2 * options['workers']
+                ):
+                    tagging.store(extracted)
+                    indexed += len(extracted)
+        else:
+            for rows in self.chunks(options['chunk']):
+                tagging.store(tagging.extract_rows(rows))
+                indexed += len(rows)
+        self.stdout.write(f'Проиндексировано постов: {indexed}')
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import ArchivedPost, Post
+from posts.rendering import RENDER_VERSION
+
+
+class Command(BaseCommand):
+    help = 'Заново обрабатывает текст постов с устаревшей версией обработки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=500,
+            help='Сколько постов обрабатывать за раз'
+        )
+
+    def handle(self, *args, **options):
+        for model in (Post, ArchivedPost):
+            stale = model.objects.exclude(
+                render_version=RENDER_VERSION
+            ).order_by('pk').only('pk', 'text')
+            rendered = 0
+            last_pk = 0
+            while True:
+                posts = list(stale.filter(pk__gt=last_pk)[:options['chunk']])
+                if not posts:
+                    break
+                for post in posts:
+                    post.render_text()
+                model.objects.bulk_update(
+                    posts, ['text_html', 'excerpt', 'render_version']
+                )
+                rendered += len(posts)
+                last_pk = posts[-1].pk
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: обработано {rendered}'
+            )
@@ -0,0 +1,81 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from posts import fingerprints
+from posts.models import Fingerprint
+from posts.utils import bounded_map
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет подписи удаленных текстов, считает MinHash-подписи '
+        'старых постов и комментариев, у которых их нет, и помечает почти '
+        'одинаковые тексты. Подписи считаются параллельно в нескольких '
+        'процессах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=500,
+            help='Сколько текстов в одной порции'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Число процессов для подсчета подписей (1 — без пула)'
+        )
+
+    def chunks(self, kind, size):
+        rows = fingerprints.SOURCES[kind].objects.exclude(
+            pk__in=Fingerprint.objects.filter(kind=kind).values('object_id')
+        ).order_by('pk').values_list('pk', 'author_id', 'text')
+        last_pk = 0
+        while True:
+            chunk = list(rows.filter(pk__gt=last_pk)[:size])
+            if not chunk:
+                return
+            yield chunk
+            last_pk = chunk[-1][0]
+
+    def sign(self, kind, options):
+        signed = 0
+        chunks = self.chunks(kind, options['chunk'])
+        if options['workers'] > 1:
+            # Процессы пула только считают подписи, запись идет здесь;
+            # в работе не больше двух порций на процесс
+            with ProcessPoolExecutor(options['workers']) as pool:
+                for rows in bounded_map(
+                    pool, fingerprints.signature_rows, chunks,
+                    2 * options['workers']
+                ):
+                    fingerprints.store(kind, rows)
+                    signed += len(rows)
+        else:
+            for chunk in chunks:
+                rows = fingerprints.signature_rows(chunk)
+                fingerprints.store(kind, rows)
+                signed += len(rows)
+        return signed
+
+    def flag(self, size):
+        flagged, last_pk = 0, 0
+        queryset = Fingerprint.objects.order_by('pk')
+        while True:
+            batch = list(queryset.filter(pk__gt=last_pk)[:size])
+            if not batch:
+                return flagged
+            flagged += fingerprints.flag_batch(batch)
+            last_pk = batch[-1].pk
+
+    def handle(self, *args, **options):
+        for kind, label in Fingerprint.KINDS:
+            removed = fingerprints.forget_missing(kind)
+            self.stdout.write(f'{label}: удалено лишних подписей {removed}')
+            signed = self.sign(kind, options)
+            self.stdout.write(f'{label}: новых подписей {signed}')
+        flagged = self.flag(options['chunk'])
+        self.stdout.write(f'Помечено повторов: {flagged}')
@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import notifications
+
+
+class Command(BaseCommand):
+    help = 'Ставит в очередь письма о новых постах подписок.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=settings.NOTIFICATION_DIGEST_BATCH_SIZE,
+            help='Сколько подписчиков обрабатывать одним запросом'
+        )
+
+    def handle(self, *args, **options):
+        sent = notifications.send_digests(options['batch'])
+        self.stdout.write(f'Писем в очереди: {sent}')
+        self.stdout.write(f'Удалено уведомлений: {notifications.purge()}')
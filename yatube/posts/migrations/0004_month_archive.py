@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-19 07:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_group_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthArchive',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope', models.CharField(choices=[('site', 'Сайт'), ('group', 'Группа'), ('author', 'Автор')], max_length=6, verbose_name='Область')),
+                ('scope_id', models.PositiveIntegerField(default=0, verbose_name='Id группы или автора')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Год')),
+                ('month', models.PositiveSmallIntegerField(verbose_name='Месяц')),
+                ('post_count', models.PositiveIntegerField(default=0, verbose_name='Постов')),
+                ('first_id', models.PositiveIntegerField(verbose_name='Первый пост')),
+                ('last_id', models.PositiveIntegerField(verbose_name='Последний пост')),
+            ],
+            options={
+                'ordering': ['-year', '-month'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='montharchive',
+            constraint=models.UniqueConstraint(fields=('scope', 'scope_id', 'year', 'month'), name='unique_month_archive'),
+        ),
+    ]
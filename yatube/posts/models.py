@@ -1,11 +1,59 @@
 from django.db import models
+from django.utils import timezone
+from django.utils.safestring import mark_safe
 from django.contrib.auth import get_user_model
 from core.models import CreatedModel
+from . import rendering
 
 User = get_user_model()
 
 
-class Post(CreatedModel):
+class RenderedTextModel(models.Model):
+    """
+    Абстрактная модель. Хранит текст, заранее обработанный для показа.
+    """
+    text_html = models.TextField('HTML текста', blank=True, editable=False)
+    excerpt = models.CharField(
+        'Анонс',
+        max_length=rendering.EXCERPT_LENGTH,
+        blank=True,
+        editable=False
+    )
+    render_version = models.PositiveSmallIntegerField(
+        'Версия обработки',
+        default=0,
+        editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    def render_text(self):
+        self.text_html = rendering.render(self.text)
+        self.excerpt = rendering.excerpt(self.text)
+        self.render_version = rendering.RENDER_VERSION
+
+    @property
+    def body(self):
+        """HTML текста; устаревшая или пропущенная обработка делается сразу."""
+        if self.render_version != rendering.RENDER_VERSION:
+            self.render_text()
+        return mark_safe(self.text_html)
+
+    @property
+    def summary(self):
+        if self.render_version != rendering.RENDER_VERSION:
+            self.render_text()
+        return self.excerpt
+
+
+class PostQuerySet(models.QuerySet):
+    def published(self):
+        """Посты, видные в лентах: без черновиков и отложенных."""
+        return self.filter(is_published=True)
+
+
+class Post(CreatedModel, RenderedTextModel):
     text = models.TextField('Текст', help_text='Текст нового поста')
 
     author = models.ForeignKey(
@@ -28,12 +76,30 @@ class Post(CreatedModel):
         upload_to='posts/',
         blank=True
     )
+    is_published = models.BooleanField('Опубликован', default=True)
+    publish_at = models.DateTimeField(
+        'Опубликовать в',
+        blank=True,
+        null=True,
+        help_text='Пусто у черновика и опубликованного поста'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        self.render_text()
+        super().save(*args, **kwargs)
+
     class Meta:
         ordering = ['-pub_date']
+        indexes = (
+            models.Index(fields=['group', 'author']),
+            models.Index(fields=['is_published', '-pub_date']),
+            models.Index(fields=['is_published', 'publish_at']),
+        )
 
 
 class Group(models.Model):
@@ -80,6 +146,11 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Автор'
     )
+    created = models.DateTimeField(
+        'Дата подписки',
+        default=timezone.now,
+        db_index=True
+    )
 
     class Meta():
         constraints = (models.UniqueConstraint(
@@ -90,3 +161,336 @@ class Follow(models.Model):
             check=~models.Q(user=models.F('author')),
             name='non_self_follow'
         )
+
+
+class PostScore(models.Model):
+    """Оценка популярности поста для ленты «Популярное»."""
+    post = models.OneToOneField(
+        'Post',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Пост'
+    )
+    comment_count = models.PositiveIntegerField('Комментариев', default=0)
+    follow_velocity = models.FloatField('Новых подписчиков автора', default=0)
+    score = models.FloatField('Оценка', default=0, db_index=True)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    def __str__(self):
+        return f'{self.post_id}: {self.score:.3f}'
+
+
+class GroupStats(models.Model):
+    """Счетчики группы, обновляются при сохранении и удалении постов."""
+    group = models.OneToOneField(
+        'Group',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа'
+    )
+    post_count = models.PositiveIntegerField('Постов', default=0)
+    author_count = models.PositiveIntegerField('Авторов', default=0)
+    last_post_date = models.DateTimeField(
+        'Последний пост',
+        blank=True,
+        null=True,
+        db_index=True
+    )
+
+    def __str__(self):
+        return f'{self.group_id}: {self.post_count}'
+
+
+class MonthArchive(models.Model):
+    """
+    Гистограмма постов по месяцам: для всего сайта,
+    для группы или для автора.
+    """
+    SITE = 'site'
+    GROUP = 'group'
+    AUTHOR = 'author'
+    SCOPES = (
+        (SITE, 'Сайт'),
+        (GROUP, 'Группа'),
+        (AUTHOR, 'Автор'),
+    )
+
+    scope = models.CharField('Область', max_length=6, choices=SCOPES)
+    scope_id = models.PositiveIntegerField('Id группы или автора', default=0)
+    year = models.PositiveSmallIntegerField('Год')
+    month = models.PositiveSmallIntegerField('Месяц')
+    post_count = models.PositiveIntegerField('Постов', default=0)
+    first_id = models.PositiveIntegerField('Первый пост')
+    last_id = models.PositiveIntegerField('Последний пост')
+
+    class Meta:
+        ordering = ['-year', '-month']
+        constraints = (models.UniqueConstraint(
+            name='unique_month_archive',
+            fields=['scope', 'scope_id', 'year', 'month'],
+        ),)
+
+    def __str__(self):
+        return f'{self.scope}:{self.scope_id} {self.year}-{self.month:02}'
+
+
+class ArchivedPost(RenderedTextModel):
+    """Старый пост, перенесенный из posts_post в архивную таблицу."""
+    id = models.IntegerField(primary_key=True)
+    text = models.TextField('Текст')
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_posts',
+        verbose_name='Автор'
+    )
+    group = models.ForeignKey(
+        'Group',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='archived_posts',
+        verbose_name='Группа'
+    )
+    image = models.ImageField('Картинка', upload_to='posts/', blank=True)
+    archived_at = models.DateTimeField('Перенесен в архив', auto_now_add=True)
+
+    is_archived = True
+    is_published = True
+
+    def __str__(self):
+        return self.text[:15]
+
+    class Meta:
+        ordering = ['-pub_date']
+
+
+class ArchivedComment(models.Model):
+    """Комментарий к посту из архивной таблицы."""
+    id = models.IntegerField(primary_key=True)
+    post = models.ForeignKey(
+        'ArchivedPost',
+        on_delete=models.CASCADE,
+        related_name='comments',
+        verbose_name='Пост'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_comments',
+        verbose_name='Автор'
+    )
+    text = models.TextField('Комментарий')
+    pub_date = models.DateTimeField('Дата публикации', db_index=True)
+
+    def __str__(self):
+        return self.text[:15]
+
+    class Meta:
+        ordering = ['-pub_date']
+
+
+class Tag(models.Model):
+    name = models.CharField('Хештег', max_length=64, unique=True)
+
+    def __str__(self):
+        return f'#{self.name}'
+
+
+class PostTag(models.Model):
+    """Хештег в тексте поста."""
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.CASCADE,
+        related_name='tag_links',
+        verbose_name='Пост'
+    )
+    tag = models.ForeignKey(
+        'Tag',
+        on_delete=models.CASCADE,
+        related_name='post_links',
+        verbose_name='Хештег'
+    )
+
+    class Meta:
+        constraints = (models.UniqueConstraint(
+            name='unique_post_tag',
+            fields=['tag', 'post'],
+        ),)
+
+
+class Mention(models.Model):
+    """Упоминание пользователя в тексте поста."""
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Пост'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='mentions',
+        verbose_name='Пользователь'
+    )
+
+    class Meta:
+        constraints = (models.UniqueConstraint(
+            name='unique_mention',
+            fields=['user', 'post'],
+        ),)
+
+
+class Notification(models.Model):
+    """Новый пост автора, на которого подписан пользователь."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Подписчик'
+    )
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Пост'
+    )
+    created = models.DateTimeField('Создано', default=timezone.now)
+
+    class Meta:
+        ordering = ['-created']
+        indexes = (
+            models.Index(fields=['user', 'created']),
+        )
+        constraints = (models.UniqueConstraint(
+            name='unique_notification',
+            fields=['user', 'post'],
+        ),)
+
+
+class NotificationCounter(models.Model):
+    """Число непрочитанных уведомлений и время последней рассылки."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter',
+        verbose_name='Пользователь'
+    )
+    unread = models.PositiveIntegerField('Непрочитанных', default=0)
+    last_read = models.DateTimeField('Прочитано', blank=True, null=True)
+    last_digest = models.DateTimeField(
+        'Последняя рассылка',
+        blank=True,
+        null=True
+    )
+
+    def __str__(self):
+        return f'{self.user_id}: {self.unread}'
+
+
+class Fingerprint(models.Model):
+    """MinHash-подпись текста поста или комментария."""
+    POST = 'post'
+    COMMENT = 'comment'
+    KINDS = (
+        (POST, 'Пост'),
+        (COMMENT, 'Комментарий'),
+    )
+
+    kind = models.CharField('Тип', max_length=7, choices=KINDS)
+    object_id = models.PositiveIntegerField('Id поста или комментария')
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='fingerprints',
+        verbose_name='Автор'
+    )
+    signature = models.BinaryField('Подпись')
+    duplicate_of = models.ForeignKey(
+        'self',
+        blank=True,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name='duplicates',
+        verbose_name='Повтор текста'
+    )
+    created = models.DateTimeField('Создан', default=timezone.now)
+
+    class Meta:
+        constraints = (models.UniqueConstraint(
+            name='unique_fingerprint',
+            fields=['kind', 'object_id'],
+        ),)
+
+    def __str__(self):
+        return f'{self.kind}:{self.object_id}'
+
+
+class FingerprintBand(models.Model):
+    """Хеш одной полосы подписи (LSH): по нему ищутся похожие тексты."""
+    fingerprint = models.ForeignKey(
+        'Fingerprint',
+        on_delete=models.CASCADE,
+        related_name='bands',
+        verbose_name='Подпись'
+    )
+    key = models.BigIntegerField('Хеш полосы', db_index=True)
+
+
+class PostRevision(models.Model):
+    """
+    Версия текста поста (posts.revisions): сжатый снимок целиком
+    или сжатая разница с предыдущей версией.
+    """
+    post = models.ForeignKey(
+        'Post',
+        on_delete=models.CASCADE,
+        related_name='revisions',
+        verbose_name='Пост'
+    )
+    number = models.PositiveIntegerField('Номер версии')
+    is_snapshot = models.BooleanField('Снимок целиком', default=False)
+    data = models.BinaryField('Снимок или разница')
+    image = models.CharField('Картинка', max_length=100, blank=True)
+    length = models.PositiveIntegerField('Длина текста')
+    created = models.DateTimeField('Создана', default=timezone.now)
+
+    class Meta:
+        ordering = ['number']
+        constraints = (models.UniqueConstraint(
+            name='unique_post_revision',
+            fields=['post', 'number'],
+        ),)
+
+    def __str__(self):
+        return f'{self.post_id} v{self.number}'
+
+
+class ArchivedPostRevision(models.Model):
+    """Версия архивного поста, перенесенная вместе с ним."""
+    post = models.ForeignKey(
+        'ArchivedPost',
+        on_delete=models.CASCADE,
+        related_name='revisions',
+        verbose_name='Пост'
+    )
+    number = models.PositiveIntegerField('Номер версии')
+    is_snapshot = models.BooleanField('Снимок целиком', default=False)
+    data = models.BinaryField('Снимок или разница')
+    image = models.CharField('Картинка', max_length=100, blank=True)
+    length = models.PositiveIntegerField('Длина текста')
+    created = models.DateTimeField('Создана', default=timezone.now)
+
+    class Meta:
+        ordering = ['number']
+        constraints = (models.UniqueConstraint(
+            name='unique_archived_post_revision',
+            fields=['post', 'number'],
+        ),)
+
+    def __str__(self):
+        return f'{self.post_id} v{self.number}'
@@ -0,0 +1,83 @@
+"""
+Массовая модерация постов фоновыми задачами (core.jobs).
+
+Удаление и перенос тысяч постов выполняются порциями вне запроса
+админки. Обработчики сигналов поста на время порции выключены:
+счетчики групп и архив по месяцам пересчитываются один раз на порцию
+для затронутых групп и месяцев, а не по каждому посту, а подписи
+текстов (posts.fingerprints) удаляются одним запросом на порцию.
+"""
+import threading
+from contextlib import contextmanager
+
+from core import jobs
+from . import archive, fingerprints, group_stats
+from .models import MonthArchive, Post
+
+DELETE_POSTS = 'posts.delete_posts'
+DELETE_BY_AUTHOR = 'posts.delete_by_author'
+MOVE_TO_GROUP = 'posts.move_to_group'
+
+AGGREGATE_FIELDS = ('pk', 'author_id', 'group_id', 'pub_date')
+
+_state = threading.local()
+
+
+def in_bulk():
+    """Идет ли в этом потоке пакетная обработка постов."""
+    return getattr(_state, 'bulk', False)
+
+
+@contextmanager
+def _bulk():
+    _state.bulk = True
+    try:
+        yield
+    finally:
+        _state.bulk = False
+
+
+def _delete(posts):
+    affected = list(posts.only(*AGGREGATE_FIELDS))
+    fingerprints.forget_posts([post.pk for post in affected])
+    with _bulk():
+        posts.delete()
+    archive.refresh_posts(affected)
+    group_stats.refresh(post.group_id for post in affected)
+
+
+@jobs.register(
+    DELETE_POSTS,
+    'Удаление постов',
+    lambda params, staged: Post.objects.filter(pk__in=staged)
+)
+def delete_posts(posts, params):
+    _delete(posts)
+
+
+@jobs.register(
+    DELETE_BY_AUTHOR,
+    'Удаление всех постов авторов',
+    lambda params, staged: Post.objects.filter(author_id__in=staged)
+)
+def delete_by_author(posts, params):
+    _delete(posts)
+
+
+@jobs.register(
+    MOVE_TO_GROUP,
+    'Перенос постов в группу',
+    lambda params, staged: Post.objects.filter(pk__in=staged)
+)
+def move_to_group(posts, params):
+    group_id = params['group_id']
+    moved = list(posts.exclude(group_id=group_id).only(*AGGREGATE_FIELDS))
+    old_groups = {post.group_id for post in moved}
+    Post.objects.filter(pk__in=[post.pk for post in moved]).update(
+        group_id=group_id
+    )
+    archive.refresh_posts(moved, [MonthArchive.GROUP])
+    for post in moved:
+        post.group_id = group_id
+    archive.refresh_posts(moved, [MonthArchive.GROUP])
+    group_stats.refresh(old_groups | {group_id})
@@ -0,0 +1,256 @@
+"""
+Уведомления о новых постах авторов из подписок.
+
+Новый пост раскладывается подписчикам автора пачкой запросов,
+число которых не зависит от числа подписчиков. Если подписчиков
+больше NOTIFICATION_SYNC_FOLLOWERS, запрос с постом только ставит
+фоновую задачу (core.jobs), и run_jobs раскладывает уведомления
+порциями по JOB_CHUNK_SIZE подписчиков. Число непрочитанных
+хранится в NotificationCounter и в кэше, поэтому шапка страницы
+читает его без запросов к базе. Лента подписок отмечает уведомления
+прочитанными.
+
+Команда send_digests раз в NOTIFICATION_DIGEST_INTERVAL секунд
+отправляет подписчикам письмо с новыми постами; на пачку из
+NOTIFICATION_DIGEST_BATCH_SIZE получателей уходит один запрос
+уведомлений, письма ставятся в очередь одним вызовом (core.mail).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import (
+    Count, F, Q, Window, prefetch_related_objects
+)
+from django.db.models.functions import RowNumber
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from core import jobs, prerender
+from .models import Follow, Notification, NotificationCounter, Post
+
+CACHE_TIMEOUT = 60 * 60 * 24
+# Три колонки на строку укладываются в лимит SQLite на 999 параметров
+BULK_BATCH_SIZE = 300
+DIGEST_SUBJECT = 'Новые посты авторов, на которых вы подписаны'
+FAN_OUT = 'posts.fan_out'
+
+
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user):
+    """Число непрочитанных уведомлений пользователя."""
+    if not user.is_authenticated:
+        return 0
+    key = _unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = NotificationCounter.objects.filter(
+            user=user
+        ).values_list('unread', flat=True).first() or 0
+        cache.set(key, count, CACHE_TIMEOUT)
+    return count
+
+
+def _forget(user_ids):
+    cache.delete_many([_unread_key(user_id) for user_id in user_ids])
+    prerender.forget_users(user_ids)
+
+
+def fan_out(post):
+    """Уведомляет подписчиков автора о новом посте."""
+    return fan_out_posts([post])
+
+
+def _deliver(posts, follows):
+    """
+    Уведомляет подписчиков из follows (подписки на автора постов).
+    Повторная раскладка, например перезапуск задачи, не дублирует
+    уведомления. Возвращает число уведомлений.
+    """
+    user_ids = list(follows.values_list('user_id', flat=True))
+    if not user_ids:
+        return 0
+    Notification.objects.bulk_create(
+        (
+            Notification(user_id=user_id, post=post, created=post.pub_date)
+            for post in posts
+            for user_id in user_ids
+        ),
+        batch_size=BULK_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+    NotificationCounter.objects.bulk_create(
+        (NotificationCounter(user_id=user_id) for user_id in user_ids),
+        batch_size=BULK_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+    NotificationCounter.objects.filter(
+        user_id__in=follows.values('user_id')
+    ).update(unread=F('unread') + len(posts))
+    _forget(user_ids)
+    return len(user_ids) * len(posts)
+
+
+def fan_out_posts(posts):
+    """
+    Уведомляет подписчиков о пачке новых постов: счетчики обновляются
+    одним запросом на автора, а не на пост. Популярным авторам
+    ставит фоновую задачу. Возвращает число уведомлений, записанных
+    сразу.
+    """
+    by_author = {}
+    for post in posts:
+        by_author.setdefault(post.author_id, []).append(post)
+    followers = Follow.objects.filter(
+        author_id__in=by_author
+    ).values('author_id').annotate(count=Count('pk')).order_by()
+    created = 0
+    for row in followers:
+        author_id = row['author_id']
+        if row['count'] > settings.NOTIFICATION_SYNC_FOLLOWERS:
+            jobs.enqueue(FAN_OUT, {
+                'author_id': author_id,
+                'post_ids': [post.pk for post in by_author[author_id]],
+            })
+            continue
+        created += _deliver(
+            by_author[author_id], Follow.objects.filter(author_id=author_id)
+        )
+    return created
+
+
+@jobs.register(
+    FAN_OUT,
+    'Уведомления подписчикам',
+    lambda params, staged: Follow.objects.filter(
+        author_id=params['author_id']
+    )
+)
+def deliver_chunk(follows, params):
+    posts = list(Post.objects.published().filter(
+        pk__in=params['post_ids']
+    ).only('pk', 'pub_date'))
+    if posts:
+        _deliver(posts, follows)
+
+
+def mark_read(user):
+    """Отмечает все уведомления пользователя прочитанными."""
+    if not unread_count(user):
+        return
+    NotificationCounter.objects.filter(user=user).update(
+        unread=0, last_read=timezone.now()
+    )
+    cache.set(_unread_key(user.pk), 0, CACHE_TIMEOUT)
+    prerender.forget_users([user.pk])
+
+
+def _new_for_user():
+    """
+    Уведомления новее последнего прочтения и последней рассылки
+    своего подписчика.
+    """
+    counter = 'user__notification_counter__'
+    return (
+        (Q(**{f'{counter}last_read__isnull': True})
+         | Q(created__gt=F(f'{counter}last_read')))
+        & (Q(**{f'{counter}last_digest__isnull': True})
+           | Q(created__gt=F(f'{counter}last_digest')))
+    )
+
+
+def _latest(notifications, limit):
+    """
+    Не больше limit последних уведомлений каждого подписчика
+    с постами и авторами: ROW_NUMBER() по подписчику во вложенном
+    запросе и две выборки для постов и авторов.
+    """
+    ranked = notifications.annotate(position=Window(
+        RowNumber(), partition_by=[F('user_id')], order_by=F('created').desc()
+    )).values('pk', 'position')
+    sql, params = ranked.query.sql_with_params()
+    table = Notification._meta.db_table
+    latest = list(Notification.objects.raw(
+        f'SELECT * FROM {table} WHERE id IN ('
+        f'SELECT ranked.id FROM ({sql}) ranked '
+        'WHERE ranked.position <= %s'
+        ') ORDER BY user_id, created DESC',
+        (*params, limit)
+    ))
+    prefetch_related_objects(latest, 'post__author')
+    return latest
+
+
+def _digest(user, notifications, total):
+    return EmailMessage(
+        DIGEST_SUBJECT,
+        render_to_string('posts/email/digest.txt', {
+            'user': user,
+            'notifications': notifications,
+            'more': total - len(notifications),
+            'site_url': settings.SITE_URL,
+        }),
+        to=[user.email]
+    )
+
+
+def send_digests_batch(after=0, batch_size=None):
+    """
+    Ставит в очередь письма для пачки подписчиков с id больше after.
+    Каждому читается не больше NOTIFICATION_DIGEST_LIMIT уведомлений
+    новее его собственных прочтения и рассылки.
+    Возвращает (id последнего в пачке или None, число писем).
+    """
+    batch_size = batch_size or settings.NOTIFICATION_DIGEST_BATCH_SIZE
+    now = timezone.now()
+    due = now - timedelta(seconds=settings.NOTIFICATION_DIGEST_INTERVAL)
+    counters = list(NotificationCounter.objects.filter(
+        Q(last_digest__isnull=True) | Q(last_digest__lt=due),
+        pk__gt=after,
+        unread__gt=0
+    ).exclude(user__email='').select_related('user').order_by('pk')[
+        :batch_size
+    ])
+    if not counters:
+        return None, 0
+    user_ids = [counter.pk for counter in counters]
+    new = Notification.objects.filter(_new_for_user(), user_id__in=user_ids)
+    totals = dict(new.values('user_id').annotate(
+        count=Count('pk')
+    ).values_list('user_id', 'count').order_by())
+    by_user = {}
+    for notification in _latest(new, settings.NOTIFICATION_DIGEST_LIMIT):
+        by_user.setdefault(notification.user_id, []).append(notification)
+    messages = [
+        _digest(counter.user, by_user[counter.pk], totals[counter.pk])
+        for counter in counters if counter.pk in by_user
+    ]
+    if messages:
+        get_connection().send_messages(messages)
+    NotificationCounter.objects.filter(pk__in=user_ids).update(
+        last_digest=now
+    )
+    return counters[-1].pk, len(messages)
+
+
+def send_digests(batch_size=None):
+    """Рассылает письма всем, у кого подошел срок. Возвращает число писем."""
+    after, total = 0, 0
+    while True:
+        after, sent = send_digests_batch(after, batch_size)
+        if after is None:
+            return total
+        total += sent
+
+
+def purge(days=None):
+    """Удаляет уведомления старше days дней."""
+    if days is None:
+        days = settings.NOTIFICATION_KEEP_DAYS
+    return Notification.objects.filter(
+        created__lt=timezone.now() - timedelta(days=days)
+    ).delete()[0]
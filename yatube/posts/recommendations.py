@@ -0,0 +1,134 @@
+"""
+Рекомендации авторов («на кого подписаться»).
+
+Рекомендации считаются пакетно командой recompute_recommendations
+по всей таблице подписок и группам постов и складываются в кэш.
+При показе страницы нужен один запрос к кэшу.
+
+Оценка кандидата складывается из:
+- друзей друзей: авторов, на которых подписаны мои авторы;
+- совместных подписок: авторов, на которых подписаны читатели
+  тех же авторов, что и я (вклад популярных авторов приглушен);
+- близости по группам: авторов, пишущих в группы,
+  где пишу я и мои авторы.
+"""
+import math
+import random
+from collections import Counter, defaultdict
+
+from django.core.cache import cache
+
+from .models import Follow, Post, User
+
+CACHE_TIMEOUT = 60 * 60 * 24
+LIMIT = 5
+
+FRIENDS_WEIGHT = 1.0
+CO_FOLLOW_WEIGHT = 0.5
+GROUP_WEIGHT = 0.3
+# Сколько читателей автора учитывать при подсчете совместных подписок:
+# случайная выборка, одна и та же при каждом пересчете
+CO_FOLLOW_SAMPLE = 50
+SAMPLE_SEED = 20221001
+
+
+def _cache_key(user_id):
+    return f'recommendations:{user_id}'
+
+
+def for_user(user):
+    """Список рекомендованных авторов: словари с id и username."""
+    if not user.is_authenticated:
+        return []
+    return cache.get(_cache_key(user.pk), [])
+
+
+class FollowMatrix:
+    """
+    Подписки и авторство в группах, загруженные в память: словари
+    множеств и счетчиков по id. Выборки читателей популярных авторов
+    делаются один раз при загрузке.
+    """
+
+    def __init__(self):
+        self.following = defaultdict(set)
+        self.followers = defaultdict(set)
+        for user_id, author_id in Follow.objects.values_list(
+            'user_id', 'author_id'
+        ).iterator():
+            self.following[user_id].add(author_id)
+            self.followers[author_id].add(user_id)
+        self.author_groups = defaultdict(Counter)
+        self.group_authors = defaultdict(Counter)
+        for author_id, group_id in Post.objects.published().filter(
+            group__isnull=False
+        ).values_list('author_id', 'group_id').iterator():
+            self.author_groups[author_id][group_id] += 1
+            self.group_authors[group_id][author_id] += 1
+        sampler = random.Random(SAMPLE_SEED)
+        self.reader_samples = {
+            author_id: sampler.sample(sorted(readers), CO_FOLLOW_SAMPLE)
+            for author_id, readers in sorted(self.followers.items())
+            if len(readers) > CO_FOLLOW_SAMPLE
+        }
+
+    def scores(self, user_id):
+        """Оценки кандидатов для одного пользователя."""
+        following = self.following.get(user_id, set())
+        scores = Counter()
+        for author_id in following:
+            for candidate in self.following.get(author_id, ()):
+                scores[candidate] += FRIENDS_WEIGHT
+            readers = self.followers.get(author_id, set())
+            damping = CO_FOLLOW_WEIGHT / math.log(2 + len(readers))
+            for reader in self.reader_samples.get(author_id, readers):
+                if reader == user_id:
+                    continue
+                for candidate in self.following.get(reader, ()):
+                    scores[candidate] += damping
+        groups = Counter(self.author_groups.get(user_id, {}))
+        for author_id in following:
+            groups.update(self.author_groups.get(author_id, {}))
+        for group_id, weight in groups.items():
+            authors = self.group_authors[group_id]
+            total = sum(authors.values())
+            for candidate, posts in authors.items():
+                scores[candidate] += GROUP_WEIGHT * weight * posts / total
+        for excluded in following | {user_id}:
+            scores.pop(excluded, None)
+        return scores
+
+    def recommend(self, user_id, limit=LIMIT):
+        scores = self.scores(user_id)
+        return [
+            candidate for candidate, _ in sorted(
+                scores.items(), key=lambda item: (-item[1], item[0])
+            )[:limit]
+        ]
+
+
+def recompute(batch_size=100, limit=LIMIT):
+    """
+    Пересчитывает рекомендации всех пользователей.
+    Возвращает число пользователей с непустыми рекомендациями.
+    """
+    matrix = FollowMatrix()
+    user_ids = list(User.objects.order_by('pk').values_list('pk', flat=True))
+    recommended = 0
+    for start in range(0, len(user_ids), batch_size):
+        batch = {
+            user_id: matrix.recommend(user_id, limit)
+            for user_id in user_ids[start:start + batch_size]
+        }
+        usernames = dict(User.objects.filter(
+            pk__in={pk for ids in batch.values() for pk in ids}
+        ).values_list('pk', 'username'))
+        cache.set_many({
+            _cache_key(user_id): [
+                {'id': pk, 'username': usernames[pk]}
+                for pk in ids if pk in usernames
+            ]
+            for user_id, ids in batch.items()
+        }, CACHE_TIMEOUT)
+        recommended += sum(1 for ids in batch.values() if ids)
+    return recommended
@@ -0,0 +1,57 @@
+"""
+Подготовка текста поста к показу.
+
+Текст превращается в безопасный HTML один раз, при сохранении поста,
+и хранится вместе с коротким анонсом и номером версии обработки.
+Если обработка изменится, увеличьте RENDER_VERSION и запустите
+команду rerender_posts.
+"""
+import re
+
+from django.urls import reverse
+from django.utils.html import escape, format_html, linebreaks, urlize
+from django.utils.text import Truncator
+
+RENDER_VERSION = 2
+EXCERPT_LENGTH = 30
+
+HASHTAG_RE = r'(?<!\w)#(?P<tag>\w{1,64})'
+MENTION_RE = r'(?<![\w@])@(?P<username>\w[\w.@+-]{0,149}(?<!\.))'
+TOKEN_RE = re.compile(
+    r'(?P<link>https?://\S+|\S+@\S+\.\w+)|' + HASHTAG_RE + '|' + MENTION_RE
+)
+
+
+def _render_token(match):
+    if match.group('link'):
+        return urlize(match.group('link'), nofollow=True, autoescape=True)
+    if match.group('tag'):
+        tag = match.group('tag')
+        return format_html(
+            '<a href="{}">#{}</a>', reverse('posts:tag', args=[tag.lower()]),
+            tag
+        )
+    username = match.group('username')
+    return format_html(
+        '<a href="{}">@{}</a>', reverse('posts:profile', args=[username]),
+        username
+    )
+
+
+def render(text):
+    """
+    Экранирует текст, расставляет ссылки, хештеги,
+    упоминания и абзацы.
+    """
+    parts = []
+    position = 0
+    for match in TOKEN_RE.finditer(text):
+        parts.append(escape(text[position:match.start()]))
+        parts.append(_render_token(match))
+        position = match.end()
+    parts.append(escape(text[position:]))
+    return linebreaks(''.join(parts))
+
+
+def excerpt(text):
+    return Truncator(text).chars(EXCERPT_LENGTH)
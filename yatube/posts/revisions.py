@@ -0,0 +1,148 @@
+"""
+История правок постов.
+
+История заводится при первой правке: версия 1 — исходный текст,
+каждая следующая — текст после очередной правки. Версия хранится
+как сжатая zlib разница с предыдущей (difflib по словам: диапазоны
+слов, взятые из прошлой версии, и вставленный текст). Каждая
+REVISION_SNAPSHOT_EVERY-я версия, а также версия, разница для которой
+не меньше самого текста, хранится сжатым снимком целиком. Поэтому
+любая версия собирается одним запросом из ближайшего снимка
+и не больше REVISION_SNAPSHOT_EVERY - 1 разниц.
+
+Посты, перенесенные в холодное хранилище, уносят историю
+в ArchivedPostRevision; history и version читают ее так же.
+"""
+import json
+import re
+import zlib
+from difflib import SequenceMatcher
+
+from django.conf import settings
+from django.db.models import Max, OuterRef, Subquery
+
+from .models import PostRevision
+
+TOKEN_RE = re.compile(r'\s+|\S+')
+
+
+def _tokens(text):
+    return TOKEN_RE.findall(text)
+
+
+def diff(old, new):
+    """
+    Разница двух текстов: список из [начало, конец) — слова прошлой
+    версии — и строк вставленного текста.
+    """
+    old_tokens, new_tokens = _tokens(old), _tokens(new)
+    matcher = SequenceMatcher(None, old_tokens, new_tokens, autojunk=False)
+    ops = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            ops.append([i1, i2])
+        elif tag in ('replace', 'insert'):
+            ops.append(''.join(new_tokens[j1:j2]))
+    return ops
+
+
+def patch(old, ops):
+    tokens = _tokens(old)
+    return ''.join(
+        op if isinstance(op, str) else ''.join(tokens[op[0]:op[1]])
+        for op in ops
+    )
+
+
+def _compress(value):
+    return zlib.compress(value.encode(), 9)
+
+
+def _encode(old, new):
+    """(снимок?, данные): разница, если она короче сжатого текста."""
+    snapshot = _compress(new)
+    delta = _compress(json.dumps(
+        diff(old, new), ensure_ascii=False, separators=(',', ':')
+    ))
+    if len(delta) < len(snapshot):
+        return False, delta
+    return True, snapshot
+
+
+def _image_name(value):
+    return getattr(value, 'name', value) or ''
+
+
+def remember(post):
+    """Запоминает сохраненные текст и картинку: с ними сравнит record."""
+    # Через __dict__, чтобы отложенные поля .only() не грузились по одному
+    post._saved_text = post.__dict__.get('text')
+    post._saved_image = _image_name(post.__dict__.get('image'))
+
+
+def record(post):
+    """
+    Добавляет версию, если правка изменила текст или картинку.
+    При первой правке сохраняет и исходную версию.
+    Возвращает число добавленных версий.
+    """
+    old_text = getattr(post, '_saved_text', None)
+    old_image = getattr(post, '_saved_image', '')
+    image = _image_name(post.image)
+    if old_text is None or (old_text, old_image) == (post.text, image):
+        return 0
+    last = post.revisions.aggregate(last=Max('number'))['last']
+    revisions = []
+    if last is None:
+        last = 1
+        revisions.append(PostRevision(
+            post=post,
+            number=last,
+            is_snapshot=True,
+            data=_compress(old_text),
+            image=old_image,
+            length=len(old_text)
+        ))
+    number = last + 1
+    if (number - 1) % settings.REVISION_SNAPSHOT_EVERY == 0:
+        is_snapshot, data = True, _compress(post.text)
+    else:
+        is_snapshot, data = _encode(old_text, post.text)
+    revisions.append(PostRevision(
+        post=post,
+        number=number,
+        is_snapshot=is_snapshot,
+        data=data,
+        image=image,
+        length=len(post.text)
+    ))
+    PostRevision.objects.bulk_create(revisions)
+    return len(revisions)
+
+
+def history(post):
+    """Версии поста без данных, новые первыми."""
+    return post.revisions.defer('data').order_by('-number')
+
+
+def version(post, number):
+    """
+    Версия поста или архивного поста: (версия, текст) или None.
+    Один запрос: ближайший снимок не старше версии и разницы после него.
+    """
+    snapshot = post.revisions.model.objects.filter(
+        post=OuterRef('post'), is_snapshot=True, number__lte=number
+    ).order_by('-number').values('number')[:1]
+    chain = list(post.revisions.filter(
+        number__lte=number, number__gte=Subquery(snapshot)
+    ).order_by('number'))
+    if not chain or chain[-1].number != number:
+        return None
+    text = None
+    for revision in chain:
+        data = zlib.decompress(bytes(revision.data)).decode()
+        if revision.is_snapshot:
+            text = data
+        else:
+            text = patch(text, json.loads(data))
+    return chain[-1], text
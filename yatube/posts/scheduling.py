@@ -0,0 +1,88 @@
+"""
+Черновики и отложенная публикация.
+
+Неопубликованный пост (is_published=False) не виден в лентах,
+счетчиках групп, архиве и уведомлениях: ленты выбирают
+Post.objects.published() по индексу (is_published, pub_date).
+Черновик — неопубликованный пост без publish_at, запланированный
+пост — с publish_at.
+
+publish() публикует пачку постов одним UPDATE и один раз на пачку
+пересчитывает счетчики групп и ячейки архива, заводит оценки,
+раскладывает уведомления подписчикам, сбрасывает кэш главной
+и отправляет посты в живые ленты. Команда publish_scheduled
+публикует подошедшие посты пачками по SCHEDULER_BATCH_SIZE.
+"""
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.db import connection, transaction
+from django.db.models import Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from . import archive, group_stats, live, notifications, trending
+from .models import Post
+
+# Фрагмент главной страницы в {% cache %} и cache_block
+INDEX_FRAGMENT = 'index_page'
+
+
+def due(now=None):
+    """Запланированные посты, время которых подошло."""
+    return Post.objects.filter(
+        is_published=False, publish_at__lte=now or timezone.now()
+    )
+
+
+def forget_feeds():
+    cache.delete(make_template_fragment_key(INDEX_FRAGMENT))
+
+
+def publish(posts, now=None):
+    """
+    Публикует посты. Дата публикации запланированного поста — его
+    publish_at, черновика — now. Возвращает число опубликованных.
+    """
+    now = now or timezone.now()
+    posts = [post for post in posts if not post.is_published]
+    if not posts:
+        return 0
+    with transaction.atomic():
+        Post.objects.filter(pk__in=[post.pk for post in posts]).update(
+            is_published=True,
+            publish_at=None,
+            pub_date=Coalesce('publish_at', Value(now))
+        )
+        for post in posts:
+            post.pub_date = post.publish_at or now
+            post.is_published = True
+            post.publish_at = None
+        group_stats.refresh({
+            post.group_id for post in posts if post.group_id is not None
+        })
+        archive.refresh_posts(posts)
+        trending.register_posts(posts)
+        notifications.fan_out_posts(posts)
+        transaction.on_commit(lambda: live.publish_posts(posts))
+    forget_feeds()
+    return len(posts)
+
+
+def publish_due(batch_size, now=None):
+    """
+    Публикует пачку подошедших постов. Строки пачки заблокированы,
+    поэтому два планировщика не опубликуют пост дважды.
+    """
+    now = now or timezone.now()
+    lock = {}
+    if connection.features.has_select_for_update_skip_locked:
+        lock['skip_locked'] = True
+    with transaction.atomic():
+        ids = list(
+            due(now).select_for_update(**lock).order_by('publish_at')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        posts = Post.objects.filter(pk__in=ids).select_related(
+            'author', 'group'
+        )
+        return publish(list(posts), now)
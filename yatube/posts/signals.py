@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from . import (
+    archive, cold_storage, fingerprints, graph, group_stats, live,
+    moderation, notifications, revisions, tagging, trending
+)
+from .models import (
+    ArchivedPost, Comment, Fingerprint, Follow, Group, GroupStats,
+    MonthArchive, Post
+)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_graph(sender, instance, **kwargs):
+    """Изменение подписки сбрасывает граф обоих участников."""
+    graph.invalidate(instance.user_id, instance.author_id)
+
+
+@receiver(post_save, sender=Comment)
+def update_post_score(sender, instance, created, **kwargs):
+    if created:
+        trending.register_comments([instance])
+        fingerprints.register_comments([instance])
+        transaction.on_commit(lambda: live.publish_comments([instance]))
+
+
+@receiver(post_init, sender=Post)
+def remember_saved_state(sender, instance, **kwargs):
+    """
+    Запоминает группу поста, чтобы заметить перенос в другую группу,
+    и текст с картинкой для истории правок.
+    """
+    instance._saved_group_id = instance.group_id
+    revisions.remember(instance)
+
+
+@receiver(post_save, sender=Post)
+def update_post_aggregates(sender, instance, created, **kwargs):
+    """Обновляет счетчики и индексы, зависящие от поста."""
+    if not created:
+        revisions.record(instance)
+    revisions.remember(instance)
+    tagging.index_post(instance)
+    fingerprints.register_post(instance, created)
+    if not instance.is_published:
+        # Счетчики, архив и уведомления обновит posts.scheduling.publish
+        instance._saved_group_id = instance.group_id
+        return
+    if created:
+        trending.register_post(instance)
+        archive.add_post(instance)
+        notifications.fan_out(instance)
+        transaction.on_commit(lambda: live.publish_posts([instance]))
+    old_group_id = None if created else instance._saved_group_id
+    if old_group_id != instance.group_id:
+        if old_group_id is not None:
+            group_stats.remove_post(old_group_id, instance)
+            archive.remove_post(
+                instance, [(MonthArchive.GROUP, old_group_id)]
+            )
+        if instance.group_id is not None:
+            group_stats.add_post(instance.group_id, instance)
+        if instance.group_id is not None and not created:
+            archive.add_post(
+                instance, [(MonthArchive.GROUP, instance.group_id)]
+            )
+    instance._saved_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=ArchivedPost)
+def remove_post_aggregates(sender, instance, **kwargs):
+    if (
+        not instance.is_published
+        or cold_storage.is_moving()
+        or moderation.in_bulk()
+    ):
+        return
+    if instance.group_id is not None:
+        group_stats.remove_post(instance.group_id, instance)
+    archive.remove_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def forget_fingerprint(sender, instance, **kwargs):
+    """Удаленный текст больше не находится как оригинал повтора."""
+    if cold_storage.is_moving() or moderation.in_bulk():
+        return
+    kind = Fingerprint.POST if sender is Post else Fingerprint.COMMENT
+    fingerprints.forget(kind, [instance.pk])
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
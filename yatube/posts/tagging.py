@@ -0,0 +1,66 @@
+"""
+Индекс хештегов и упоминаний.
+
+При сохранении поста хештеги и упоминания из текста записываются
+в таблицы PostTag и Mention. Ленты хештега и упоминаний
+листаются по id поста (keyset) через составные индексы этих таблиц.
+"""
+from django.db import transaction
+
+from .models import Mention, PostTag, Tag, User
+from .rendering import TOKEN_RE
+
+
+def extract(text):
+    """Хештеги (в нижнем регистре) и username упомянутых пользователей."""
+    tags, usernames = set(), set()
+    for match in TOKEN_RE.finditer(text):
+        if match.group('tag'):
+            tags.add(match.group('tag').lower())
+        elif match.group('username'):
+            usernames.add(match.group('username'))
+    return tags, usernames
+
+
+def extract_rows(rows):
+    """Разбор пачки (id, text); выполняется и в отдельных процессах."""
+    return [(post_id, *extract(text)) for post_id, text in rows]
+
+
+def _tag_ids(names):
+    if not names:
+        return {}
+    Tag.objects.bulk_create(
+        [Tag(name=name) for name in names], ignore_conflicts=True
+    )
+    return dict(
+        Tag.objects.filter(name__in=names).values_list('name', 'pk')
+    )
+
+
+def store(extracted):
+    """
+    Записывает результат extract_rows: заменяет ссылки перечисленных
+    постов на найденные хештеги и упоминания.
+    """
+    post_ids = [post_id for post_id, _, _ in extracted]
+    tag_ids = _tag_ids({tag for _, tags, _ in extracted for tag in tags})
+    user_ids = dict(User.objects.filter(
+        username__in={name for _, _, names in extracted for name in names}
+    ).values_list('username', 'pk'))
+    with transaction.atomic():
+        PostTag.objects.filter(post_id__in=post_ids).delete()
+        Mention.objects.filter(post_id__in=post_ids).delete()
+        PostTag.objects.bulk_create([
+            PostTag(post_id=post_id, tag_id=tag_ids[tag])
+            for post_id, tags, _ in extracted for tag in tags
+        ])
+        Mention.objects.bulk_create([
+            Mention(post_id=post_id, user_id=user_ids[name])
+            for post_id, _, names in extracted for name in names
+            if name in user_ids
+        ])
+
+
+def index_post(post):
+    store(extract_rows([(post.pk, post.text)]))
@@ -0,0 +1,126 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.paginator import EstimatedCountPaginator, estimated_count
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+CHANGELISTS = (
+    'admin:posts_post_changelist',
+    'admin:posts_comment_changelist',
+    'admin:posts_follow_changelist',
+)
+
+
+class AdminChangelistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.group = Group.objects.create(title='Группа', slug='group')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def populate(self, size):
+        start = Post.objects.count()
+        for number in range(start, start + size):
+            author = User.objects.create_user(username=f'author{number}')
+            post = Post.objects.create(
+                author=author, group=self.group, text=f'Пост {number}'
+            )
+            Comment.objects.create(post=post, author=author, text='Текст')
+            Follow.objects.create(user=author, author=self.admin)
+
+    def changelist_queries(self, name, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(name), params)
+        self.assertEqual(response.status_code, 200)
+        return [query['sql'] for query in queries.captured_queries]
+
+    def test_queries_do_not_grow_with_rows(self):
+        """Число запросов списка не зависит от числа строк."""
+        self.populate(2)
+        self.changelist_queries(CHANGELISTS[0])
+        few = {
+            name: len(self.changelist_queries(name)) for name in CHANGELISTS
+        }
+        self.populate(20)
+        for name in CHANGELISTS:
+            with self.subTest(name=name):
+                self.assertEqual(len(self.changelist_queries(name)), few[name])
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=10)
+    def test_large_table_not_counted(self):
+        """Большая таблица без фильтров не считается через COUNT(*)."""
+        self.populate(12)
+        for name in CHANGELISTS:
+            with self.subTest(name=name):
+                queries = self.changelist_queries(name)
+                self.assertFalse([sql for sql in queries if 'COUNT(' in sql])
+
+    def test_month_filter_from_histogram(self):
+        """Месяцы берутся из гистограммы, а не из DISTINCT по датам."""
+        self.populate(1)
+        local = timezone.localtime(Post.objects.get().pub_date)
+        for name in CHANGELISTS:
+            with self.subTest(name=name):
+                queries = self.changelist_queries(name)
+                self.assertFalse([
+                    sql for sql in queries if 'DISTINCT' in sql.upper()
+                ])
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'),
+            {'month': f'{local.year}-{local.month}'}
+        )
+        self.assertContains(response, f'{local.month:02}.{local.year}')
+        self.assertContains(response, 'Пост 0')
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'),
+            {'month': f'{local.year - 1}-{local.month}'}
+        )
+        self.assertNotContains(response, 'Пост 0')
+
+    def test_foreign_keys_use_lightweight_widgets(self):
+        """Форма поста не выводит всех пользователей и все группы."""
+        self.populate(1)
+        post = Post.objects.get()
+        response = self.client.get(
+            reverse('admin:posts_post_change', args=(post.pk,))
+        )
+        self.assertContains(response, 'admin-autocomplete')
+        self.assertNotContains(response, 'author0</option>\n<option')
+        comment = post.comments.get()
+        response = self.client.get(
+            reverse('admin:posts_comment_change', args=(comment.pk,))
+        )
+        self.assertContains(response, 'vForeignKeyRawIdAdminField')
+
+
+class EstimatedCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        Post.objects.bulk_create(
+            Post(author=cls.author, text=f'Пост {number}')
+            for number in range(5)
+        )
+
+    def test_estimate_only_for_whole_table(self):
+        """Оценка есть только у списка без фильтров."""
+        self.assertIsNone(estimated_count(Post.objects.filter(pk__gt=2)))
+        last = Post.objects.order_by('pk').last()
+        self.assertEqual(estimated_count(Post.objects.all()), last.pk)
+
+    @override_settings(ADMIN_ESTIMATED_COUNT_THRESHOLD=1000)
+    def test_small_table_counted_exactly(self):
+        """Оценка ниже порога заменяется точным числом."""
+        Post.objects.order_by('pk').first().delete()
+        paginator = EstimatedCountPaginator(Post.objects.all(), 2)
+        self.assertEqual(paginator.count, 4)
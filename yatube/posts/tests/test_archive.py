@@ -0,0 +1,93 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import archive
+from ..models import Group, MonthArchive, Post
+
+User = get_user_model()
+
+
+class ArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, text=f'Пост {i}', group=cls.group
+            ) for i in range(3)
+        ]
+        Post.objects.filter(pk=cls.posts[0].pk).update(
+            pub_date=timezone.make_aware(datetime(2021, 5, 10))
+        )
+        archive.rebuild()
+        cls.now = timezone.localtime(cls.posts[-1].pub_date)
+
+    def setUp(self):
+        self.client = Client()
+
+    def bucket(self, scope, scope_id, year, month):
+        return MonthArchive.objects.get(
+            scope=scope, scope_id=scope_id, year=year, month=month
+        )
+
+    def test_histogram(self):
+        """Гистограмма хранит число постов и диапазон id."""
+        bucket = self.bucket(
+            MonthArchive.SITE, 0, self.now.year, self.now.month
+        )
+        self.assertEqual(bucket.post_count, 2)
+        self.assertEqual(
+            (bucket.first_id, bucket.last_id),
+            (self.posts[1].pk, self.posts[2].pk)
+        )
+        for scope, scope_id in (
+            (MonthArchive.GROUP, self.group.pk),
+            (MonthArchive.AUTHOR, self.user.pk),
+        ):
+            with self.subTest(scope=scope):
+                self.assertEqual(
+                    self.bucket(scope, scope_id, 2021, 5).post_count, 1
+                )
+
+    def test_incremental_updates(self):
+        """Новые и удаленные посты меняют ячейки месяца."""
+        post = Post.objects.create(author=self.user, text='Новый пост')
+        bucket = self.bucket(
+            MonthArchive.SITE, 0, self.now.year, self.now.month
+        )
+        self.assertEqual((bucket.post_count, bucket.last_id), (3, post.pk))
+        self.posts[1].delete()
+        bucket.refresh_from_db()
+        self.assertEqual(bucket.post_count, 2)
+        self.assertEqual(bucket.first_id, self.posts[2].pk)
+
+    def test_month_pages(self):
+        """Страницы месяца для сайта, группы и автора."""
+        urls = (
+            reverse('posts:archive_month', args=[2021, 5]),
+            reverse('posts:group_archive_month', args=['test-slug', 2021, 5]),
+            reverse(
+                'posts:profile_archive_month', args=['HasNoName', 2021, 5]
+            ),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(
+                    list(response.context['page_obj']), [self.posts[0]]
+                )
+                self.assertIsNotNone(response.context['next_url'])
+        response = self.client.get(
+            reverse('posts:archive_month', args=[2020, 1])
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_archive_index(self):
+        response = self.client.get(reverse('posts:archive'))
+        years = dict(response.context['years'])
+        self.assertEqual([bucket.month for bucket in years[2021]], [5])
@@ -0,0 +1,141 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+from django.utils import timezone
+
+from core.testing import IsolatedCacheMixin
+from .. import archive, cold_storage, group_stats
+from ..models import (
+    ArchivedComment, ArchivedPost, Comment, Group, GroupStats, MonthArchive,
+    Post
+)
+
+User = get_user_model()
+
+
+class ColdStorageTests(IsolatedCacheMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.old_posts = [
+            Post.objects.create(
+                author=cls.user, text=f'Старый пост {i}', group=cls.group
+            ) for i in range(3)
+        ]
+        cls.new_post = Post.objects.create(author=cls.user, text='Новый')
+        Comment.objects.create(
+            post=cls.old_posts[0], author=cls.user, text='Комментарий'
+        )
+        for days, post in enumerate(cls.old_posts, start=400):
+            Post.objects.filter(pk=post.pk).update(
+                pub_date=timezone.now() - timedelta(days=days)
+            )
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+
+    def test_move_old_posts(self):
+        """Старые посты и комментарии переносятся порциями с теми же id."""
+        self.assertEqual(cold_storage.move_old_posts(chunk_size=2), 3)
+        self.assertEqual(list(Post.objects.all()), [self.new_post])
+        self.assertEqual(
+            set(ArchivedPost.objects.values_list('pk', flat=True)),
+            {post.pk for post in self.old_posts}
+        )
+        self.assertEqual(
+            ArchivedComment.objects.get().post_id, self.old_posts[0].pk
+        )
+        self.assertEqual(Comment.objects.count(), 0)
+
+    def test_aggregates_kept(self):
+        """Перенос не меняет счетчики групп и помесячный архив."""
+        stats = GroupStats.objects.get(group=self.group).post_count
+        months = list(MonthArchive.objects.values())
+        cold_storage.move_old_posts()
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).post_count, stats
+        )
+        self.assertEqual(list(MonthArchive.objects.values()), months)
+
+    def assert_rebuild_agrees(self):
+        """Точечные пересчеты совпадают с полной перестройкой."""
+        def snapshot():
+            return (
+                sorted(MonthArchive.objects.values_list(
+                    'scope', 'scope_id', 'year', 'month', 'post_count',
+                    'first_id', 'last_id'
+                )),
+                sorted(GroupStats.objects.values_list(
+                    'group_id', 'post_count', 'author_count', 'last_post_date'
+                ))
+            )
+        current = snapshot()
+        archive.rebuild()
+        group_stats.rebuild()
+        self.assertEqual(snapshot(), current)
+
+    def test_recounts_include_archive(self):
+        """Удаление и перенос горячего поста учитывают архивные посты."""
+        old = self.old_posts[0]
+        neighbour = Post.objects.create(
+            author=self.user, text='Сосед', group=self.group
+        )
+        Post.objects.filter(pk=neighbour.pk).update(pub_date=old.pub_date)
+        archive.rebuild()
+        group_stats.rebuild()
+        cold_storage.move_chunk([old.pk])
+        self.assert_rebuild_agrees()
+
+        other = Group.objects.create(title='Другая', slug='other')
+        neighbour = Post.objects.get(pk=neighbour.pk)
+        neighbour.group = other
+        neighbour.save()
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual((stats.post_count, stats.author_count), (3, 1))
+        self.assert_rebuild_agrees()
+
+        neighbour.delete()
+        self.assertEqual(MonthArchive.objects.get(
+            scope=MonthArchive.SITE,
+            year=timezone.localtime(old.pub_date).year,
+            month=timezone.localtime(old.pub_date).month
+        ).post_count, 1)
+        self.assert_rebuild_agrees()
+
+        ArchivedPost.objects.get(pk=old.pk).delete()
+        self.assertEqual(
+            GroupStats.objects.get(group=self.group).post_count, 2
+        )
+        self.assert_rebuild_agrees()
+
+    def test_pages_read_both_tiers(self):
+        """Профиль и страница поста видят архивные посты."""
+        cold_storage.move_old_posts()
+        response = self.client.get(
+            reverse('posts:profile', args=[self.user.username])
+        )
+        self.assertEqual(
+            [post.pk for post in response.context['page_obj']],
+            [self.new_post.pk] + [post.pk for post in self.old_posts]
+        )
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.old_posts[0].pk])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Комментарий')
+        self.assertTrue(response.context['post'].is_archived)
+
+    def test_tiered_list_slicing(self):
+        tiered = cold_storage.TieredPostList(
+            Post.objects.filter(pk=self.new_post.pk),
+            Post.objects.filter(
+                pk__in=[post.pk for post in self.old_posts]
+            ).order_by('pk')
+        )
+        self.assertEqual(tiered.count(), 4)
+        self.assertEqual(tiered[1:3], self.old_posts[:2])
+        self.assertEqual(tiered[0], self.new_post)
@@ -0,0 +1,183 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from .. import cold_storage, fingerprints, moderation
+from ..models import Comment, Fingerprint, FingerprintBand, Post
+
+User = get_user_model()
+
+SPAM = (
+    'Лучшие скидки недели только у нас, переходите по ссылке в профиле '
+    'и получите подарок при первом заказе до конца месяца'
+)
+REPOST = SPAM.replace('недели', 'месяца')
+OTHER = (
+    'Сегодня гуляли по набережной, смотрели на ледоход и обсуждали '
+    'планы на лето вместе с друзьями из соседнего города'
+)
+
+
+class FingerprintTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.bot = User.objects.create_user(username='bot')
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.bot)
+
+    def test_similarity_estimate(self):
+        """Подписи похожих текстов совпадают в большинстве минимумов."""
+        spam = fingerprints.minhash(SPAM)
+        self.assertGreater(
+            fingerprints.similarity(spam, fingerprints.minhash(REPOST)), 0.7
+        )
+        self.assertLess(
+            fingerprints.similarity(spam, fingerprints.minhash(OTHER)), 0.2
+        )
+        self.assertEqual(fingerprints.unpack(fingerprints.pack(spam)), spam)
+        self.assertIsNone(fingerprints.minhash('Спасибо, отличный пост!'))
+
+    def test_repost_flagged(self):
+        """Повтор чужого поста помечается ссылкой на оригинал."""
+        original = Post.objects.create(author=self.user, text=SPAM)
+        repost = Post.objects.create(author=self.bot, text=REPOST)
+        Post.objects.create(author=self.bot, text=OTHER)
+        fingerprint = Fingerprint.objects.get(
+            kind=Fingerprint.POST, object_id=repost.pk
+        )
+        self.assertEqual(fingerprint.duplicate_of.object_id, original.pk)
+        self.assertEqual(
+            Fingerprint.objects.filter(duplicate_of__isnull=False).count(), 1
+        )
+
+    def test_edit_does_not_flag_original(self):
+        """Правка оригинала не делает его повтором собственной копии."""
+        original = Post.objects.create(author=self.user, text=SPAM)
+        Post.objects.create(author=self.bot, text=REPOST)
+        original.save()
+        self.assertIsNone(Fingerprint.objects.get(
+            kind=Fingerprint.POST, object_id=original.pk
+        ).duplicate_of)
+
+    @override_settings(DUPLICATE_CANDIDATES=3)
+    def test_many_weak_candidates_do_not_hide_duplicate(self):
+        """Почти одинаковый текст находится за любым числом слабых."""
+        signature = tuple(range(fingerprints.SIGNATURE_SIZE))
+        rows = fingerprints.ROWS
+
+        def save(tail_start, author):
+            stored = signature[:tail_start] + tuple(
+                10 ** 6 + author.pk * 1000 + i
+                for i in range(fingerprints.SIGNATURE_SIZE - tail_start)
+            )
+            fingerprint = Fingerprint.objects.create(
+                kind=Fingerprint.POST,
+                object_id=Fingerprint.objects.count() + 1,
+                author=author,
+                signature=fingerprints.pack(stored)
+            )
+            FingerprintBand.objects.bulk_create(
+                FingerprintBand(fingerprint=fingerprint, key=key)
+                for key in fingerprints.band_keys(stored)
+            )
+            return fingerprint
+
+        for number in range(5):
+            save(rows, User.objects.create_user(username=f'weak{number}'))
+        duplicate = save(fingerprints.SIGNATURE_SIZE - rows, self.bot)
+        self.assertEqual(fingerprints._find(signature), duplicate)
+
+    def test_lookup_is_one_query(self):
+        Post.objects.create(author=self.user, text=SPAM)
+        with self.assertNumQueries(1):
+            self.assertIsNotNone(fingerprints.find_duplicate(REPOST))
+
+    @override_settings(DUPLICATE_POLICY='reject')
+    def test_reject_policy(self):
+        """По политике 'reject' формы не пропускают повтор."""
+        post = Post.objects.create(author=self.user, text=SPAM)
+        response = self.client.post(
+            reverse('posts:post_create'), {'text': REPOST}
+        )
+        self.assertFormError(
+            response, 'form', 'text', 'Почти такой же текст уже опубликован.'
+        )
+        self.client.post(
+            reverse('posts:add_comment', args=(post.pk,)), {'text': REPOST}
+        )
+        self.assertFalse(Comment.objects.exists())
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('posts:post_edit', args=(post.pk,)), {'text': SPAM}
+        )
+        self.assertRedirects(
+            response, reverse('posts:post_detail', args=(post.pk,))
+        )
+
+    def test_comment_flagged(self):
+        post = Post.objects.create(author=self.user, text=OTHER)
+        Comment.objects.create(post=post, author=self.user, text=SPAM)
+        comment = Comment.objects.create(post=post, author=self.bot, text=SPAM)
+        self.assertIsNotNone(Fingerprint.objects.get(
+            kind=Fingerprint.COMMENT, object_id=comment.pk
+        ).duplicate_of)
+
+    def test_removed_texts_not_originals(self):
+        """Удаленные и архивные тексты не находятся как оригиналы."""
+        removals = {
+            'delete': lambda post: post.delete(),
+            'moderation': lambda post: moderation.delete_posts(
+                Post.objects.filter(pk=post.pk), {}
+            ),
+            'archive': lambda post: cold_storage.move_chunk([post.pk]),
+        }
+        for name, remove in removals.items():
+            with self.subTest(removal=name):
+                original = Post.objects.create(author=self.user, text=SPAM)
+                Comment.objects.create(
+                    post=original, author=self.user, text=OTHER
+                )
+                remove(original)
+                self.assertFalse(Fingerprint.objects.exists())
+                self.assertFalse(FingerprintBand.objects.exists())
+                self.assertIsNone(fingerprints.find_duplicate(REPOST))
+
+    def test_scan_command(self):
+        """Команда считает подписи старых постов и помечает повторы."""
+        Post.objects.bulk_create([
+            Post(author=self.user, text=SPAM),
+            Post(author=self.bot, text=OTHER),
+            Post(author=self.bot, text=REPOST),
+            Post(author=self.bot, text='Коротко'),
+        ])
+        out = StringIO()
+        call_command('scan_duplicates', workers=2, chunk=1, stdout=out)
+        self.assertIn('Пост: новых подписей 3', out.getvalue())
+        self.assertIn('Помечено повторов: 1', out.getvalue())
+        repost = Fingerprint.objects.get(
+            object_id=Post.objects.get(text=REPOST).pk
+        )
+        self.assertEqual(
+            repost.duplicate_of.object_id, Post.objects.get(text=SPAM).pk
+        )
+        call_command('scan_duplicates', workers=1, stdout=out)
+        self.assertIn('Пост: новых подписей 0', out.getvalue())
+
+    def test_scan_command_removes_orphans(self):
+        """Команда удаляет подписи, оставшиеся от удаленных текстов."""
+        post = Post.objects.create(author=self.user, text=SPAM)
+        Post.objects.filter(pk=post.pk).delete()
+        Fingerprint.objects.create(
+            kind=Fingerprint.POST, object_id=post.pk, author=self.user,
+            signature=fingerprints.pack(fingerprints.minhash(SPAM))
+        )
+        out = StringIO()
+        call_command('scan_duplicates', workers=1, stdout=out)
+        self.assertIn('Пост: удалено лишних подписей 1', out.getvalue())
+        self.assertFalse(Fingerprint.objects.exists())
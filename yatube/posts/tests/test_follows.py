@@ -0,0 +1,121 @@
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+
+from core.testing import IsolatedCacheMixin
+from .. import follows, graph
+from ..models import Follow
+
+User = get_user_model()
+
+
+class FollowServiceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.author = User.objects.create_user(username='Author')
+        cls.other = User.objects.create_user(username='Other')
+
+    def test_follow_is_idempotent(self):
+        """Повторная подписка не меняет состояние."""
+        self.assertTrue(follows.follow(self.user, 'Author'))
+        self.assertFalse(follows.follow(self.user, 'Author'))
+        self.assertEqual(Follow.objects.count(), 1)
+
+    def test_follow_rejects_self_and_unknown(self):
+        """Нельзя подписаться на себя и на несуществующего автора."""
+        self.assertFalse(follows.follow(self.user, 'HasNoName'))
+        self.assertFalse(follows.follow(self.user, 'nobody'))
+        self.assertEqual(Follow.objects.count(), 0)
+
+    def test_unfollow_is_idempotent(self):
+        """Повторная отписка не меняет состояние."""
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertTrue(follows.unfollow(self.user, 'Author'))
+        self.assertFalse(follows.unfollow(self.user, 'Author'))
+        self.assertEqual(Follow.objects.count(), 0)
+
+    def test_bulk_follow_and_unfollow(self):
+        """Пакетные операции возвращают число изменений."""
+        Follow.objects.create(user=self.user, author=self.author)
+        pairs = [
+            (self.user.pk, self.author.pk),
+            (self.user.pk, self.other.pk),
+            (self.other.pk, self.author.pk),
+            (self.other.pk, self.other.pk),
+        ]
+        self.assertEqual(follows.bulk_follow(pairs, batch_size=2), 2)
+        self.assertEqual(Follow.objects.count(), 3)
+        self.assertEqual(follows.bulk_unfollow(pairs, batch_size=2), 3)
+        self.assertEqual(Follow.objects.count(), 0)
+
+    def test_import_follows_command(self):
+        """Команда импортирует подписки из CSV по username."""
+        with tempfile.NamedTemporaryFile('w', suffix='.csv') as file:
+            file.write('HasNoName,Author\nOther,Author\nOther,nobody\n')
+            file.flush()
+            call_command('import_follows', file.name, stdout=StringIO())
+        self.assertEqual(Follow.objects.count(), 2)
+
+
+class FollowGraphTests(IsolatedCacheMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.author = User.objects.create_user(username='Author')
+        cls.other = User.objects.create_user(username='Other')
+
+    def test_sets_are_cached(self):
+        """Повторные обращения к графу не ходят в базу."""
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertTrue(graph.is_following(self.user.pk, self.author.pk))
+        with self.assertNumQueries(0):
+            self.assertTrue(graph.is_following(self.user.pk, self.author.pk))
+            self.assertFalse(graph.is_following(self.user.pk, self.other.pk))
+
+    def test_invalidation_on_changes(self):
+        """Подписка и отписка сбрасывают закэшированные множества."""
+        self.assertEqual(graph.follower_count(self.author.pk), 0)
+        follows.follow(self.user, 'Author')
+        self.assertEqual(graph.follower_count(self.author.pk), 1)
+        self.assertTrue(graph.is_following(self.user.pk, self.author.pk))
+        follows.unfollow(self.user, 'Author')
+        self.assertEqual(graph.follower_count(self.author.pk), 0)
+        follow = Follow.objects.create(user=self.other, author=self.author)
+        self.assertEqual(list(graph.follower_ids(self.author.pk)),
+                         [self.other.pk])
+        follow.delete()
+        self.assertEqual(len(graph.follower_ids(self.author.pk)), 0)
+
+    def test_evicted_version_not_stale(self):
+        """Вытесненный ключ версии не возвращает устаревший массив."""
+        self.assertFalse(graph.is_following(self.user.pk, self.author.pk))
+        follows.follow(self.user, 'Author')
+        cache.delete(graph._version_key(self.user.pk))
+        self.assertTrue(graph.is_following(self.user.pk, self.author.pk))
+
+    def test_each_invalidation_bumps_version(self):
+        """Каждый сброс дает новую версию."""
+        graph.following_ids(self.user.pk)
+        versions = {graph._version(self.user.pk)}
+        for _ in range(3):
+            graph.invalidate(self.user.pk)
+            versions.add(graph._version(self.user.pk))
+        self.assertEqual(len(versions), 4)
+
+    def test_mutuals(self):
+        """Взаимные подписки."""
+        follows.bulk_follow([
+            (self.user.pk, self.author.pk),
+            (self.author.pk, self.user.pk),
+            (self.user.pk, self.other.pk),
+        ])
+        self.assertEqual(graph.mutuals(self.user.pk), [self.author.pk])
+        self.assertEqual(
+            list(graph.following_ids(self.user.pk)),
+            sorted([self.author.pk, self.other.pk])
+        )
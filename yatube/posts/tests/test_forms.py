@@ -1,41 +1,40 @@
-import tempfile
-import shutil
+import os
 
 from django.contrib.auth import get_user_model
 from django.test import TestCase, Client, override_settings
 from django.urls import reverse
+from core.testing import IsolatedCacheMixin
 from ..models import Post, Group, Comment
 from django.conf import settings
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.core.cache import cache
 
 User = get_user_model()
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_MEDIA_ROOT = os.path.join(settings.MEDIA_ROOT, 'forms')
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
-class PostFormTests(TestCase):
+class PostFormTests(IsolatedCacheMixin, TestCase):
 
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.group = Group.objects.create(
             title='Тестовая группа',
             slug='test-slug',
             description='Тестовое описание'
         )
+        cls.user = User.objects.create_user(username='HasNoName')
 
     def setUp(self):
-        self.user = User.objects.create_user(username='HasNoName')
+        super().setUp()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.user)
-        cache.clear()
 
     @classmethod
     def tearDownClass(cls):
+        default_storage.clear()
         super().tearDownClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def test_create_post(self):
         """Валидная форма создает запись в Post."""
@@ -0,0 +1,70 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from .. import group_stats
+from ..models import Group, GroupStats, Post
+
+User = get_user_model()
+
+
+class GroupStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.other = User.objects.create_user(username='Other')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        cls.group2 = Group.objects.create(title='Группа 2', slug='test-slug2')
+
+    def setUp(self):
+        self.client = Client()
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_counters_follow_posts(self):
+        """Счетчики меняются при создании и удалении постов."""
+        first = Post.objects.create(
+            author=self.user, text='Пост 1', group=self.group
+        )
+        Post.objects.create(author=self.user, text='Пост 2', group=self.group)
+        last = Post.objects.create(
+            author=self.other, text='Пост 3', group=self.group
+        )
+        stats = self.stats(self.group)
+        self.assertEqual((stats.post_count, stats.author_count), (3, 2))
+        self.assertEqual(stats.last_post_date, last.pub_date)
+        last.delete()
+        first.delete()
+        stats = self.stats(self.group)
+        self.assertEqual((stats.post_count, stats.author_count), (1, 1))
+        self.assertLess(stats.last_post_date, last.pub_date)
+
+    def test_group_reassignment(self):
+        """Перенос поста в другую группу обновляет обе группы."""
+        post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group
+        )
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.group2
+        post.save()
+        self.assertEqual(self.stats(self.group).post_count, 0)
+        self.assertIsNone(self.stats(self.group).last_post_date)
+        self.assertEqual(self.stats(self.group2).post_count, 1)
+
+    def test_rebuild_matches_incremental(self):
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        Post.objects.create(author=self.other, text='Пост', group=self.group)
+        expected = list(GroupStats.objects.order_by('pk').values())
+        self.assertEqual(group_stats.rebuild(), 2)
+        self.assertEqual(
+            list(GroupStats.objects.order_by('pk').values()), expected
+        )
+
+    def test_directory_page(self):
+        """Каталог групп показывает счетчики без агрегации постов."""
+        Post.objects.create(author=self.user, text='Пост', group=self.group)
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('posts:groups'))
+        self.assertEqual(response.context['page_obj'][0], self.group)
+        self.assertContains(response, 'Постов: 1')
@@ -0,0 +1,207 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .. import live
+from ..models import Comment, Post
+
+User = get_user_model()
+
+# Открытые страницы в проверке на нагрузку
+IDLE_CONNECTIONS = 2000
+WAITING_THREADS = 200
+
+
+def run_on_commit(func, using=None):
+    func()
+
+
+class BrokerTests(TestCase):
+    def setUp(self):
+        self.broker = live.Broker(history=3, queue_size=5)
+
+    def test_publish_reaches_channel_subscribers(self):
+        """Событие получают только подписчики его канала."""
+        feed = self.broker.subscribe([live.FEED])
+        comments = self.broker.subscribe([live.comments_channel(1)])
+        event = self.broker.publish(live.FEED, 'post', '<p>Пост</p>')
+        self.assertEqual(feed.get(0), [event])
+        self.assertEqual(comments.get(0), [])
+        self.broker.unsubscribe(feed)
+        self.broker.unsubscribe(comments)
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+    def test_replay_after_last_event_id(self):
+        """Переподключение с Last-Event-ID возвращает пропущенное."""
+        first, second, third = (
+            self.broker.publish(live.FEED, 'post', str(number))
+            for number in range(3)
+        )
+        subscription = self.broker.subscribe([live.FEED], first.id)
+        self.assertEqual(subscription.get(0), [second, third])
+
+    def test_slow_subscriber_drops_oldest(self):
+        """Очередь медленного клиента ограничена и не тормозит публикацию."""
+        subscription = self.broker.subscribe([live.FEED])
+        events = [
+            self.broker.publish(live.FEED, 'post', str(number))
+            for number in range(8)
+        ]
+        self.assertEqual(subscription.get(0), events[-5:])
+
+    def test_format_event(self):
+        event = live.Event(7, 'post', '<p>\nПост</p>')
+        self.assertEqual(
+            live.format_event(event),
+            'id: 7\nevent: post\ndata: <p>\ndata: Пост</p>\n\n'
+        )
+
+    def test_thousands_of_idle_connections(self):
+        """Одна публикация доходит до тысяч открытых страниц."""
+        idle = [
+            self.broker.subscribe([live.FEED])
+            for _ in range(IDLE_CONNECTIONS)
+        ]
+        received = []
+        ready = threading.Barrier(WAITING_THREADS + 1)
+
+        def wait():
+            subscription = self.broker.subscribe([live.FEED])
+            ready.wait()
+            received.append(subscription.get(10))
+            self.broker.unsubscribe(subscription)
+
+        threads = [
+            threading.Thread(target=wait) for _ in range(WAITING_THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        ready.wait()
+        started = time.monotonic()
+        event = self.broker.publish(live.FEED, 'post', '<p>Пост</p>')
+        publish_time = time.monotonic() - started
+        for thread in threads:
+            thread.join(10)
+        self.assertLess(publish_time, 1)
+        self.assertEqual(received, [[event]] * WAITING_THREADS)
+        self.assertTrue(all(
+            subscription.get(0) == [event] for subscription in idle
+        ))
+        for subscription in idle:
+            self.broker.unsubscribe(subscription)
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+    def test_concurrent_publishers(self):
+        """События параллельных публикаций не теряются и не повторяются."""
+        broker = live.Broker(queue_size=1000)
+        subscription = broker.subscribe([live.FEED])
+
+        def publish(number):
+            for event_number in range(100):
+                broker.publish(live.FEED, 'post', f'{number}-{event_number}')
+
+        threads = [
+            threading.Thread(target=publish, args=(number,))
+            for number in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        events = subscription.get(0)
+        self.assertEqual(len(events), 800)
+        self.assertEqual(len({event.id for event in events}), 800)
+
+
+@override_settings(
+    LIVE_UPDATES_ENABLED=True, LIVE_STREAM_DURATION=0.2, LIVE_KEEPALIVE=0.1
+)
+class LiveStreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Старый пост')
+
+    def setUp(self):
+        self.broker = live.Broker()
+        patcher = mock.patch.object(live, '_broker', self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read(self, url, **headers):
+        response = self.client.get(url, **headers)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+        content = b''.join(response.streaming_content).decode()
+        response.close()
+        return content
+
+    def test_new_post_streamed_to_feed(self):
+        """Новый пост приходит в поток ленты готовым фрагментом."""
+        with mock.patch('django.db.transaction.on_commit', run_on_commit):
+            Post.objects.create(author=self.author, text='Свежий пост')
+        content = self.read(reverse('posts:live_feed'), HTTP_LAST_EVENT_ID='0')
+        self.assertTrue(content.startswith('retry: '))
+        self.assertIn('event: post', content)
+        self.assertIn('Свежий пост', content)
+        self.assertIn(': keepalive', content)
+        self.assertEqual(self.broker.subscriber_count(), 0)
+
+    def test_new_comment_streamed_to_post(self):
+        """Новый комментарий приходит только в поток своего поста."""
+        with mock.patch('django.db.transaction.on_commit', run_on_commit):
+            Comment.objects.create(
+                post=self.post, author=self.author, text='Комментарий'
+            )
+        url = reverse('posts:live_comments', args=(self.post.pk,))
+        content = self.read(url, HTTP_LAST_EVENT_ID='0')
+        self.assertIn('event: comment', content)
+        self.assertIn('Комментарий', content)
+        content = self.read(
+            reverse('posts:live_feed'), HTTP_LAST_EVENT_ID='0'
+        )
+        self.assertNotIn('Комментарий', content)
+
+    def test_pages_subscribe_when_enabled(self):
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        ):
+            with self.subTest(url=url):
+                self.assertContains(self.client.get(url), 'data-live-url')
+
+
+class LiveDisabledTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Пост')
+
+    def test_disabled_by_default(self):
+        """Выключенные обновления не держат соединений и не подключаются."""
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:post_detail', args=(self.post.pk,)),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertNotContains(response, 'data-live-url')
+                self.assertNotContains(response, 'live.js')
+        for url in (
+            reverse('posts:live_feed'),
+            reverse('posts:live_comments', args=(self.post.pk,)),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 204)
+
+    @override_settings(
+        LIVE_UPDATES_ENABLED=True, FEED_TEMPLATE_ENGINE='jinja2'
+    )
+    def test_jinja_feed_subscribes(self):
+        self.assertContains(
+            self.client.get(reverse('posts:index')), 'data-live-url'
+        )
@@ -0,0 +1,181 @@
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+from .. import archive, group_stats, moderation
+from ..models import Comment, Group, GroupStats, MonthArchive, Post
+
+User = get_user_model()
+
+
+class ModerationJobsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.spammer = User.objects.create_user(username='spammer')
+        cls.author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.target = Group.objects.create(title='Другая', slug='other')
+        for number in range(7):
+            post = Post.objects.create(
+                author=cls.spammer, group=cls.group, text=f'Спам {number}'
+            )
+            Comment.objects.create(
+                post=post, author=cls.author, text='Комментарий'
+            )
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Обычный пост'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def snapshot(self):
+        stats = list(GroupStats.objects.order_by('group_id').values_list(
+            'group_id', 'post_count', 'author_count', 'last_post_date'
+        ))
+        cells = list(MonthArchive.objects.order_by(
+            'scope', 'scope_id', 'year', 'month'
+        ).values_list(
+            'scope', 'scope_id', 'year', 'month', 'post_count',
+            'first_id', 'last_id'
+        ))
+        return stats, cells
+
+    def assert_aggregates_consistent(self):
+        """Счетчики после задачи совпадают с полным пересчетом."""
+        current = self.snapshot()
+        group_stats.rebuild()
+        archive.rebuild()
+        self.assertEqual(current, self.snapshot())
+
+    def run_action(self, action, **data):
+        spam = Post.objects.filter(author=self.spammer)
+        return self.client.post(
+            reverse('admin:posts_post_changelist'),
+            dict(
+                data,
+                action=action,
+                _selected_action=list(spam.values_list('pk', flat=True))
+            ),
+            follow=True
+        )
+
+    def test_delete_action_only_enqueues(self):
+        """Действие админки ставит задачу, а не удаляет посты."""
+        response = self.run_action('delete_in_background')
+        self.assertContains(response, 'поставлена в очередь, постов: 7')
+        self.assertEqual(Post.objects.count(), 8)
+        job = Job.objects.get()
+        self.assertEqual(
+            (job.name, job.status, job.total, job.created_by),
+            (moderation.DELETE_POSTS, Job.PENDING, 7, self.admin)
+        )
+
+    def test_select_all_staged_outside_params(self):
+        """«Выбрать все» не переносит id в params задачи."""
+        response = self.client.post(
+            reverse('admin:posts_post_changelist') + '?q=Спам',
+            {
+                'action': 'delete_in_background',
+                'select_across': '1',
+                'index': '0',
+                '_selected_action': [self.post.pk],
+            },
+            follow=True
+        )
+        self.assertContains(response, 'поставлена в очередь, постов: 7')
+        job = Job.objects.get()
+        self.assertEqual(json.loads(job.params), {})
+        self.assertEqual(
+            set(job.items.values_list('object_id', flat=True)),
+            set(Post.objects.filter(
+                author=self.spammer
+            ).values_list('pk', flat=True))
+        )
+        jobs.run(jobs.claim(), chunk_size=3)
+        self.assertEqual(list(Post.objects.all()), [self.post])
+        self.assertFalse(job.items.exists())
+
+    def test_synchronous_delete_removed(self):
+        response = self.client.get(reverse('admin:posts_post_changelist'))
+        self.assertNotContains(response, 'value="delete_selected"')
+
+    def test_runner_deletes_in_chunks(self):
+        """Команда удаляет посты с комментариями порциями."""
+        self.run_action('delete_in_background')
+        out = StringIO()
+        call_command('run_jobs', chunk=3, stdout=out)
+        self.assertIn('обработано 3 из 7', out.getvalue())
+        self.assertIn('обработано 7 из 7', out.getvalue())
+        self.assertEqual(list(Post.objects.all()), [self.post])
+        self.assertEqual(Comment.objects.count(), 0)
+        job = Job.objects.get()
+        self.assertEqual((job.status, job.progress), (Job.DONE, 100))
+        self.assert_aggregates_consistent()
+
+    def test_delete_by_author(self):
+        self.run_action('delete_by_author')
+        jobs.run(jobs.claim(), chunk_size=4)
+        self.assertEqual(list(Post.objects.all()), [self.post])
+        self.assert_aggregates_consistent()
+
+    def test_move_to_group(self):
+        """Перенос пересчитывает счетчики обеих групп."""
+        self.run_action('move_to_group', group=self.target.pk)
+        jobs.run(jobs.claim(), chunk_size=3)
+        self.assertEqual(self.target.posts.count(), 7)
+        self.assertEqual(self.group.posts.get(), self.post)
+        self.assert_aggregates_consistent()
+
+    def test_move_requires_group(self):
+        response = self.run_action('move_to_group')
+        self.assertContains(response, 'Выберите группу для переноса')
+        self.assertFalse(Job.objects.exists())
+
+    def test_resume_after_failure(self):
+        """Упавшая задача продолжается с первой незавершенной порции."""
+        self.run_action('delete_in_background')
+        calls = []
+        original = jobs.job_type(moderation.DELETE_POSTS)
+
+        def crash_on_second_chunk(posts, params):
+            calls.append(len(posts))
+            if len(calls) == 2:
+                raise RuntimeError('обработчик упал')
+            original.process(posts, params)
+
+        with mock.patch.dict(jobs._registry, {
+            moderation.DELETE_POSTS:
+                original._replace(process=crash_on_second_chunk)
+        }), self.assertLogs('core.jobs', 'ERROR'):
+            job = jobs.run(jobs.claim(), chunk_size=3)
+        self.assertEqual((job.status, job.processed), (Job.FAILED, 3))
+        self.assertIn('обработчик упал', job.error)
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(jobs.resume(Job.objects.all()), 1)
+        job = jobs.run(jobs.claim(), chunk_size=3)
+        self.assertEqual((job.status, job.processed), (Job.DONE, 7))
+        self.assertEqual(list(Post.objects.all()), [self.post])
+        self.assert_aggregates_consistent()
+
+    def test_stale_running_job_claimed(self):
+        """Задачу упавшего обработчика подхватывает следующий."""
+        self.run_action('delete_in_background')
+        job = jobs.claim()
+        self.assertIsNone(jobs.claim())
+        Job.objects.filter(pk=job.pk).update(
+            heartbeat=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(jobs.claim(), job)
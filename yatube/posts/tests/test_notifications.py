@@ -0,0 +1,165 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import jobs
+from core.models import Job
+from core.testing import IsolatedCacheMixin
+from .. import notifications
+from ..models import Follow, Notification, NotificationCounter, Post
+
+User = get_user_model()
+
+
+class NotificationsTests(IsolatedCacheMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.followers = [
+            User.objects.create_user(
+                username=f'reader{number}',
+                email=f'reader{number}@example.com'
+            )
+            for number in range(3)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=user, author=cls.author) for user in cls.followers
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.reader = self.followers[0]
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def publish(self, count=1, text='Пост'):
+        for number in range(count):
+            Post.objects.create(author=self.author, text=f'{text} {number}')
+
+    def test_fan_out_queries_do_not_grow(self):
+        """Раскладка поста не делает запросов на каждого подписчика."""
+        self.publish()
+        with CaptureQueriesContext(connection) as few:
+            self.publish()
+        more = [
+            User.objects.create_user(username=f'extra{number}')
+            for number in range(20)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=user, author=self.author) for user in more
+        )
+        with CaptureQueriesContext(connection) as many:
+            self.publish()
+        self.assertEqual(len(few), len(many))
+        self.assertEqual(
+            Notification.objects.filter(user=self.reader).count(), 3
+        )
+        self.assertEqual(Notification.objects.filter(user=more[0]).count(), 1)
+
+    def test_large_audience_fanned_out_in_background(self):
+        """Подписчикам популярного автора раскладывает фоновая задача."""
+        with self.settings(NOTIFICATION_SYNC_FOLLOWERS=2):
+            self.publish(2)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(
+            list(Job.objects.values_list('total', flat=True)),
+            [len(self.followers)] * 2
+        )
+        job = jobs.claim()
+        while job is not None:
+            jobs.run(job, chunk_size=2)
+            job = jobs.claim()
+        for user in self.followers:
+            with self.subTest(user=user):
+                self.assertEqual(notifications.unread_count(user), 2)
+                self.assertEqual(user.notifications.count(), 2)
+
+    def test_repeated_fan_out_not_duplicated(self):
+        """Повторная раскладка тех же постов не дублирует уведомления."""
+        self.publish()
+        post = Post.objects.get()
+        notifications.fan_out(post)
+        self.assertEqual(
+            Notification.objects.count(), len(self.followers)
+        )
+
+    def test_unread_count_cached(self):
+        """Счетчик читается из кэша и сбрасывается новым постом."""
+        self.publish(2)
+        self.assertEqual(notifications.unread_count(self.reader), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(notifications.unread_count(self.reader), 2)
+        self.publish()
+        self.assertEqual(notifications.unread_count(self.reader), 3)
+
+    def test_follow_index_marks_read(self):
+        """Лента подписок отмечает уведомления прочитанными."""
+        self.publish(2)
+        response = self.reader_client.get(reverse('posts:index'))
+        self.assertContains(response, '<span class="badge bg-danger">2')
+        self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(notifications.unread_count(self.reader), 0)
+        self.assertEqual(
+            NotificationCounter.objects.get(user=self.reader).unread, 0
+        )
+        response = self.reader_client.get(reverse('posts:index'))
+        self.assertNotContains(response, 'badge bg-danger')
+
+    def test_digest_batch_uses_constant_queries(self):
+        """Пачка писем собирается одним запросом уведомлений."""
+        self.publish(2)
+        with CaptureQueriesContext(connection) as small:
+            after, sent = notifications.send_digests_batch(batch_size=1)
+        self.assertEqual((after, sent), (self.followers[0].pk, 1))
+        with CaptureQueriesContext(connection) as large:
+            notifications.send_digests_batch(after, batch_size=10)
+        self.assertEqual(len(small), len(large))
+        self.assertEqual(len(mail.outbox), len(self.followers))
+        self.assertIn('Пост 1', mail.outbox[0].body)
+        self.assertEqual(mail.outbox[0].to, [self.followers[0].email])
+
+    def test_digest_skips_read_and_recent(self):
+        """Прочитанное не рассылается, повторная рассылка ждет интервал."""
+        self.publish(text='Первый')
+        self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(notifications.send_digests(), 2)
+        self.publish(text='Второй')
+        self.assertEqual(notifications.send_digests(), 1)
+        self.assertEqual(mail.outbox[-1].to, [self.reader.email])
+        self.assertNotIn('Первый', mail.outbox[-1].body)
+        with self.settings(NOTIFICATION_DIGEST_INTERVAL=0):
+            self.assertEqual(notifications.send_digests(), 2)
+        self.assertNotIn('Первый', mail.outbox[-1].body)
+        self.assertIn('Второй', mail.outbox[-1].body)
+
+    def test_digest_limit(self):
+        """Письмо показывает не больше NOTIFICATION_DIGEST_LIMIT постов."""
+        with self.settings(NOTIFICATION_DIGEST_LIMIT=2):
+            self.publish(5)
+            notifications.send_digests()
+        self.assertIn('И еще постов: 3.', mail.outbox[0].body)
+
+    def test_digest_reads_limit_per_user(self):
+        """Каждому подписчику читается не больше лимита уведомлений."""
+        self.publish(2, text='Старый')
+        self.reader_client.get(reverse('posts:follow_index'))
+        self.publish(5, text='Новый')
+        latest = notifications._latest(
+            Notification.objects.filter(notifications._new_for_user()), 2
+        )
+        self.assertEqual(len(latest), 2 * len(self.followers))
+        self.assertTrue(all(
+            item.post.text.startswith('Новый') for item in latest
+        ))
+
+    def test_command(self):
+        self.publish()
+        out = StringIO()
+        call_command('send_digests', stdout=out)
+        self.assertIn('Писем в очереди: 3', out.getvalue())
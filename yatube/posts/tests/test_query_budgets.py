@@ -0,0 +1,133 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from core.query_budget import (
+    QueryBudget, QueryBudgetExceeded, budget_for, check_budget
+)
+from core.testing import IsolatedCacheMixin
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+NAMESPACES = ('posts', 'users', 'about')
+# Сколько постов у каждого автора при очередном замере
+DATA_SIZES = (1, 5, 25)
+# Формы, которые проверяются еще и отправкой
+FORM_DATA = {
+    'posts:post_create': {'text': 'Новый пост #тег @reader'},
+    'posts:post_edit': {'text': 'Исправленный пост #тег'},
+    'posts:add_comment': {'text': 'Новый комментарий'},
+}
+
+
+def url_names():
+    """Имена всех URL из posts/urls.py, users/urls.py и about/urls.py."""
+    resolver = get_resolver()
+    for namespace in NAMESPACES:
+        _, app_resolver = resolver.namespace_dict[namespace]
+        for pattern in app_resolver.url_patterns:
+            yield f'{namespace}:{pattern.name}', pattern.pattern.converters
+
+
+class QueryBudgetTests(IsolatedCacheMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.author, author=cls.reader)
+
+    def setUp(self):
+        super().setUp()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def populate(self, size):
+        """Дописывает посты, комментарии и упоминания до size на автора."""
+        for user in (self.author, self.reader):
+            for number in range(user.posts.count(), size):
+                post = Post.objects.create(
+                    author=user,
+                    group=self.group,
+                    text=f'Пост {number} #тег @reader @author'
+                )
+                Comment.objects.create(
+                    post=post, author=self.reader, text='Комментарий'
+                )
+
+    def url_kwargs(self):
+        post = self.author.posts.first()
+        local = timezone.localtime(post.pub_date)
+        return {
+            'slug': self.group.slug,
+            'username': self.reader.username,
+            'post_id': post.pk,
+            'year': local.year,
+            'month': local.month,
+            'tag': 'тег',
+            'uidb64': urlsafe_base64_encode(force_bytes(self.author.pk)),
+            'token': default_token_generator.make_token(self.author),
+        }
+
+    def check_page(self, name, url, size):
+        """Страница укладывается в бюджет для гостя и для автора."""
+        budget = budget_for(name)
+        self.assertIsNotNone(budget, f'Нет бюджета запросов для {name}')
+        self.authorized_client.force_login(self.author)
+        requests = [
+            (self.guest_client.get, {}),
+            (self.authorized_client.get, {}),
+        ]
+        if name in FORM_DATA:
+            data = dict(FORM_DATA[name], group=self.group.pk)
+            requests.append((self.authorized_client.post, data))
+        for send, data in requests:
+            cache.clear()
+            label = f'{name} при {size} постах на автора'
+            with QueryBudget(*budget, label=label):
+                if data:
+                    send(url, data)
+                else:
+                    send(url)
+
+    def test_budgets_hold_for_all_data_sizes(self):
+        """Число запросов страниц не растет вместе с данными."""
+        for size in DATA_SIZES:
+            self.populate(size)
+            values = self.url_kwargs()
+            for name, converters in url_names():
+                url = reverse(name, kwargs={
+                    key: values[key] for key in converters
+                })
+                with self.subTest(name=name, size=size):
+                    self.check_page(name, url, size)
+
+    def test_report_lists_queries(self):
+        """Превышение бюджета показывает SQL и повторы."""
+        with self.assertRaises(QueryBudgetExceeded) as error:
+            with QueryBudget(1, max_duplicates=0):
+                User.objects.get(pk=self.author.pk)
+                User.objects.get(pk=self.reader.pk)
+        message = str(error.exception)
+        self.assertIn('запросов 2, бюджет 1', message)
+        self.assertIn('повторов 1, бюджет 0', message)
+        self.assertIn('FROM "auth_user"', message)
+
+    def test_middleware_checks_budget(self):
+        """С QUERY_BUDGETS_ENFORCED страница сверяется с бюджетом."""
+        self.populate(1)
+        budgets = dict(settings.QUERY_BUDGETS, **{'posts:index': (1, 0)})
+        with override_settings(
+            QUERY_BUDGETS=budgets, QUERY_BUDGETS_ENFORCED=True
+        ):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.guest_client.get(reverse('posts:index'))
+        self.assertIsNone(check_budget(['SELECT 1'], 1))
@@ -0,0 +1,71 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from core.testing import IsolatedCacheMixin
+from .. import recommendations
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class RecommendationsTests(IsolatedCacheMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.friend = User.objects.create_user(username='Friend')
+        cls.friend_of_friend = User.objects.create_user(username='FoF')
+        cls.group_author = User.objects.create_user(username='GroupAuthor')
+        cls.group = Group.objects.create(title='Группа', slug='test-slug')
+        Follow.objects.create(user=cls.user, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.friend_of_friend)
+        Post.objects.create(author=cls.user, text='Пост', group=cls.group)
+        Post.objects.create(
+            author=cls.group_author, text='Пост', group=cls.group
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_scores(self):
+        """Друзья друзей оцениваются выше близости по группам."""
+        matrix = recommendations.FollowMatrix()
+        self.assertEqual(
+            matrix.recommend(self.user.pk),
+            [self.friend_of_friend.pk, self.group_author.pk]
+        )
+
+    def test_sidebar_served_from_cache(self):
+        """Боковая панель показывает пересчитанные рекомендации."""
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['recommended'], [])
+        recommendations.recompute()
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            [author['username'] for author in response.context['recommended']],
+            ['FoF', 'GroupAuthor']
+        )
+        self.assertContains(response, 'На кого подписаться')
+
+    def test_popular_author_readers_sampled_once(self):
+        """Читатели популярного автора выбираются случайно и одинаково."""
+        User.objects.bulk_create(
+            User(username=f'reader{number}')
+            for number in range(recommendations.CO_FOLLOW_SAMPLE + 10)
+        )
+        readers = User.objects.filter(username__startswith='reader')
+        Follow.objects.bulk_create(
+            Follow(user=reader, author=self.friend) for reader in readers
+        )
+        first = recommendations.FollowMatrix()
+        sample = first.reader_samples[self.friend.pk]
+        self.assertEqual(len(sample), recommendations.CO_FOLLOW_SAMPLE)
+        self.assertNotEqual(
+            sorted(sample),
+            sorted(first.followers[self.friend.pk])[:len(sample)]
+        )
+        self.assertEqual(
+            recommendations.FollowMatrix().reader_samples, first.reader_samples
+        )
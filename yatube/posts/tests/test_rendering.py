@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+from io import StringIO
+
+from core.testing import IsolatedCacheMixin
+from ..models import Post
+from ..rendering import RENDER_VERSION
+
+User = get_user_model()
+
+
+class RenderingTests(IsolatedCacheMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='<b>Жирный</b> текст со ссылкой https://example.com '
+                 'и продолжением строки'
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+
+    def test_rendered_on_save(self):
+        """HTML и анонс готовятся при сохранении."""
+        post = Post.objects.get(pk=self.post.pk)
+        self.assertEqual(post.render_version, RENDER_VERSION)
+        self.assertIn('&lt;b&gt;', post.text_html)
+        self.assertIn('<a href="https://example.com"', post.text_html)
+        self.assertEqual(len(post.excerpt), 30)
+
+    def test_feed_uses_stored_html(self):
+        """Лента выводит сохраненный HTML."""
+        Post.objects.filter(pk=self.post.pk).update(text_html='<p>Готово</p>')
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, '<p>Готово</p>')
+
+    def test_rerender_command(self):
+        """Команда обрабатывает посты без актуальной версии."""
+        Post.objects.bulk_create([Post(author=self.user, text='Текст')])
+        call_command('rerender_posts', stdout=StringIO())
+        self.assertFalse(
+            Post.objects.exclude(render_version=RENDER_VERSION).exists()
+        )
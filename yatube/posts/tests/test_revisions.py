@@ -0,0 +1,116 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from .. import cold_storage, revisions
+from ..models import ArchivedPostRevision, Post, PostRevision
+
+User = get_user_model()
+
+TEXT = (
+    'Утром вышли к озеру, туман еще лежал над водой, '
+    'а рыбаки уже сидели на мостках и молча ждали клева. '
+) * 20
+
+
+@override_settings(REVISION_SNAPSHOT_EVERY=4)
+class RevisionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+
+    def setUp(self):
+        self.post = Post.objects.create(author=self.author, text=TEXT)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def edit(self, count):
+        """Правит пост count раз, возвращает тексты всех версий."""
+        texts = [self.post.text]
+        for number in range(count):
+            self.post.text = texts[-1].replace(
+                'туман', f'туман {number}', 1
+            ) + f' Дополнение {number}.'
+            self.post.save()
+            texts.append(self.post.text)
+        return texts
+
+    def test_diff_roundtrip(self):
+        old = 'Один два  три\nчетыре'
+        new = 'Один три\nчетыре пять'
+        self.assertEqual(revisions.patch(old, revisions.diff(old, new)), new)
+
+    def test_first_edit_keeps_original(self):
+        """Первая правка сохраняет исходную версию и новую."""
+        self.post.save()
+        self.assertFalse(PostRevision.objects.exists())
+        self.edit(1)
+        self.assertEqual(
+            list(PostRevision.objects.values_list('number', 'is_snapshot')),
+            [(1, True), (2, False)]
+        )
+
+    def test_every_version_restored(self):
+        """Любая версия собирается из ближайшего снимка и разниц."""
+        texts = self.edit(9)
+        self.assertEqual(
+            list(PostRevision.objects.filter(
+                is_snapshot=True
+            ).values_list('number', flat=True)),
+            [1, 5, 9]
+        )
+        for number, text in enumerate(texts, 1):
+            with self.subTest(number=number):
+                revision, restored = revisions.version(self.post, number)
+                self.assertEqual(revision.number, number)
+                self.assertEqual(restored, text)
+        self.assertIsNone(revisions.version(self.post, len(texts) + 1))
+
+    def test_version_is_one_query(self):
+        self.edit(7)
+        with self.assertNumQueries(1):
+            revisions.version(self.post, 8)
+
+    @override_settings(REVISION_SNAPSHOT_EVERY=50)
+    def test_small_edits_stored_compactly(self):
+        """Мелкие правки занимают долю от полных копий текста."""
+        texts = self.edit(30)
+        stored = sum(
+            len(data) for data in
+            PostRevision.objects.values_list('data', flat=True)
+        )
+        full = sum(len(text.encode()) for text in texts)
+        self.assertLess(stored, full / 20)
+
+    def test_history_view(self):
+        texts = self.edit(2)
+        url = reverse('posts:post_history', args=(self.post.pk,))
+        response = self.author_client.get(url, {'version': 2})
+        self.assertEqual(response.context['selected'][1], texts[1])
+        self.assertEqual(len(response.context['page_obj']), 3)
+        for version in ('4', 'x'):
+            with self.subTest(version=version):
+                self.assertEqual(
+                    self.client.get(url, {'version': version}).status_code,
+                    404
+                )
+
+    def test_draft_history_hidden(self):
+        """Историю черновика видит только автор."""
+        self.post.is_published = False
+        self.post.save()
+        url = reverse('posts:post_history', args=(self.post.pk,))
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.assertEqual(self.author_client.get(url).status_code, 200)
+
+    def test_history_moved_to_archive(self):
+        """Перенос в холодное хранилище сохраняет историю правок."""
+        texts = self.edit(5)
+        cold_storage.move_chunk([self.post.pk])
+        self.assertFalse(PostRevision.objects.exists())
+        self.assertEqual(ArchivedPostRevision.objects.count(), len(texts))
+        url = reverse('posts:post_history', args=(self.post.pk,))
+        response = self.client.get(url, {'version': 4})
+        self.assertEqual(response.context['selected'][1], texts[3])
+        self.assertEqual(len(response.context['page_obj']), len(texts))
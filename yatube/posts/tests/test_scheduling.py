@@ -0,0 +1,185 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.testing import IsolatedCacheMixin
+from .. import scheduling
+from ..models import (
+    Follow, Group, GroupStats, MonthArchive, Notification, Post, PostScore
+)
+
+User = get_user_model()
+
+
+class SchedulingTests(IsolatedCacheMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        super().setUp()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def schedule(self, count, minutes=-1, **kwargs):
+        return [
+            Post.objects.create(
+                author=self.author,
+                group=self.group,
+                text=f'Запланированный пост {number}',
+                is_published=False,
+                publish_at=timezone.now() + timedelta(minutes=minutes),
+                **kwargs
+            )
+            for number in range(count)
+        ]
+
+    def test_draft_hidden_from_feeds(self):
+        """Черновик виден только автору и только в черновиках."""
+        response = self.author_client.post(
+            reverse('posts:post_create'),
+            {'text': 'Тайный пост', 'group': self.group.pk, 'draft': '1'}
+        )
+        self.assertRedirects(response, reverse('posts:drafts'))
+        post = Post.objects.get()
+        self.assertFalse(post.is_published)
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.author.username,)),
+            reverse('posts:follow_index'),
+        ):
+            with self.subTest(url=url):
+                self.assertNotContains(
+                    self.reader_client.get(url), 'Тайный пост'
+                )
+        self.assertEqual(self.group.stats.post_count, 0)
+        self.assertFalse(Notification.objects.exists())
+        self.assertContains(
+            self.author_client.get(reverse('posts:drafts')), 'Тайный пост'
+        )
+        detail = reverse('posts:post_detail', args=(post.pk,))
+        self.assertEqual(self.reader_client.get(detail).status_code, 404)
+        self.assertEqual(self.author_client.get(detail).status_code, 200)
+
+    def test_create_scheduled(self):
+        publish_at = timezone.localtime() + timedelta(days=1)
+        self.author_client.post(reverse('posts:post_create'), {
+            'text': 'Завтра',
+            'publication-publish_at': publish_at.strftime('%Y-%m-%dT%H:%M'),
+        })
+        post = Post.objects.get()
+        self.assertFalse(post.is_published)
+        self.assertEqual(
+            post.publish_at, publish_at.replace(second=0, microsecond=0)
+        )
+        self.assertEqual(scheduling.publish_due(10), 0)
+
+    def test_past_time_rejected(self):
+        response = self.author_client.post(reverse('posts:post_create'), {
+            'text': 'Вчера',
+            'publication-publish_at': '2020-01-01T10:00',
+        })
+        self.assertFormError(
+            response, 'publication', 'publish_at',
+            'Время публикации уже прошло.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_publish_due_updates_aggregates(self):
+        """Планировщик публикует посты и обновляет зависящие данные."""
+        posts = self.schedule(3)
+        self.schedule(1, minutes=60)
+        self.assertEqual(scheduling.publish_due(10), 3)
+        self.assertEqual(Post.objects.published().count(), 3)
+        post = Post.objects.get(pk=posts[0].pk)
+        self.assertEqual(post.pub_date, posts[0].publish_at)
+        self.assertIsNone(post.publish_at)
+        stats = GroupStats.objects.get(group=self.group)
+        self.assertEqual((stats.post_count, stats.author_count), (3, 1))
+        self.assertEqual(
+            MonthArchive.objects.get(
+                scope=MonthArchive.GROUP, scope_id=self.group.pk
+            ).post_count,
+            3
+        )
+        self.assertEqual(PostScore.objects.count(), 3)
+        self.assertEqual(
+            Notification.objects.filter(user=self.reader).count(), 3
+        )
+        self.assertEqual(self.reader.notification_counter.unread, 3)
+        self.assertContains(
+            self.reader_client.get(reverse('posts:index')),
+            'Запланированный пост 0'
+        )
+
+    def test_batch_queries_do_not_grow(self):
+        """Число запросов на пачку не зависит от числа постов в ней."""
+        self.schedule(1)
+        scheduling.publish_due(10)
+        self.schedule(2)
+        with CaptureQueriesContext(connection) as small:
+            scheduling.publish_due(10)
+        self.schedule(8)
+        with CaptureQueriesContext(connection) as large:
+            scheduling.publish_due(10)
+        self.assertEqual(len(large), len(small))
+
+    def test_publish_draft_from_edit(self):
+        """Кнопка «Опубликовать» на правке черновика публикует его."""
+        draft = Post.objects.create(
+            author=self.author, text='Черновик', is_published=False
+        )
+        self.author_client.post(
+            reverse('posts:post_edit', args=(draft.pk,)), {'text': 'Готово'}
+        )
+        draft.refresh_from_db()
+        self.assertTrue(draft.is_published)
+        self.assertEqual(draft.text, 'Готово')
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_draft_closed_to_others(self):
+        """Чужой черновик нельзя ни открыть на правку, ни опубликовать."""
+        draft = Post.objects.create(
+            author=self.author, text='Тайный пост', is_published=False
+        )
+        url = reverse('posts:post_edit', args=(draft.pk,))
+        detail = reverse('posts:post_detail', args=(draft.pk,))
+        response = self.reader_client.get(url)
+        self.assertRedirects(response, detail, target_status_code=404)
+        response = self.reader_client.post(url, {'text': 'Чужая правка'})
+        self.assertRedirects(response, detail, target_status_code=404)
+        draft.refresh_from_db()
+        self.assertEqual(draft.text, 'Тайный пост')
+        self.assertFalse(draft.is_published)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_feed_uses_index(self):
+        """Лента выбирает опубликованные посты по индексу."""
+        feed_index, due_index = [
+            index.name for index in Post._meta.indexes
+            if index.fields[0] == 'is_published'
+        ]
+        self.assertIn(feed_index, Post.objects.published()[:10].explain())
+        self.assertIn(
+            due_index, scheduling.due().order_by('publish_at').explain()
+        )
+
+    def test_command(self):
+        self.schedule(3)
+        out = StringIO()
+        call_command('publish_scheduled', batch=2, stdout=out)
+        self.assertIn('Опубликовано постов: 2', out.getvalue())
+        self.assertEqual(scheduling.due().count(), 1)
@@ -0,0 +1,105 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from core.testing import IsolatedCacheMixin
+from .. import tagging
+from ..utils import bounded_map
+from ..models import Mention, Post, PostTag
+
+User = get_user_model()
+
+
+class TaggingTests(IsolatedCacheMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Пост про #Django и #python для @reader. '
+                 'Ссылка https://example.com/#anchor и mail@example.com'
+        )
+
+    def setUp(self):
+        super().setUp()
+        self.client = Client()
+
+    def test_extract(self):
+        self.assertEqual(
+            tagging.extract(self.post.text),
+            ({'django', 'python'}, {'reader'})
+        )
+
+    def test_index_on_save(self):
+        """Хештеги и упоминания индексируются при сохранении поста."""
+        self.assertEqual(
+            set(PostTag.objects.values_list('tag__name', flat=True)),
+            {'django', 'python'}
+        )
+        self.assertEqual(Mention.objects.get().user, self.reader)
+        self.post.text = 'Только #python'
+        self.post.save()
+        self.assertEqual(
+            list(PostTag.objects.values_list('tag__name', flat=True)),
+            ['python']
+        )
+        self.assertFalse(Mention.objects.exists())
+
+    def test_rendered_links(self):
+        html = Post.objects.get(pk=self.post.pk).text_html
+        self.assertIn(f'href="{reverse("posts:tag", args=["django"])}"', html)
+        self.assertIn(
+            f'href="{reverse("posts:profile", args=["reader"])}"', html
+        )
+        self.assertIn('href="https://example.com/#anchor"', html)
+
+    def test_tag_feed_keyset(self):
+        """Лента хештега листается по id поста."""
+        posts = [
+            Post.objects.create(author=self.user, text=f'#python {i}')
+            for i in range(12)
+        ]
+        url = reverse('posts:tag', args=['Python'])
+        first = self.client.get(url).context['page_obj']
+        self.assertEqual(list(first), posts[::-1][:10])
+        second = self.client.get(
+            url, {'before': first.next_cursor}
+        ).context['page_obj']
+        self.assertEqual(list(second), posts[1::-1] + [self.post])
+        self.assertIsNone(second.next_cursor)
+
+    def test_mentions_inbox(self):
+        client = Client()
+        client.force_login(self.reader)
+        response = client.get(reverse('posts:mentions'))
+        self.assertEqual(list(response.context['page_obj']), [self.post])
+
+    def test_bounded_map_reads_ahead_window(self):
+        """Порции читаются не дальше окна от обработанных."""
+        read = []
+
+        def items():
+            for number in range(20):
+                read.append(number)
+                yield number
+
+        with ThreadPoolExecutor(2) as pool:
+            results = []
+            for result in bounded_map(pool, lambda x: x * 2, items(), 4):
+                self.assertLessEqual(len(read), len(results) + 5)
+                results.append(result)
+        self.assertEqual(results, [x * 2 for x in range(20)])
+
+    def test_reindex_command(self):
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                PostTag.objects.all().delete()
+                call_command(
+                    'reindex_tags', workers=workers, chunk=1, stdout=StringIO()
+                )
+                self.assertEqual(PostTag.objects.count(), 2)
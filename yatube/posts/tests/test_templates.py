@@ -0,0 +1,74 @@
+import re
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+def normalize(html):
+    """Убирает различия в пробелах между движками шаблонов."""
+    html = re.sub(r'\s+', ' ', html)
+    return re.sub(r'\s*([<>"])\s*', r'\1', html)
+
+
+class Jinja2TemplatesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='HasNoName', first_name='Лев', last_name='Толстой'
+        )
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='test-slug',
+            description='Тестовое описание'
+        )
+        Post.objects.bulk_create([
+            Post(
+                author=cls.user,
+                group=cls.group,
+                text=f'Пост {number} #тег @reader'
+            ) for number in range(13)
+        ])
+        Follow.objects.create(user=cls.reader, author=cls.user)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def render(self, url, engine):
+        cache.clear()
+        with override_settings(FEED_TEMPLATE_ENGINE=engine):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return normalize(response.content.decode())
+
+    def test_feeds_match_django_templates(self):
+        """Ленты на Jinja2 совпадают с лентами на шаблонах Django."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:index') + '?page=2',
+            reverse('posts:group_list', args=(self.group.slug,)),
+            reverse('posts:profile', args=(self.user.username,)),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.render(url, 'jinja2'),
+                    self.render(url, 'django')
+                )
+
+    def test_bench_command(self):
+        """Команда замера выводит время для всех движков."""
+        out = StringIO()
+        call_command('bench_templates', repeat=1, stdout=out)
+        for engine in ('django', 'django-cached', 'jinja2'):
+            self.assertIn(f'posts/profile.html {engine}:', out.getvalue())
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+
+from .. import trending
+from ..models import Comment, Post, PostScore
+
+User = get_user_model()
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.old_post = Post.objects.create(author=cls.user, text='Старый')
+        cls.new_post = Post.objects.create(author=cls.user, text='Новый')
+
+    def setUp(self):
+        self.client = Client()
+
+    def test_score_created_with_post(self):
+        """У нового поста сразу есть оценка."""
+        self.assertEqual(PostScore.objects.count(), 2)
+
+    def test_comments_raise_score(self):
+        """Комментарии поднимают пост в ленте популярного."""
+        self.assertEqual(trending.popular_posts().first(), self.new_post)
+        for i in range(20):
+            Comment.objects.create(
+                post=self.old_post, author=self.user, text=f'Текст {i}'
+            )
+        self.assertEqual(
+            PostScore.objects.get(post=self.old_post).comment_count, 20
+        )
+        self.assertEqual(trending.popular_posts().first(), self.old_post)
+
+    def test_time_decay(self):
+        """Активность старого поста со временем перестает помогать."""
+        now = self.new_post.pub_date
+        day_old = trending.compute_score(now - timedelta(days=1), 10, 0)
+        self.assertGreater(trending.compute_score(now, 0, 0), day_old)
+
+    def test_recompute(self):
+        """Пересчет восстанавливает оценки по комментариям."""
+        Comment.objects.create(post=self.old_post, author=self.user, text='1')
+        PostScore.objects.all().delete()
+        self.assertEqual(trending.recompute(batch_size=1), 2)
+        self.assertEqual(
+            PostScore.objects.get(post=self.old_post).comment_count, 1
+        )
+
+    def test_popular_page(self):
+        response = self.client.get(reverse('posts:popular'))
+        self.assertEqual(len(response.context['page_obj']), 2)
+        self.assertTemplateUsed(response, 'posts/popular.html')
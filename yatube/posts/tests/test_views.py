@@ -1,26 +1,26 @@
-import tempfile
-import shutil
+import os
 
 from django.test import TestCase, Client, override_settings
+from core.testing import IsolatedCacheMixin
 from ..forms import PostForm
 from ..models import Post, Group, Comment, Follow
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django import forms
 from django.conf import settings
+from django.core.files.storage import default_storage
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.cache import cache
 
 User = get_user_model()
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+TEMP_MEDIA_ROOT = os.path.join(settings.MEDIA_ROOT, 'views')
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
-class PostViewTests(TestCase):
+class PostViewTests(IsolatedCacheMixin, TestCase):
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='HasNoName')
         cls.group = Group.objects.create(
             title='Тестовая группа',
@@ -73,14 +73,14 @@ class PostViewTests(TestCase):
         )
 
     def setUp(self):
+        super().setUp()
         self.authorized_client = Client()
         self.authorized_client.force_login(PostViewTests.user)
-        cache.clear()
 
     @classmethod
     def tearDownClass(cls):
+        default_storage.clear()
         super().tearDownClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
 
     def test_post_with_correct_context(self):
         """Картинка передается в списке контекста"""
@@ -269,8 +269,7 @@ class PaginatorViewsTest(TestCase):
     TEST_ENTRY = 13
 
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='HasNoName')
         cls.group = Group.objects.create(
             title='Тестовая группа',
@@ -0,0 +1,148 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase, Client
+from django.urls import reverse
+from unittest import mock
+
+from ..models import Post, Comment, Follow
+from ..writebehind import WriteBehindQueue
+
+User = get_user_model()
+
+
+class WriteBehindQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        self.queue = WriteBehindQueue(batch_size=10, flush_interval=0)
+
+    def test_flush_writes_batch(self):
+        """События записываются в базу только при сбросе очереди."""
+        self.queue.add_comment(self.user, self.post.pk, 'Комментарий')
+        self.queue.set_follow(self.user, self.author.username, True)
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertEqual(Follow.objects.count(), 0)
+        self.queue.flush()
+        self.assertEqual(len(self.queue), 0)
+        self.assertEqual(Comment.objects.count(), 1)
+        self.assertTrue(Follow.objects.filter(
+            user=self.user, author=self.author
+        ).exists())
+
+    def test_flush_on_batch_size(self):
+        """Очередь сбрасывается при достижении размера пачки."""
+        for i in range(self.queue.batch_size):
+            self.queue.add_comment(self.user, self.post.pk, f'Текст {i}')
+        self.assertEqual(Comment.objects.count(), self.queue.batch_size)
+
+    def test_last_follow_event_wins(self):
+        """Подписка и отписка подряд не создают запись."""
+        self.queue.set_follow(self.user, self.author.username, True)
+        self.queue.set_follow(self.user, self.author.username, False)
+        self.assertFalse(
+            self.queue.pending_follow(self.user, self.author.username)
+        )
+        self.queue.flush()
+        self.assertEqual(Follow.objects.count(), 0)
+
+    def test_skips_missing_targets(self):
+        """Комментарии к удаленным постам и подписки на себя отбрасываются."""
+        self.queue.add_comment(self.user, self.post.pk + 100, 'Комментарий')
+        self.queue.set_follow(self.user, self.user.username, True)
+        self.queue.set_follow(self.user, 'nobody', True)
+        self.queue.flush()
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertEqual(Follow.objects.count(), 0)
+
+    def test_broken_event_does_not_block_queue(self):
+        """Сломанное событие отбрасывается, остальные записываются."""
+        self.queue.add_comment(self.user, self.post.pk, None)
+        self.queue.add_comment(self.user, self.post.pk, 'Комментарий')
+        self.queue.set_follow(self.user, self.author.username, True)
+        with self.assertLogs('posts.writebehind', 'WARNING'):
+            self.assertEqual(self.queue.flush(), 0)
+        self.assertEqual(Comment.objects.get().text, 'Комментарий')
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(len(self.queue), 1)
+        with self.assertLogs('posts.writebehind', 'ERROR'):
+            for _ in range(self.queue.max_attempts - 1):
+                dropped = self.queue.flush()
+        self.assertEqual(dropped, 1)
+        self.assertEqual(len(self.queue), 0)
+
+    def test_enqueue_never_raises(self):
+        """Ошибка записи не доходит до запроса, заполнившего пачку."""
+        queue = WriteBehindQueue(batch_size=2, flush_interval=0)
+        with mock.patch.object(
+            Comment.objects, 'bulk_create', side_effect=RuntimeError
+        ), self.assertLogs('posts.writebehind', 'WARNING'):
+            queue.add_comment(self.user, self.post.pk, 'Первый')
+            queue.add_comment(self.user, self.post.pk, 'Второй')
+        self.assertEqual(len(queue), 2)
+        queue.flush()
+        self.assertEqual(Comment.objects.count(), 2)
+
+
+class WriteBehindViewsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='HasNoName')
+        cls.author = User.objects.create_user(username='Author')
+        cls.post = Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        self.queue = WriteBehindQueue(batch_size=10, flush_interval=0)
+        patcher = mock.patch(
+            'posts.views.get_queue', return_value=self.queue
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_author_sees_pending_comment(self):
+        """Автор видит свой комментарий до записи в базу."""
+        self.authorized_client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Отложенный комментарий'}
+        )
+        self.assertEqual(Comment.objects.count(), 0)
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertContains(response, 'Отложенный комментарий')
+        response = Client().get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertNotContains(response, 'Отложенный комментарий')
+
+    def test_comment_to_missing_or_draft_post_not_queued(self):
+        """Комментарий к несуществующему посту или черновику не в очереди."""
+        draft = Post.objects.create(
+            author=self.author, text='Черновик', is_published=False
+        )
+        for post_id in (draft.pk, draft.pk + 100):
+            with self.subTest(post_id=post_id):
+                response = self.authorized_client.post(
+                    reverse('posts:add_comment', args=[post_id]),
+                    {'text': 'Отложенный комментарий'}
+                )
+                self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(self.queue), 0)
+
+    def test_pending_follow_state(self):
+        """Профиль и лента подписок учитывают несохраненную подписку."""
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        response = self.authorized_client.get(
+            reverse('posts:profile', args=[self.author.username])
+        )
+        self.assertTrue(response.context['following'])
+        self.assertEqual(Follow.objects.count(), 0)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(len(response.context['page_obj']), 1)
+        self.assertEqual(len(self.queue), 0)
@@ -0,0 +1,133 @@
+"""
+Лента «Популярное».
+
+Оценка поста растет логарифмически с активностью (комментарии
+и новые подписчики автора) и линейно с датой публикации:
+каждые DECAY_SECONDS новизны весят как десятикратная активность.
+Поэтому оценку не нужно уменьшать со временем, а лента — это
+выборка по индексу поля PostScore.score.
+
+Оценка обновляется при каждом новом комментарии
+и периодически пересчитывается командой recompute_trending.
+"""
+import math
+from collections import Counter
+from datetime import datetime, timedelta
+
+from django.db.models import Count, F
+from django.utils import timezone
+
+from .models import Follow, Post, PostScore
+
+EPOCH = datetime(2022, 1, 1, tzinfo=timezone.utc)
+DECAY_SECONDS = 45000
+FOLLOW_WEIGHT = 0.5
+VELOCITY_DAYS = 7
+RECOMPUTE_DAYS = 30
+
+
+def compute_score(pub_date, comment_count, follow_velocity):
+    activity = comment_count + FOLLOW_WEIGHT * follow_velocity
+    age = (pub_date - EPOCH).total_seconds()
+    return math.log10(max(activity, 1)) + age / DECAY_SECONDS
+
+
+def popular_posts():
+    """Посты в порядке убывания оценки."""
+    return Post.objects.published().filter(
+        score__isnull=False
+    ).select_related('group', 'author').order_by('-score__score')
+
+
+def register_post(post):
+    """Заводит оценку для нового поста."""
+    PostScore.objects.get_or_create(
+        post=post,
+        defaults={'score': compute_score(post.pub_date, 0, 0)}
+    )
+
+
+def register_posts(posts):
+    """Заводит оценки пачке постов одним запросом."""
+    PostScore.objects.bulk_create(
+        (
+            PostScore(post=post, score=compute_score(post.pub_date, 0, 0))
+            for post in posts
+        ),
+        ignore_conflicts=True
+    )
+
+
+def register_comments(comments):
+    """Учитывает новые комментарии в оценках их постов."""
+    counts = Counter(comment.post_id for comment in comments)
+    if not counts:
+        return
+    for post_id, count in counts.items():
+        PostScore.objects.filter(post_id=post_id).update(
+            comment_count=F('comment_count') + count
+        )
+    _rescore(PostScore.objects.filter(
+        post_id__in=list(counts)
+    ).select_related('post'))
+
+
+def _rescore(scores):
+    scores = list(scores)
+    for item in scores:
+        item.score = compute_score(
+            item.post.pub_date, item.comment_count, item.follow_velocity
+        )
+    PostScore.objects.bulk_update(scores, ['score'])
+
+
+def recompute(days=RECOMPUTE_DAYS, batch_size=500):
+    """
+    Пересчитывает оценки постов за последние days дней.
+    Возвращает число обновленных постов.
+    """
+    now = timezone.now()
+    velocity = dict(Follow.objects.filter(
+        created__gte=now - timedelta(days=VELOCITY_DAYS)
+    ).values('author').annotate(
+        count=Count('pk')
+    ).values_list('author', 'count'))
+    posts = Post.objects.published().filter(
+        pub_date__gte=now - timedelta(days=days)
+    ).annotate(
+        comment_count=Count('comments')
+    ).order_by('pk').values_list(
+        'pk', 'author_id', 'pub_date', 'comment_count'
+    )
+    updated = 0
+    last_pk = 0
+    while True:
+        rows = list(posts.filter(pk__gt=last_pk)[:batch_size])
+        if not rows:
+            return updated
+        updated += _store(rows, velocity, now)
+        last_pk = rows[-1][0]
+
+
+def _store(rows, velocity, now):
+    scores = []
+    for post_id, author_id, pub_date, comment_count in rows:
+        author_velocity = velocity.get(author_id, 0)
+        scores.append(PostScore(
+            post_id=post_id,
+            comment_count=comment_count,
+            follow_velocity=author_velocity,
+            score=compute_score(pub_date, comment_count, author_velocity),
+            updated=now
+        ))
+    existing = set(PostScore.objects.filter(
+        post_id__in=[item.post_id for item in scores]
+    ).values_list('post_id', flat=True))
+    PostScore.objects.bulk_update(
+        [item for item in scores if item.post_id in existing],
+        ['comment_count', 'follow_velocity', 'score', 'updated']
+    )
+    PostScore.objects.bulk_create(
+        [item for item in scores if item.post_id not in existing]
+    )
+    return len(scores)
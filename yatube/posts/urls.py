@@ -5,17 +5,59 @@ app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('popular/', views.popular, name='popular'),
+    path('group/', views.group_index, name='groups'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path('archive/', views.archive_index, name='archive'),
+    path(
+        'archive/<int:year>/<int:month>/',
+        views.archive_month,
+        name='archive_month'
+    ),
+    path(
+        'group/<slug:slug>/archive/',
+        views.archive_index,
+        name='group_archive'
+    ),
+    path(
+        'group/<slug:slug>/archive/<int:year>/<int:month>/',
+        views.archive_month,
+        name='group_archive_month'
+    ),
+    path(
+        'profile/<str:username>/archive/',
+        views.archive_index,
+        name='profile_archive'
+    ),
+    path(
+        'profile/<str:username>/archive/<int:year>/<int:month>/',
+        views.archive_month,
+        name='profile_archive_month'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
+    path('drafts/', views.drafts, name='drafts'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
+    path(
+        'posts/<int:post_id>/history/',
+        views.post_history,
+        name='post_history'
+    ),
     path(
         'posts/<int:post_id>/comment/',
         views.add_comment,
         name='add_comment'
     ),
+    path('live/', views.live_feed, name='live_feed'),
+    path(
+        'posts/<int:post_id>/live/',
+        views.live_comments,
+        name='live_comments'
+    ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('tags/<str:tag>/', views.tag_posts, name='tag'),
+    path('mentions/', views.mentions, name='mentions'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
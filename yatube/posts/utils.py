@@ -1,12 +1,64 @@
+from collections import deque
+
 from django.conf import settings
 from django.core.paginator import Paginator
 
 
-def get_page_obj(request, post_list):
+def get_page_obj(request, post_list, count=None):
     """
     Возвращает набор записей для страницы с запрошенным номером.
+    Если число записей известно заранее, его можно передать в count,
+    чтобы не выполнять COUNT(*).
     """
     paginator = Paginator(post_list, settings.LIMIT_POST)
+    if count is not None:
+        paginator.count = count
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     return page_obj
+
+
+class KeysetPage:
+    """Страница ленты, которая листается по id, а не по номеру страницы."""
+
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+def get_keyset_page(request, post_list):
+    """
+    Возвращает записи с id меньше параметра before, новые первыми.
+    Выборка идет по индексу без OFFSET и COUNT(*).
+    """
+    post_list = post_list.order_by('-pk')
+    before = request.GET.get('before', '')
+    if before.isdigit():
+        post_list = post_list.filter(pk__lt=int(before))
+    posts = list(post_list[:settings.LIMIT_POST + 1])
+    next_cursor = None
+    if len(posts) > settings.LIMIT_POST:
+        posts = posts[:settings.LIMIT_POST]
+        next_cursor = posts[-1].pk
+    return KeysetPage(posts, next_cursor)
+
+
+def bounded_map(pool, func, items, window):
+    """
+    Как pool.map, но items читаются по мере работы: в пуле не больше
+    window задач, поэтому порции не копятся в памяти. Результаты
+    отдаются в порядке items.
+    """
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(pool.submit(func, item))
+    while pending:
+        yield pending.popleft().result()
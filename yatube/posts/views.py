@@ -1,73 +1,134 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
+from django.db.models import F, Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
-from .models import Post, Group, User, Follow
-from .forms import CommentForm, PostForm
-from .utils import get_page_obj
+from django.urls import reverse
+from . import (
+    archive, cold_storage, follows, graph, live, notifications,
+    recommendations, revisions, scheduling, trending
+)
+from .cold_storage import TieredPostList
+from .models import ArchivedPost, Post, Group, MonthArchive, Tag, User
+from .forms import CommentForm, PostForm, PublicationForm
+from .utils import get_keyset_page, get_page_obj
+from .writebehind import get_queue
 
 
 def index(request):
     """Главная страница."""
-    post_list = Post.objects.select_related('group', 'author').all()
+    post_list = Post.objects.published().select_related('group', 'author')
     page_obj = get_page_obj(request, post_list)
     return render(
         request,
         'posts/index.html',
+        {'page_obj': page_obj},
+        using=settings.FEED_TEMPLATE_ENGINE
+    )
+
+
+def popular(request):
+    """Популярные посты."""
+    page_obj = get_page_obj(request, trending.popular_posts())
+    return render(
+        request,
+        'posts/popular.html',
+        {'page_obj': page_obj, 'popular': True}
+    )
+
+
+def group_index(request):
+    """Каталог групп со счетчиками."""
+    group_list = Group.objects.select_related('stats').order_by(
+        F('stats__last_post_date').desc(nulls_last=True), 'title'
+    )
+    page_obj = get_page_obj(request, group_list)
+    return render(
+        request,
+        'posts/groups.html',
         {'page_obj': page_obj}
     )
 
 
 def group_posts(request, slug):
     """Посты отфильтрованные по группам."""
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('group', 'author').all()
+    group = get_object_or_404(Group.objects.select_related('stats'), slug=slug)
+    post_list = group.posts.published().select_related('group', 'author')
     page_obj = get_page_obj(request, post_list)
     return render(
         request,
         'posts/group_list.html',
-        {'group': group, 'page_obj': page_obj}
+        {'group': group, 'page_obj': page_obj},
+        using=settings.FEED_TEMPLATE_ENGINE
     )
 
 
 def profile(request, username):
     """Профиль пользовталеля."""
     author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related('group', 'author').all()
+    post_list = TieredPostList(
+        author.posts.published().select_related('group', 'author'),
+        author.archived_posts.select_related('group', 'author')
+    )
     page_obj = get_page_obj(request, post_list)
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user,
-        author=author
-    ).exists()
+    following = None
+    queue = get_queue()
+    if queue is not None and request.user.is_authenticated:
+        following = queue.pending_follow(request.user, username)
+    if following is None:
+        following = request.user.is_authenticated and graph.is_following(
+            request.user.pk,
+            author.pk
+        )
     return render(
         request,
         'posts/profile.html',
         {
             'author': author,
             'page_obj': page_obj,
-            'following': following
-        }
+            'following': following,
+            'follower_count': graph.follower_count(author.pk),
+            'recommended': recommendations.for_user(request.user),
+        },
+        using=settings.FEED_TEMPLATE_ENGINE
     )
 
 
 def post_detail(request, post_id):
-    """Страница поста."""
-    post = get_object_or_404(Post, pk=post_id)
+    """Страница поста. Архивные посты читаются из холодного хранилища."""
+    post = cold_storage.get_post(post_id)
+    if post is None or (
+        not post.is_published and post.author_id != request.user.pk
+    ):
+        raise Http404
     form = CommentForm(request.POST or None)
+    comments = list(post.comments.select_related('author'))
+    queue = get_queue()
+    if queue is not None and request.user.is_authenticated:
+        comments[:0] = queue.pending_comments(request.user, post.pk)
     return render(
         request,
         'posts/post_detail.html',
         {
             'post': post,
             'form': form,
+            'comments': comments,
         }
     )
 
 
 @login_required
 def add_comment(request, post_id):
-    """Добавление комментария."""
+    """
+    Добавление комментария к опубликованному посту. При отложенной
+    записи пост проверяется до постановки комментария в очередь.
+    """
+    post = get_object_or_404(Post.objects.published(), pk=post_id)
     form = CommentForm(request.POST or None)
-    if form.is_valid():
-        post = get_object_or_404(Post, pk=post_id)
+    queue = get_queue()
+    if form.is_valid() and queue is not None:
+        queue.add_comment(request.user, post.pk, form.cleaned_data['text'])
+    elif form.is_valid():
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
@@ -75,18 +136,137 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+def _live_response(request, channel):
+    if not settings.LIVE_UPDATES_ENABLED:
+        # На 204 EventSource закрывается и больше не переподключается
+        return HttpResponse(status=204)
+    try:
+        last_event_id = int(request.META.get('HTTP_LAST_EVENT_ID', ''))
+    except ValueError:
+        last_event_id = None
+    response = StreamingHttpResponse(
+        live.stream([channel], last_event_id),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def live_feed(request):
+    """Поток новых постов для главной страницы."""
+    return _live_response(request, live.FEED)
+
+
+def live_comments(request, post_id):
+    """Поток новых комментариев к посту."""
+    return _live_response(request, live.comments_channel(post_id))
+
+
+def tag_posts(request, tag):
+    """Посты с хештегом."""
+    tag = get_object_or_404(Tag, name=tag.lower())
+    page_obj = get_keyset_page(
+        request,
+        Post.objects.published().filter(tag_links__tag=tag).select_related(
+            'group', 'author'
+        )
+    )
+    return render(
+        request,
+        'posts/tag.html',
+        {'tag': tag, 'page_obj': page_obj}
+    )
+
+
+@login_required
+def mentions(request):
+    """Посты, в которых упомянут текущий пользователь."""
+    page_obj = get_keyset_page(
+        request,
+        Post.objects.published().filter(
+            mentions__user=request.user
+        ).select_related('group', 'author')
+    )
+    return render(
+        request,
+        'posts/mentions.html',
+        {'page_obj': page_obj}
+    )
+
+
+def _publication(request, post=None):
+    """Форма отложенной публикации; у опубликованного поста ее нет."""
+    if post is not None and post.is_published:
+        return None
+    return PublicationForm(
+        request.POST or None,
+        prefix='publication',
+        initial={'publish_at': post and post.publish_at}
+    )
+
+
+def _schedule(request, post, publication):
+    """
+    Выставляет пост черновиком (кнопка draft), запланированным
+    или опубликованным по данным формы публикации.
+    """
+    if publication is None:
+        return
+    post.publish_at = publication.cleaned_data['publish_at']
+    post.is_published = not ('draft' in request.POST or post.publish_at)
+
+
+def post_history(request, post_id):
+    """
+    История правок поста; ?version=N показывает текст версии N.
+    История архивных постов читается из холодного хранилища.
+    """
+    post = cold_storage.get_post(post_id)
+    if post is None or (
+        not post.is_published and post.author_id != request.user.pk
+    ):
+        raise Http404
+    selected = None
+    if 'version' in request.GET:
+        try:
+            selected = revisions.version(post, int(request.GET['version']))
+        except ValueError:
+            selected = None
+        if selected is None:
+            raise Http404
+    page_obj = get_page_obj(request, revisions.history(post))
+    return render(
+        request,
+        'posts/history.html',
+        {'post': post, 'page_obj': page_obj, 'selected': selected}
+    )
+
+
 @login_required
 def post_create(request):
     """
     Создание нового поста.
-    После успешного заполнения переход на страницу пользователя.
+    После успешного заполнения переход на страницу пользователя,
+    черновика и запланированного поста — к черновикам.
     """
     form = PostForm(request.POST or None, files=request.FILES or None)
-    if not request.method == 'POST' or not form.is_valid():
-        return render(request, 'posts/create_post.html', {'form': form})
+    publication = _publication(request)
+    if (
+        not request.method == 'POST'
+        or not all([form.is_valid(), publication.is_valid()])
+    ):
+        return render(
+            request,
+            'posts/create_post.html',
+            {'form': form, 'publication': publication}
+        )
     post = form.save(commit=False)
     post.author = request.user
+    _schedule(request, post, publication)
     post.save()
+    if not post.is_published:
+        return redirect('posts:drafts')
     return redirect('posts:profile', request.user)
 
 
@@ -96,66 +276,186 @@ def post_edit(request, post_id):
     Редактирование поста.
     Доступно только автору поста.
     После успешного заполнения переход на страницу поста.
+    Черновик здесь же планируется или публикуется.
     """
     post = get_object_or_404(Post, pk=post_id)
+    if post.author_id != request.user.pk:
+        return redirect('posts:post_detail', post_id)
+    was_published = post.is_published
     form = PostForm(
         request.POST or None,
         files=request.FILES or None,
         instance=post
     )
-    if not request.method == 'POST' or not form.is_valid():
+    publication = _publication(request, post)
+    if not request.method == 'POST' or not all([
+        form.is_valid(), publication is None or publication.is_valid()
+    ]):
         return render(
             request,
             'posts/create_post.html',
             {
                 'form': form,
+                'publication': publication,
                 'is_edit': True,
                 'post': post
             }
         )
+    _schedule(request, post, publication)
+    publish_now = not was_published and post.is_published
+    if publish_now:
+        # Черновик публикуется тем же путем, что и у планировщика
+        post.is_published = False
     post.save()
+    if publish_now:
+        scheduling.publish([post])
     return redirect('posts:post_detail', post_id)
 
 
+@login_required
+def drafts(request):
+    """Черновики и запланированные посты текущего пользователя."""
+    post_list = request.user.posts.filter(is_published=False).select_related(
+        'group', 'author'
+    ).order_by(F('publish_at').asc(nulls_first=True), '-pk')
+    page_obj = get_page_obj(request, post_list)
+    return render(
+        request,
+        'posts/drafts.html',
+        {'page_obj': page_obj}
+    )
+
+
 @login_required
 def follow_index(request):
     """
     Посты авторов, на которых подписан текущий пользователь.
     """
-    post_list = Post.objects.filter(
-        author__following__user=request.user
-    ).select_related('author', 'group')
+    queue = get_queue()
+    if queue is not None and queue.has_pending_follows(request.user):
+        queue.flush()
+    notifications.mark_read(request.user)
+    authors = graph.following_ids(request.user.pk)
+    if len(authors) <= graph.IN_LIMIT:
+        post_list = Post.objects.filter(author_id__in=list(authors))
+    else:
+        post_list = Post.objects.filter(author__following__user=request.user)
+    post_list = post_list.published().select_related('author', 'group')
     page_obj = get_page_obj(request, post_list)
     return render(
         request,
         'posts/follow.html',
-        {'page_obj': page_obj}
+        {
+            'page_obj': page_obj,
+            'recommended': recommendations.for_user(request.user),
+        },
+        using=settings.FEED_TEMPLATE_ENGINE
     )
 
 
 @login_required
 def profile_follow(request, username):
     """Подписаться на автора."""
-    author = get_object_or_404(User, username=username)
-    if request.user != author and (not Follow.objects.filter(
-        user=request.user,
-        author=author
-    ).exists()):
-        Follow.objects.create(
-            user=request.user,
-            author=author
-        )
+    queue = get_queue()
+    if queue is not None:
+        queue.set_follow(request.user, username, True)
+    else:
+        follows.follow(request.user, username)
     return redirect('posts:profile', username)
 
 
 @login_required
 def profile_unfollow(request, username):
     """Отписаться от автора."""
-    author = get_object_or_404(User, username=username)
-    follow_qs = Follow.objects.filter(
-        user=request.user,
-        author=author
-    )
-    if request.user != author and follow_qs.exists():
-        follow_qs.delete()
+    queue = get_queue()
+    if queue is not None:
+        queue.set_follow(request.user, username, False)
+    else:
+        follows.unfollow(request.user, username)
     return redirect('posts:profile', username)
+
+
+def _archive_scope(slug, username):
+    """Область архива: весь сайт, группа или автор."""
+    if slug is not None:
+        group = get_object_or_404(Group, slug=slug)
+        return {
+            'scope': MonthArchive.GROUP,
+            'scope_id': group.pk,
+            'title': group.title,
+            'url_name': 'posts:group_archive',
+            'kwargs': {'slug': slug},
+        }
+    if username is not None:
+        author = get_object_or_404(User, username=username)
+        return {
+            'scope': MonthArchive.AUTHOR,
+            'scope_id': author.pk,
+            'title': author.get_full_name() or author.username,
+            'url_name': 'posts:profile_archive',
+            'kwargs': {'username': username},
+        }
+    return {
+        'scope': MonthArchive.SITE,
+        'scope_id': 0,
+        'title': 'Yatube',
+        'url_name': 'posts:archive',
+        'kwargs': {},
+    }
+
+
+def _month_url(scope, bucket):
+    return reverse(
+        f'{scope["url_name"]}_month',
+        kwargs={**scope['kwargs'], 'year': bucket.year, 'month': bucket.month}
+    )
+
+
+def archive_index(request, slug=None, username=None):
+    """Архив по годам и месяцам из гистограммы постов."""
+    scope = _archive_scope(slug, username)
+    years = {}
+    for bucket in MonthArchive.objects.filter(
+        scope=scope['scope'], scope_id=scope['scope_id']
+    ):
+        bucket.url = _month_url(scope, bucket)
+        years.setdefault(bucket.year, []).append(bucket)
+    return render(
+        request,
+        'posts/archive.html',
+        {'archive_title': scope['title'], 'years': years.items()}
+    )
+
+
+def archive_month(request, year, month, slug=None, username=None):
+    """Посты за месяц: поиск по диапазону id без OFFSET по всей ленте."""
+    scope = _archive_scope(slug, username)
+    buckets = MonthArchive.objects.filter(
+        scope=scope['scope'], scope_id=scope['scope_id']
+    )
+    bucket = get_object_or_404(buckets, year=year, month=month)
+    post_list = TieredPostList(
+        archive.month_posts(bucket).select_related('group', 'author'),
+        archive.month_posts(bucket, ArchivedPost).select_related(
+            'group', 'author'
+        )
+    )
+    page_obj = get_page_obj(request, post_list, count=bucket.post_count)
+    previous = buckets.filter(
+        Q(year__lt=year) | Q(year=year, month__lt=month)
+    ).first()
+    following = buckets.filter(
+        Q(year__gt=year) | Q(year=year, month__gt=month)
+    ).order_by('year', 'month').first()
+    return render(
+        request,
+        'posts/archive_month.html',
+        {
+            'archive_title': scope['title'],
+            'archive_url': reverse(scope['url_name'], kwargs=scope['kwargs']),
+            'bucket': bucket,
+            'page_obj': page_obj,
+            'previous_url': previous and _month_url(scope, previous),
+            'next_url': following and _month_url(scope, following),
+        }
+    )
@@ -0,0 +1,245 @@
+"""
+Отложенная запись комментариев и подписок.
+
+Комментарии и события подписки/отписки копятся в памяти процесса
+и записываются в базу пачками: при достижении WRITE_BEHIND_BATCH_SIZE
+событий или раз в WRITE_BEHIND_FLUSH_INTERVAL секунд.
+Несохраненные события видны самому пользователю (read-your-own-writes),
+а при штатной остановке процесса очередь сбрасывается в базу.
+
+Если пачка не записалась, события пишутся по одному: одно сломанное
+событие не задерживает остальные. Событие, которое не записалось
+WRITE_BEHIND_MAX_ATTEMPTS раз, попадает в журнал и отбрасывается.
+Ошибки записи никогда не доходят до запроса, поставившего событие.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import fingerprints, live, trending
+from .follows import bulk_follow, bulk_unfollow
+from .models import Comment, Post, User
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """Буфер событий записи с пакетным сбросом в базу."""
+
+    def __init__(self, batch_size, flush_interval, max_attempts=3):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_attempts = max_attempts
+        self._lock = threading.RLock()
+        self._comments = []
+        self._follows = {}
+        # Неудачные попытки записи: id(комментария) или пара подписки
+        self._attempts = {}
+        self._timer = None
+        self._stopped = threading.Event()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._comments) + len(self._follows)
+
+    def add_comment(self, user, post_id, text):
+        """Ставит комментарий в очередь и возвращает несохраненный объект."""
+        comment = Comment(
+            author=user,
+            post_id=post_id,
+            text=text,
+            pub_date=timezone.now()
+        )
+        with self._lock:
+            self._comments.append(comment)
+        self._after_enqueue()
+        return comment
+
+    def set_follow(self, user, username, state):
+        """
+        Ставит в очередь подписку (state=True) или отписку (state=False).
+        Повторное событие для той же пары заменяет предыдущее.
+        """
+        with self._lock:
+            self._follows[(user.pk, username)] = state
+            self._attempts.pop((user.pk, username), None)
+        self._after_enqueue()
+
+    def pending_comments(self, user, post_id):
+        """Несохраненные комментарии пользователя к посту, новые первыми."""
+        with self._lock:
+            return [
+                comment for comment in reversed(self._comments)
+                if comment.post_id == post_id and comment.author_id == user.pk
+            ]
+
+    def pending_follow(self, user, username):
+        """Ожидающее состояние подписки или None, если событий нет."""
+        with self._lock:
+            return self._follows.get((user.pk, username))
+
+    def has_pending_follows(self, user):
+        with self._lock:
+            return any(user_id == user.pk for user_id, _ in self._follows)
+
+    def flush(self):
+        """
+        Записывает накопленные события одной транзакцией, а если она
+        не удалась — по одному. Возвращает число отброшенных событий.
+        """
+        with self._lock:
+            comments, self._comments = self._comments, []
+            follows, self._follows = self._follows, {}
+        if not comments and not follows:
+            return 0
+        try:
+            with transaction.atomic():
+                self._write_comments(comments)
+                self._write_follows(follows)
+        except Exception:
+            logger.warning(
+                'Пачка отложенных событий не записалась, '
+                'события пишутся по одному',
+                exc_info=True
+            )
+        else:
+            with self._lock:
+                for comment in comments:
+                    self._attempts.pop(id(comment), None)
+                for key in follows:
+                    self._attempts.pop(key, None)
+            return 0
+        dropped = 0
+        for comment in comments:
+            dropped += self._write_one(
+                self._write_comments, [comment], id(comment),
+                lambda: self._comments.append(comment),
+                f'комментарий {comment.author_id} к посту {comment.post_id}'
+            )
+        for key, state in follows.items():
+            dropped += self._write_one(
+                self._write_follows, {key: state}, key,
+                lambda: self._follows.setdefault(key, state),
+                f'подписка {key}: {state}'
+            )
+        return dropped
+
+    def _write_one(self, write, events, key, requeue, label):
+        """
+        Записывает одно событие. Неудачное возвращает в очередь
+        до следующего сброса, а когда попытки кончились — отбрасывает.
+        Возвращает 1, если событие отброшено.
+        """
+        try:
+            with transaction.atomic():
+                write(events)
+        except Exception as error:
+            failure = error
+        else:
+            failure = None
+        with self._lock:
+            attempts = self._attempts.pop(key, 0) + 1
+            if failure is None:
+                return 0
+            if attempts < self.max_attempts:
+                self._attempts[key] = attempts
+                requeue()
+                return 0
+        logger.error(
+            'Отложенное событие отброшено после %d попыток: %s',
+            attempts, label, exc_info=failure
+        )
+        return 1
+
+    def start(self):
+        """Запускает фоновый сброс очереди по времени."""
+        if self.flush_interval <= 0 or self._timer is not None:
+            return
+        self._timer = threading.Thread(
+            target=self._run,
+            name='write-behind-flush',
+            daemon=True
+        )
+        self._timer.start()
+
+    def stop(self):
+        """Останавливает фоновый сброс и записывает остаток очереди."""
+        self._stopped.set()
+        if self._timer is not None:
+            self._timer.join()
+            self._timer = None
+        self.flush()
+
+    def _after_enqueue(self):
+        if len(self) < self.batch_size:
+            self.start()
+            return
+        try:
+            self.flush()
+        except Exception:
+            # Чужие события не должны ронять запрос, который их дописал
+            logger.exception('Не удалось сбросить отложенные события')
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            close_old_connections()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Не удалось сбросить отложенные события')
+        close_old_connections()
+
+    @staticmethod
+    def _write_comments(comments):
+        if not comments:
+            return
+        existing = set(Post.objects.published().filter(
+            pk__in={comment.post_id for comment in comments}
+        ).values_list('pk', flat=True))
+        comments = Comment.objects.bulk_create(
+            [comment for comment in comments if comment.post_id in existing]
+        )
+        trending.register_comments(comments)
+        fingerprints.register_comments(comments)
+        transaction.on_commit(lambda: live.publish_comments(comments))
+
+    @staticmethod
+    def _write_follows(follows):
+        if not follows:
+            return
+        authors = dict(User.objects.filter(
+            username__in={username for _, username in follows}
+        ).values_list('username', 'pk'))
+        changes = {True: [], False: []}
+        for (user_id, username), state in follows.items():
+            if username in authors:
+                changes[state].append((user_id, authors[username]))
+        bulk_unfollow(changes[False])
+        bulk_follow(changes[True])
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    """
+    Возвращает очередь процесса или None,
+    если отложенная запись выключена.
+    """
+    global _queue
+    if not settings.WRITE_BEHIND_ENABLED:
+        return None
+    with _queue_lock:
+        if _queue is None:
+            _queue = WriteBehindQueue(
+                settings.WRITE_BEHIND_BATCH_SIZE,
+                settings.WRITE_BEHIND_FLUSH_INTERVAL,
+                settings.WRITE_BEHIND_MAX_ATTEMPTS
+            )
+            atexit.register(_queue.stop)
+    return _queue
@@ -0,0 +1,13 @@
+// Живые обновления (posts.live): новые посты и комментарии приходят
+// через Server-Sent Events и вставляются в начало списка.
+document.querySelectorAll('[data-live-url]').forEach(function (list) {
+  if (!window.EventSource) {
+    return;
+  }
+  var source = new EventSource(list.dataset.liveUrl);
+  ['post', 'comment'].forEach(function (name) {
+    source.addEventListener(name, function (event) {
+      list.insertAdjacentHTML('afterbegin', event.data);
+    });
+  });
+});
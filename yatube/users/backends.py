@@ -0,0 +1,31 @@
+"""
+Бэкенд авторизации с кэшем пользователя.
+
+AuthenticationMiddleware на каждый запрос вошедшего пользователя
+вызывает get_user. CachedModelBackend берет пользователя из кэша,
+а сигналы users.signals сбрасывают запись при сохранении
+и удалении пользователя, в том числе при смене пароля и входе.
+"""
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+USER_CACHE_TIMEOUT = 60 * 15
+
+
+def user_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def invalidate(user_id):
+    cache.delete(user_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, USER_CACHE_TIMEOUT)
+        return user
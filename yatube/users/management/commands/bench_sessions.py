@@ -0,0 +1,85 @@
+from importlib import import_module
+from timeit import default_timer
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+)
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+User = get_user_model()
+
+VARIANTS = (
+    ('db', 'django.contrib.auth.backends.ModelBackend'),
+    ('cached_db', 'django.contrib.auth.backends.ModelBackend'),
+    ('cached_db', 'users.backends.CachedModelBackend'),
+    ('signed_cookies', 'users.backends.CachedModelBackend'),
+)
+
+
+def view(request):
+    return HttpResponse(request.user.get_username())
+
+
+def login_session(engine, user, backend):
+    """Сессия вошедшего пользователя, как после django.contrib.auth.login."""
+    session = import_module(engine).SessionStore()
+    session[SESSION_KEY] = str(user.pk)
+    session[BACKEND_SESSION_KEY] = backend
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return session.session_key
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает затраты на сессию и пользователя в одном запросе '
+        'для разных SESSION_ENGINE и бэкендов авторизации.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Сколько запросов выполнить для каждого варианта'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create_user(username='bench-sessions')
+            for name, backend in VARIANTS:
+                self.bench(name, backend, user, options['requests'])
+            transaction.set_rollback(True)
+
+    def bench(self, name, backend, user, requests):
+        engine = f'django.contrib.sessions.backends.{name}'
+        with override_settings(
+            SESSION_ENGINE=engine,
+            AUTHENTICATION_BACKENDS=[backend]
+        ):
+            cache.clear()
+            handler = SessionMiddleware(AuthenticationMiddleware(view))
+            session_key = login_session(engine, user, backend)
+            factory = RequestFactory()
+            with CaptureQueriesContext(connection) as queries:
+                started = default_timer()
+                for _ in range(requests):
+                    request = factory.get('/')
+                    request.COOKIES[settings.SESSION_COOKIE_NAME] = (
+                        session_key
+                    )
+                    handler(request)
+                elapsed = default_timer() - started
+        self.stdout.write(
+            f'{name} + {backend.rsplit(".", 1)[-1]}: '
+            f'{elapsed / requests * 1000:.3f} мс, '
+            f'запросов к базе {len(queries) / requests:.2f} на запрос'
+        )
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from users import sessions
+
+
+class Command(BaseCommand):
+    help = 'Удаляет просроченные сессии порциями.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk',
+            type=int,
+            default=1000,
+            help='Сколько сессий удалять одним запросом'
+        )
+
+    def handle(self, *args, **options):
+        deleted = sessions.delete_expired(options['chunk'])
+        self.stdout.write(f'Удалено сессий: {deleted}')
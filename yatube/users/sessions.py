@@ -0,0 +1,43 @@
+"""
+Очистка просроченных сессий порциями.
+
+Команда clearsessions удаляет все просроченные сессии одним DELETE
+и надолго блокирует таблицу. delete_expired удаляет их порциями
+по первичному ключу, каждая порция в своей транзакции.
+"""
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.utils import timezone
+
+DB_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+
+def uses_database():
+    """Хранит ли текущий SESSION_ENGINE сессии в таблице."""
+    return settings.SESSION_ENGINE in DB_ENGINES
+
+
+def delete_expired(chunk_size=1000):
+    """Удаляет просроченные сессии. Возвращает число удаленных."""
+    if not uses_database():
+        # Кэш и подписанные cookie истекают сами
+        engine = import_module(settings.SESSION_ENGINE)
+        engine.SessionStore.clear_expired()
+        return 0
+    expired = Session.objects.filter(
+        expire_date__lt=timezone.now()
+    ).values_list('session_key', flat=True)
+    deleted = 0
+    while True:
+        keys = list(expired[:chunk_size])
+        if keys:
+            deleted += Session.objects.filter(
+                session_key__in=keys
+            ).delete()[0]
+        if len(keys) < chunk_size:
+            return deleted
@@ -0,0 +1,90 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.testing import IsolatedCacheMixin
+from .backends import CachedModelBackend
+from .sessions import delete_expired
+
+User = get_user_model()
+
+
+class CachedModelBackendTests(IsolatedCacheMixin, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='HasNoName')
+
+    def setUp(self):
+        super().setUp()
+        self.backend = CachedModelBackend()
+
+    def test_user_read_from_cache(self):
+        """Повторный get_user обходится без запросов."""
+        self.backend.get_user(self.user.pk)
+        with self.assertNumQueries(0):
+            user = self.backend.get_user(self.user.pk)
+        self.assertEqual(user, self.user)
+
+    def test_save_invalidates_cache(self):
+        """Сохранение пользователя сбрасывает кэш."""
+        self.backend.get_user(self.user.pk)
+        User.objects.get(pk=self.user.pk).save()
+        with self.assertNumQueries(1):
+            self.backend.get_user(self.user.pk)
+
+    def test_logged_in_page_uses_cached_user(self):
+        """Вошедший пользователь не читается из auth_user на каждый запрос."""
+        self.client.force_login(self.user)
+        url = reverse('users:password_change_done')
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.context['user'], self.user)
+        self.assertFalse(
+            [query for query in queries if '"auth_user"' in query['sql']]
+        )
+
+
+class SessionCleanupTests(TestCase):
+    def make_sessions(self, count, expire_date):
+        for _ in range(count):
+            session = SessionStore()
+            session.create()
+            Session.objects.filter(session_key=session.session_key).update(
+                expire_date=expire_date
+            )
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db'
+    )
+    def test_deletes_only_expired_in_chunks(self):
+        """Удаляются только просроченные сессии, порциями."""
+        self.make_sessions(5, timezone.now() - timedelta(days=1))
+        self.make_sessions(2, timezone.now() + timedelta(days=1))
+        with self.assertNumQueries(6):
+            self.assertEqual(delete_expired(chunk_size=2), 5)
+        self.assertEqual(Session.objects.count(), 2)
+
+    @override_settings(
+        SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies'
+    )
+    def test_signed_cookies_have_nothing_to_delete(self):
+        """Подписанные cookie не хранятся в базе."""
+        self.assertEqual(delete_expired(), 0)
+
+    def test_commands(self):
+        """Команды очистки и замера выполняются."""
+        out = StringIO()
+        call_command('cleanup_sessions', stdout=out)
+        self.assertIn('Удалено сессий: 0', out.getvalue())
+        call_command('bench_sessions', requests=2, stdout=out)
+        self.assertIn('signed_cookies + CachedModelBackend', out.getvalue())
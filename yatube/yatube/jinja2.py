@@ -0,0 +1,59 @@
+"""
+Окружение Jinja2 для горячих шаблонов лент (templates/jinja2/).
+
+Шаблоны повторяют одноименные шаблоны Django, поэтому окружение
+дает им те же возможности: url, static, thumbnail, фильтр date
+и кэширование фрагментов с теми же ключами, что у тега {% cache %}.
+"""
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils import dateformat, timezone
+from jinja2 import Environment, Undefined
+from markupsafe import Markup
+from sorl.thumbnail import get_thumbnail
+
+
+def url(view_name, *args):
+    return reverse(view_name, args=args)
+
+
+def thumbnail(image, geometry, **options):
+    """Миниатюра или None, как у тега {% thumbnail %} без отладки."""
+    if not image:
+        return None
+    try:
+        return get_thumbnail(image, geometry, **options)
+    except Exception:
+        return None
+
+
+def cache_block(name, timeout, caller):
+    """Аналог {% cache timeout name %}...{% endcache %}."""
+    key = make_template_fragment_key(name)
+    html = cache.get(key)
+    if html is None:
+        html = caller()
+        cache.set(key, html, timeout)
+    return Markup(html)
+
+
+def date(value, format_string):
+    if not value:
+        return ''
+    return dateformat.format(timezone.localtime(value), format_string)
+
+
+def environment(**options):
+    # Как в шаблонах Django, пропущенная переменная выводится пустой строкой.
+    options['undefined'] = Undefined
+    env = Environment(**options)
+    env.globals.update({
+        'url': url,
+        'static': static,
+        'thumbnail': thumbnail,
+        'cache_block': cache_block,
+    })
+    env.filters['date'] = date
+    return env
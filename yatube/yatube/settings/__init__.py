@@ -0,0 +1,21 @@
+"""
+Настройки выбираются переменной окружения DJANGO_ENV:
+dev (по умолчанию), prod или test.
+"""
+import os
+
+ENVIRONMENT = os.getenv('DJANGO_ENV', 'dev')
+
+if ENVIRONMENT == 'prod':
+    from .prod import *  # noqa: F401,F403
+elif ENVIRONMENT == 'test':
+    from .test import *  # noqa: F401,F403
+elif ENVIRONMENT == 'dev':
+    from .dev import *  # noqa: F401,F403
+else:
+    from django.core.exceptions import ImproperlyConfigured
+
+    raise ImproperlyConfigured(
+        f'Неизвестное окружение DJANGO_ENV={ENVIRONMENT!r}, '
+        'ожидается dev, prod или test'
+    )
@@ -0,0 +1,291 @@
+"""
+Общие настройки. Окружение выбирается в yatube/settings/__init__.py,
+значения по умолчанию здесь рассчитаны на боевой режим.
+"""
+import os
+from dotenv import load_dotenv
+
+LIMIT_POST = 10
+
+# Отложенная запись комментариев и подписок (posts.writebehind)
+WRITE_BEHIND_ENABLED = False
+WRITE_BEHIND_BATCH_SIZE = 100
+WRITE_BEHIND_FLUSH_INTERVAL = 2
+WRITE_BEHIND_MAX_ATTEMPTS = 3
+
+# Посты старше этого срока переносятся в архивные таблицы (posts.cold_storage)
+POST_ARCHIVE_AFTER_DAYS = 365
+
+# Полностраничный кэш статичных страниц (core.prerender)
+PRERENDERED_PAGES = ('about:author', 'about:tech')
+PRERENDER_TIMEOUT = 60 * 60 * 24
+PRERENDER_MAX_AGE = 60 * 10
+
+# Отложенная публикация постов (posts.scheduling)
+SCHEDULER_BATCH_SIZE = 100
+SCHEDULER_INTERVAL = 30
+
+# История правок постов (posts.revisions): каждая N-я версия — снимок
+REVISION_SNAPSHOT_EVERY = 10
+
+# Списки админки длиннее этого считаются по оценке (core.paginator)
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 10000
+
+# Почти одинаковые посты и комментарии (posts.fingerprints):
+# 'flag' помечает повтор для модераторов, 'reject' не пропускает его в формах.
+# Сходство — доля общих пар соседних слов; ниже 0.5 LSH находит плохо.
+DUPLICATE_POLICY = 'flag'
+DUPLICATE_MIN_SIMILARITY = 0.7
+DUPLICATE_MIN_WORDS = 8
+DUPLICATE_CANDIDATES = 50
+
+# Ограничение частоты запросов (core.traffic): страница ->
+# (ключ 'user' или 'ip', емкость корзины, период в секундах, методы)
+RATE_LIMIT_ENABLED = True
+RATE_LIMIT_FREE_PAGES = 5
+RATE_LIMIT_DEEP_PAGE_COST = 5
+RATE_LIMITS = {
+    'posts:post_create': ('user', 10, 60 * 10, ('POST',)),
+    'posts:add_comment': ('user', 20, 60 * 5, ('POST',)),
+    'posts:profile_follow': ('user', 30, 60 * 5, None),
+    'posts:profile_unfollow': ('user', 30, 60 * 5, None),
+    'posts:index': ('ip', 120, 60, None),
+    'posts:popular': ('ip', 120, 60, None),
+    'posts:group_list': ('ip', 120, 60, None),
+    'posts:profile': ('ip', 120, 60, None),
+    'posts:follow_index': ('user', 120, 60, None),
+    'posts:tag': ('ip', 120, 60, None),
+    'posts:mentions': ('user', 120, 60, None),
+}
+
+# Сброс нагрузки (core.traffic): дорогие страницы отвечают 503,
+# пока запросов в работе или среднее время SQL-запроса выше порога
+LOAD_SHED_ENABLED = True
+LOAD_SHED_MAX_IN_FLIGHT = 50
+LOAD_SHED_DB_LATENCY = 0.5
+LOAD_SHED_LATENCY_HALF_LIFE = 5
+LOAD_SHED_RETRY_AFTER = 10
+LOAD_SHED_VIEWS = (
+    'posts:index',
+    'posts:popular',
+    'posts:group_list',
+    'posts:profile',
+    'posts:follow_index',
+    'posts:tag',
+    'posts:mentions',
+    'posts:archive',
+    'posts:archive_month',
+    'posts:group_archive',
+    'posts:group_archive_month',
+    'posts:profile_archive',
+    'posts:profile_archive_month',
+)
+
+# Фоновые задачи (core.jobs)
+JOB_CHUNK_SIZE = 200
+JOB_STALE_AFTER = 60 * 5
+
+# Очередь исходящей почты (core.mail)
+EMAIL_QUEUE_BATCH_SIZE = 100
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+EMAIL_QUEUE_RETRY_DELAY = 60
+EMAIL_QUEUE_MAX_DELAY = 60 * 60
+EMAIL_QUEUE_KEEP_DAYS = 30
+
+# Уведомления о новых постах подписок и письма-дайджесты (posts.notifications)
+NOTIFICATION_DIGEST_INTERVAL = 60 * 60 * 24
+NOTIFICATION_DIGEST_BATCH_SIZE = 500
+NOTIFICATION_DIGEST_LIMIT = 10
+NOTIFICATION_KEEP_DAYS = 30
+# Подписчикам авторов, у которых их больше, уведомления раскладывает
+# фоновая задача (run_jobs), а не запрос с новым постом
+NOTIFICATION_SYNC_FOLLOWERS = 200
+
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+load_dotenv()
+SECRET_KEY = str(os.getenv('SECRET_KEY'))
+
+# Меняется с каждой выкладкой и сбрасывает кэш готовых страниц
+DEPLOY_VERSION = os.getenv('DEPLOY_VERSION', '1')
+
+# Адрес сайта для ссылок в письмах, которые уходят не из запроса
+SITE_URL = os.getenv('SITE_URL', 'http://localhost:8000')
+
+# Живые обновления страниц через Server-Sent Events (posts.live).
+# Каждая открытая вкладка держит поток LIVE_STREAM_DURATION секунд:
+# включать только с асинхронными воркерами (gevent, eventlet),
+# их класс указывается в SERVER_WORKER_CLASS для check --deploy
+LIVE_UPDATES_ENABLED = os.getenv('LIVE_UPDATES_ENABLED', 'False') == 'True'
+SERVER_WORKER_CLASS = os.getenv('SERVER_WORKER_CLASS', 'sync')
+LIVE_TRANSPORT = os.getenv('LIVE_TRANSPORT', 'posts.live.LocalTransport')
+LIVE_REDIS_URL = os.getenv('LIVE_REDIS_URL', 'redis://localhost:6379/0')
+LIVE_STREAM_DURATION = 60 * 5
+LIVE_KEEPALIVE = 20
+LIVE_RETRY_MS = 3000
+LIVE_HISTORY = 50
+LIVE_QUEUE_SIZE = 100
+
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+# За обратным прокси: 'HTTP_X_REAL_IP' или 'HTTP_X_FORWARDED_FOR'.
+# Из X-Forwarded-For берется запись, дописанная нашими прокси:
+# RATE_LIMIT_TRUSTED_PROXIES-я справа (по числу прокси перед сайтом)
+RATE_LIMIT_IP_HEADER = os.getenv('RATE_LIMIT_IP_HEADER', 'REMOTE_ADDR')
+RATE_LIMIT_TRUSTED_PROXIES = int(os.getenv('RATE_LIMIT_TRUSTED_PROXIES', 1))
+
+# db, cached_db или signed_cookies
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.getenv(
+    'SESSION_BACKEND', 'cached_db'
+)
+
+# ModelBackend оставлен для сессий, начатых до CachedModelBackend
+AUTHENTICATION_BACKENDS = [
+    'users.backends.CachedModelBackend',
+    'django.contrib.auth.backends.ModelBackend',
+]
+
+LOGIN_URL = 'users:login'
+LOGIN_REDIRECT_URL = 'posts:index'
+
+INSTALLED_APPS = [
+    'users.apps.UsersConfig',
+    'posts.apps.PostsConfig',
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'core.apps.CoreConfig',
+    'about.apps.AboutConfig',
+    'sorl.thumbnail'
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'core.traffic.LoadSheddingMiddleware',
+    'core.prerender.PrerenderMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.traffic.RateLimitMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+
+CONTEXT_PROCESSORS = [
+    'django.template.context_processors.debug',
+    'django.template.context_processors.request',
+    'django.contrib.auth.context_processors.auth',
+    'django.contrib.messages.context_processors.messages',
+    'core.context_processors.year.year',
+    'posts.context_processors.notifications',
+    'posts.context_processors.live_updates',
+]
+
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+CACHED_TEMPLATE_LOADERS = [
+    ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+]
+
+# Движок для шаблонов лент: 'django' или 'jinja2' (templates/jinja2/)
+FEED_TEMPLATE_ENGINE = os.getenv('FEED_TEMPLATE_ENGINE', 'django')
+
+TEMPLATES = [
+    {
+        'NAME': 'django',
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'OPTIONS': {
+            'context_processors': CONTEXT_PROCESSORS,
+            'loaders': CACHED_TEMPLATE_LOADERS,
+        },
+    },
+    {
+        'NAME': 'jinja2',
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [os.path.join(TEMPLATES_DIR, 'jinja2')],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'yatube.jinja2.environment',
+            'context_processors': CONTEXT_PROCESSORS,
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+
+DATABASES = {
+    'default': {
+        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'USER': os.getenv('DB_USER', ''),
+        'PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', ''),
+        'PORT': os.getenv('DB_PORT', ''),
+    }
+}
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+STATIC_URL = '/static/'
+STATICFILES_DIRS = (os.path.join(BASE_DIR, 'static'),)
+STATIC_ROOT = os.getenv('STATIC_ROOT', os.path.join(BASE_DIR, 'staticfiles'))
+
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+EMAIL_DELIVERY_BACKEND = os.getenv(
+    'EMAIL_DELIVERY_BACKEND', 'django.core.mail.backends.filebased.EmailBackend'
+)
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
@@ -0,0 +1,7 @@
+"""Локальная разработка: отладка и перечитывание шаблонов."""
+from .base import *  # noqa: F401,F403
+from .base import TEMPLATES, TEMPLATE_LOADERS
+
+DEBUG = True
+
+TEMPLATES[0]['OPTIONS']['loaders'] = TEMPLATE_LOADERS
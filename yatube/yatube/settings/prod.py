@@ -0,0 +1,66 @@
+"""
+Боевой режим. Отладка и журнал SQL-запросов выключены, шаблоны
+кэшируются загрузчиком (см. base), соединения с базой живут между
+запросами, кэш общий для всех процессов (memcached или redis),
+статика сжата и отдается с хешем в имени, почта уходит через SMTP
+из очереди (core.mail).
+Проверка: python manage.py check --deploy.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from .base import *  # noqa: F401,F403
+from .base import DATABASES, MIDDLEWARE
+
+DEBUG = os.getenv('DEBUG', 'False') == 'True'
+
+SECRET_KEY = os.getenv('SECRET_KEY', '')
+
+ALLOWED_HOSTS = [
+    host.strip() for host in os.getenv('ALLOWED_HOSTS', '').split(',')
+    if host.strip()
+]
+
+DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('CONN_MAX_AGE', 60))
+
+# Один кэш держит сессии, счетчики ограничения запросов, версии графа
+# подписок, готовые страницы и пользователей, поэтому он пишется почти
+# на каждый запрос и должен атомарно выполнять incr: нужен memcached
+# или redis (CACHE_BACKEND, например
+# django.core.cache.backends.memcached.PyLibMCCache, и CACHE_LOCATION).
+# Файловый кэш перебирает весь каталог при каждой записи, а у него
+# и у кэша в базе incr — это отдельные чтение и запись.
+if not os.getenv('CACHE_BACKEND'):
+    raise ImproperlyConfigured(
+        'Для DJANGO_ENV=prod задайте CACHE_BACKEND: memcached или redis'
+    )
+CACHES = {
+    'default': {
+        'BACKEND': os.environ['CACHE_BACKEND'],
+        'LOCATION': os.getenv('CACHE_LOCATION', '127.0.0.1:11211'),
+        'TIMEOUT': 300,
+    }
+}
+
+MIDDLEWARE = [
+    MIDDLEWARE[0],
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    *MIDDLEWARE[1:],
+]
+STATICFILES_STORAGE = (
+    'whitenoise.storage.CompressedManifestStaticFilesStorage'
+)
+
+EMAIL_DELIVERY_BACKEND = os.getenv(
+    'EMAIL_DELIVERY_BACKEND', 'django.core.mail.backends.smtp.EmailBackend'
+)
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 25))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False') == 'True'
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', 10))
+
+SECURE_CONTENT_TYPE_NOSNIFF = True
+SECURE_BROWSER_XSS_FILTER = True
@@ -0,0 +1,88 @@
+"""
+Прогон тестов: manage.py test и pytest (в том числе pytest -n auto).
+
+Пароли хешируются MD5, загрузки хранятся в памяти. Каждый процесс
+pytest-xdist получает свой MEDIA_ROOT; тестовая база SQLite у каждого
+процесса своя и живет в памяти.
+"""
+import os
+import tempfile
+
+from .base import *  # noqa: F401,F403
+from .base import MIDDLEWARE
+
+DEBUG = False
+
+SECRET_KEY = 'test-secret-key'
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+TEST_WORKER = os.getenv('PYTEST_XDIST_WORKER', 'main')
+MEDIA_ROOT = os.path.join(tempfile.gettempdir(), f'yatube-media-{TEST_WORKER}')
+DEFAULT_FILE_STORAGE = 'core.storage.InMemoryStorage'
+THUMBNAIL_STORAGE = DEFAULT_FILE_STORAGE
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+TEST_RUNNER = 'core.test_runner.TimedTestRunner'
+
+# Тесты ходят с одного адреса, лимиты включают в core/tests.py
+RATE_LIMIT_ENABLED = False
+LOAD_SHED_ENABLED = False
+
+MIDDLEWARE = ['core.query_budget.QueryBudgetMiddleware', *MIDDLEWARE]
+
+# Бюджеты SQL-запросов страниц: (запросов, повторов), см. core.query_budget.
+# posts/tests/test_query_budgets.py проверяет их на нескольких объемах данных.
+QUERY_BUDGETS_ENFORCED = False
+QUERY_BUDGET_IGNORED_TABLES = ('thumbnail_kvstore',)
+# Создание поста: целевое число запросов на каждый шаг сохранения,
+# без повторов. Новый шаг или лишний запрос в шаге поднимает бюджет
+# только явной правкой этого списка.
+POST_CREATE_QUERIES = {
+    'сессия и пользователь': 2,
+    'группа из формы': 2,
+    'INSERT поста': 1,
+    'хештеги и упоминания (posts.tagging)': 7,
+    'оценка для популярного (posts.trending)': 2,
+    'помесячный архив: вставка ячеек и один UPDATE': 2,
+    'число подписчиков автора (posts.notifications)': 1,
+    'счетчики группы (posts.group_stats)': 3,
+}
+QUERY_BUDGETS = {
+    'posts:index': (5, 0),
+    'posts:popular': (5, 0),
+    'posts:groups': (5, 0),
+    'posts:group_list': (6, 0),
+    'posts:archive': (4, 0),
+    'posts:archive_month': (8, 0),
+    'posts:group_archive': (5, 0),
+    'posts:group_archive_month': (9, 0),
+    'posts:profile_archive': (5, 0),
+    'posts:profile_archive_month': (9, 0),
+    'posts:profile': (9, 0),
+    'posts:post_detail': (6, 0),
+    'posts:post_create': (sum(POST_CREATE_QUERIES.values()), 0),
+    'posts:post_edit': (14, 0),
+    'posts:drafts': (5, 0),
+    'posts:post_history': (6, 0),
+    'posts:add_comment': (8, 0),
+    'posts:live_feed': (2, 0),
+    'posts:live_comments': (2, 0),
+    'posts:follow_index': (7, 0),
+    'posts:tag': (5, 0),
+    'posts:mentions': (4, 0),
+    'posts:profile_follow': (4, 0),
+    'posts:profile_unfollow': (4, 0),
+    'users:signup': (3, 0),
+    'users:logout': (4, 0),
+    'users:login': (3, 0),
+    'users:passport_change_form': (3, 0),
+    'users:password_change_done': (3, 0),
+    'users:password_reset_form': (3, 0),
+    'users:password_reset_confirm': (5, 1),
+    'users:password_reset_done': (3, 0),
+    'users:password_reset_complete': (3, 0),
+    'about:author': (3, 0),
+    'about:tech': (3, 0),
+}